@@ -0,0 +1,170 @@
+"""
+Batched evaluation of custom achievement conditions against a user's library
+"""
+
+from datetime import datetime
+
+from models import db, Game, UserGame, CustomAchievement, CustomAchievementProgress, log_activity, get_custom_achievements_for_games
+
+
+def load_game_states(user_id):
+    """Load a user's library in one query, indexed by Steam app id"""
+    user_games = UserGame.query.filter_by(user_id=user_id)\
+        .join(Game)\
+        .options(db.contains_eager(UserGame.game))\
+        .all()
+    return {user_game.game.steam_app_id: user_game for user_game in user_games}
+
+
+class AchievementEvaluator:
+    """Evaluates any number of custom achievements against a single snapshot of a user's games"""
+
+    def __init__(self, user_id, user_games=None):
+        self.user_id = user_id
+        if user_games is None:
+            self.games = load_game_states(user_id)
+        else:
+            self.games = {user_game.game.steam_app_id: user_game for user_game in user_games}
+
+    def evaluate(self, custom_achievement):
+        """
+        Evaluate one achievement condition
+        Returns {'completed': bool, 'progress': percentage}
+        """
+        condition_type = custom_achievement.condition_type
+        required_games = custom_achievement.games_list
+
+        if condition_type == 'all_games_100':
+            completed_games = sum(
+                1 for game_id in required_games
+                if game_id in self.games and self.games[game_id].progress_percentage >= 100
+            )
+            return {
+                'completed': completed_games == len(required_games),
+                'progress': (completed_games / len(required_games)) * 100 if required_games else 0
+            }
+
+        elif condition_type == 'all_games_owned':
+            owned_count = sum(1 for game_id in required_games if game_id in self.games)
+            return {
+                'completed': owned_count == len(required_games),
+                'progress': (owned_count / len(required_games)) * 100 if required_games else 0
+            }
+
+        elif condition_type == 'playtime_total':
+            target_hours = float(custom_achievement.playtime_target or 0)
+            total_playtime = sum(
+                self.games[game_id].playtime_hours for game_id in set(required_games) if game_id in self.games
+            )
+            return {
+                'completed': total_playtime >= target_hours,
+                'progress': min((total_playtime / target_hours) * 100, 100) if target_hours else 0
+            }
+
+        return {'completed': False, 'progress': 0}
+
+    def evaluate_all(self, custom_achievements):
+        """Evaluate many achievements, returning results keyed by achievement id"""
+        return {
+            custom_achievement.id: self.evaluate(custom_achievement)
+            for custom_achievement in custom_achievements
+        }
+
+
+def refresh_custom_achievement_progress(user_id, custom_achievements=None, changed_appids=None, log_milestones=True):
+    """
+    Re-evaluate a user's custom achievements and persist the results
+    changed_appids limits the work to achievements that reference one of those games
+    Logs a milestone_reached activity when an achievement becomes completed
+    Returns the newly completed achievements (caller should commit)
+    """
+    if custom_achievements is None:
+        if changed_appids is not None:
+            # Only the achievements that reference a changed game, found through achievement_games
+            custom_achievements = get_custom_achievements_for_games(user_id, changed_appids)
+        else:
+            custom_achievements = CustomAchievement.query.filter_by(user_id=user_id).all()
+    elif changed_appids is not None:
+        changed_appids = set(changed_appids)
+        custom_achievements = [ca for ca in custom_achievements if changed_appids.intersection(ca.games_list)]
+
+    if not custom_achievements:
+        return []
+
+    evaluator = AchievementEvaluator(user_id)
+    existing = {
+        row.custom_achievement_id: row
+        for row in CustomAchievementProgress.query.filter(
+            CustomAchievementProgress.user_id == user_id,
+            CustomAchievementProgress.custom_achievement_id.in_([ca.id for ca in custom_achievements])
+        )
+    }
+
+    now = datetime.utcnow()
+    newly_completed = []
+    for custom_achievement in custom_achievements:
+        result = evaluator.evaluate(custom_achievement)
+        row = existing.get(custom_achievement.id)
+        if not row:
+            row = CustomAchievementProgress(user_id=user_id, custom_achievement_id=custom_achievement.id, completed=False)
+            db.session.add(row)
+
+        was_completed = row.completed
+        row.progress = result['progress']
+        row.completed = result['completed']
+        row.updated_at = now
+
+        if row.completed and not was_completed:
+            row.completed_at = now
+            newly_completed.append(custom_achievement)
+            if log_milestones:
+                log_activity(
+                    user_id=user_id,
+                    activity_type='milestone_reached',
+                    title=f'Completed custom achievement "{custom_achievement.name}"',
+                    description=custom_achievement.description,
+                    custom_achievement_id=custom_achievement.id,
+                    metadata={
+                        'condition_type': custom_achievement.condition_type,
+                        'games_count': len(custom_achievement.games_list)
+                    }
+                )
+        elif not row.completed:
+            row.completed_at = None
+
+    return newly_completed
+
+
+def get_custom_achievement_progress(user_id, custom_achievements):
+    """
+    Read precomputed progress for a user's custom achievements
+    Returns {achievement_id: {'completed', 'progress', 'completed_at'}}
+    """
+    if not custom_achievements:
+        return {}
+
+    rows = {
+        row.custom_achievement_id: row
+        for row in CustomAchievementProgress.query.filter(
+            CustomAchievementProgress.user_id == user_id,
+            CustomAchievementProgress.custom_achievement_id.in_([ca.id for ca in custom_achievements])
+        )
+    }
+
+    # Achievements created before progress was materialized get evaluated once, without feed events
+    missing = [ca for ca in custom_achievements if ca.id not in rows]
+    if missing:
+        refresh_custom_achievement_progress(user_id, missing, log_milestones=False)
+        db.session.commit()
+        rows.update({
+            row.custom_achievement_id: row
+            for row in CustomAchievementProgress.query.filter(
+                CustomAchievementProgress.user_id == user_id,
+                CustomAchievementProgress.custom_achievement_id.in_([ca.id for ca in missing])
+            )
+        })
+
+    return {
+        achievement_id: {'completed': row.completed, 'progress': row.progress, 'completed_at': row.completed_at}
+        for achievement_id, row in rows.items()
+    }
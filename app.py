@@ -1,6 +1,8 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session
+from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session, stream_with_context, g
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+from flask_sqlalchemy.pagination import Pagination
 from flask_wtf import FlaskForm
+from flask_wtf.csrf import generate_csrf, validate_csrf
 from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, PasswordField, SubmitField, TextAreaField, SelectMultipleField, SelectField
 from wtforms.validators import DataRequired, Length, Email, ValidationError
@@ -14,14 +16,22 @@ import requests
 import time
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from collections import defaultdict
 
 # Import our models and configuration
 from config import config
-from models import db, User, Game, UserGame, SteamAchievement, CustomAchievement, SharedAchievement, AchievementImage, ActivityFeed, EmailVerificationToken, PasswordResetToken, AchievementCollection, CollectionItem, UserCollectionProgress, UserFriendship, AchievementRating, AchievementReview, get_or_create_game, log_activity, get_recent_activities, get_user_friends, get_mutual_friends, are_friends, get_friendship_status
-from s3_manager import s3_manager
+from models import db, User, Game, UserGame, GameSchemaCache, SyncJob, SteamAchievement, CustomAchievement, CustomAchievementProgress, UserStats, AchievementGame, SharedAchievement, AchievementImage, ActivityFeed, EmailVerificationToken, EmailChangeToken, PasswordResetToken, AchievementCollection, CollectionItem, UserCollectionProgress, UserFriendship, FriendTimeline, AchievementRating, AchievementReview, get_or_create_game, get_cached_schemas, upsert_game_schema, upsert_steam_achievements, index_achievement_games, shared_compatibility_subquery, compatibility_expression, get_shared_compatibility, adjust_user_stats, recompute_user_stats, adjust_image_refs, USER_STATS_STEAM_COLUMNS, recalculate_collection_progress, log_activity, get_recent_activities, get_activity_feed_version, prune_friend_timeline, encode_activity_cursor, decode_activity_cursor, encode_keyset_cursor, decode_keyset_cursor, apply_keyset_page, user_game_progress_expression, get_user_friends, get_mutual_friends, are_friends, get_friendship_status
+from s3_manager import s3_manager, parse_derivative_filename
+from image_pipeline import image_pipeline
 from email_service import email_service
+from steam_sync import steam_sync_engine
+from job_queue import job_queue
+from game_cache import game_cache
+from counters import counters
+from cache import cache
+from response_pipeline import response_pipeline
+from achievement_engine import AchievementEvaluator, refresh_custom_achievement_progress, get_custom_achievement_progress
 
 def create_app():
     """Application factory pattern"""
@@ -40,6 +50,27 @@ def create_app():
     # Initialize email service
     email_service.init_app(app)
     
+    # Initialize Steam sync engine
+    steam_sync_engine.init_app(app)
+    
+    # Initialize background job queue
+    job_queue.init_app(app)
+    
+    # Initialize image processing pipeline (registers its job handler)
+    image_pipeline.init_app(app)
+    
+    # Initialize game metadata cache
+    game_cache.init_app(app)
+    
+    # Initialize engagement counter buffer
+    counters.init_app(app)
+    
+    # Initialize shared data cache
+    cache.init_app(app)
+    
+    # Initialize conditional GET, compression and JSON serialization for responses
+    response_pipeline.init_app(app)
+    
     # Create tables on first run (for Railway deployment)
     with app.app_context():
         try:
@@ -84,17 +115,24 @@ def create_app():
         except Exception as e:
             print("🔧 Creating basic database tables...")
             # Only create basic tables, skip email tables to avoid conflicts
-            from models import User, Game, UserGame, SteamAchievement, CustomAchievement, SharedAchievement, AchievementImage, ActivityFeed
+            from models import User, Game, UserGame, GameSchemaCache, SyncJob, SteamAchievement, CustomAchievement, CustomAchievementProgress, SharedAchievement, AchievementImage, ActivityFeed, UserFriendship, FriendTimeline, UserStats, AchievementGame
             
             # Create tables individually to avoid email table conflicts
             User.__table__.create(db.engine, checkfirst=True)
             Game.__table__.create(db.engine, checkfirst=True)
             UserGame.__table__.create(db.engine, checkfirst=True)
+            GameSchemaCache.__table__.create(db.engine, checkfirst=True)
             SteamAchievement.__table__.create(db.engine, checkfirst=True)
             CustomAchievement.__table__.create(db.engine, checkfirst=True)
+            CustomAchievementProgress.__table__.create(db.engine, checkfirst=True)
+            UserStats.__table__.create(db.engine, checkfirst=True)
+            AchievementGame.__table__.create(db.engine, checkfirst=True)
             SharedAchievement.__table__.create(db.engine, checkfirst=True)
             AchievementImage.__table__.create(db.engine, checkfirst=True)
             ActivityFeed.__table__.create(db.engine, checkfirst=True)
+            SyncJob.__table__.create(db.engine, checkfirst=True)
+            UserFriendship.__table__.create(db.engine, checkfirst=True)
+            FriendTimeline.__table__.create(db.engine, checkfirst=True)
             
             print("✅ Basic database tables created successfully")
             print("⚠️  Run create_email_tables.py to add email functionality")
@@ -103,13 +141,61 @@ def create_app():
 
 app = create_app()
 
+# CSRF token for JavaScript requests (forms get theirs from hidden_tag)
+app.add_template_global(generate_csrf, 'csrf_token')
+
 # Template helper function for image URLs
 @app.template_global()
-def get_achievement_image_url(filename):
-    """Get the correct URL for an achievement image (S3 or local)"""
+def get_achievement_image_url(filename, size='full', fmt=None):
+    """Get the correct URL for an achievement image (S3 or local) at a derivative size"""
     if not filename:
         return None
-    return s3_manager.get_image_url(filename)
+    return s3_manager.get_image_url(filename, size, fmt)
+
+@app.template_global()
+def get_achievement_image_srcset(filename, fmt=None):
+    """srcset for an achievement image's derivatives (None for legacy single-image uploads)"""
+    if not filename:
+        return None
+    return s3_manager.get_image_srcset(filename, fmt, get_achievement_image_state(filename)['variants'])
+
+DEFAULT_IMAGE_STATE = {'status': 'ready', 'placeholder': None, 'variants': None}
+
+def preload_achievement_image_states(filenames):
+    """
+    Load the processing state of every image a page renders in one query
+    States are kept for the current request only, so a status change is seen by the next page view
+    """
+    if 'achievement_image_states' not in g:
+        g.achievement_image_states = {}
+    states = g.achievement_image_states
+
+    missing = {filename for filename in filenames
+               if filename and filename not in states and parse_derivative_filename(filename)}
+    if missing:
+        rows = db.session.query(
+            AchievementImage.filename, AchievementImage.status, AchievementImage.placeholder, AchievementImage.variants
+        ).filter(AchievementImage.filename.in_(missing))
+        for row in rows:
+            states[row.filename] = {'status': row.status, 'placeholder': row.placeholder, 'variants': row.variants}
+        for filename in missing - states.keys():
+            states[filename] = DEFAULT_IMAGE_STATE
+    return states
+
+@app.template_global()
+def get_achievement_image_state(filename):
+    """
+    Processing status, inline placeholder and derivative sizes for an achievement image
+    Returns dict with 'status' ('pending', 'ready' or 'failed'), 'placeholder' and 'variants'
+    """
+    if not parse_derivative_filename(filename):
+        return DEFAULT_IMAGE_STATE  # Legacy single-image uploads
+    return preload_achievement_image_states([filename])[filename]
+
+@app.template_global()
+def live_count(obj, column):
+    """Counter value including increments that have not been flushed yet"""
+    return counters.live_value(obj, column)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -195,101 +281,46 @@ class CustomAchievementForm(FlaskForm):
 
 # Legacy CSV loading function removed - now using database queries
 
-def process_achievement_image(image_file, user_id, achievement_id):
-    """Process and save achievement image using S3 or local storage"""
+def process_achievement_image(image_file, user_id):
+    """
+    Accept an achievement image for background processing
+    Returns (achievement_image, needs_processing); achievement_image is None if the upload was rejected
+    """
     if not image_file:
-        return None, None
+        return None, False
     
-    # Use S3 manager to upload image
-    filename, url = s3_manager.upload_image(image_file, user_id, achievement_id)
-    
-    if filename:
-        print(f"✅ Achievement image processed: {filename}")
-        return filename, url
-    else:
-        print("❌ Failed to process achievement image")
-        return None, None
+    try:
+        achievement_image, needs_processing = image_pipeline.accept_upload(image_file, user_id)
+        if needs_processing:
+            print(f"✅ Achievement image spooled: {achievement_image.filename}")
+        else:
+            print(f"♻️  Achievement image already stored: {achievement_image.filename}")
+        return achievement_image, needs_processing
+    except Exception as e:
+        print(f"❌ Failed to accept achievement image: {e}")
+        return None, False
 
 # Legacy JSON functions removed - now using database operations
 
-def check_custom_achievement_progress_db(user_id, custom_achievement, games_list=None):
-    """Check if a custom achievement is completed using database data"""
-    condition_type = custom_achievement.condition_type
-    required_games = custom_achievement.games_list
-    
-    if condition_type == 'all_games_100':
-        # Check if all required games are 100% complete
-        for game_id in required_games:
-            user_game = UserGame.query.join(Game).filter(
-                UserGame.user_id == user_id,
-                Game.steam_app_id == game_id
-            ).first()
-            if not user_game or user_game.progress_percentage < 100:
-                return False
+# Legacy functions removed - custom achievements are evaluated with AchievementEvaluator
+
+def steam_game_changed(game, user_game):
+    """Check whether an owned game was played since its last sync"""
+    if not user_game or not user_game.last_synced:
         return True
     
-    elif condition_type == 'all_games_owned':
-        # Check if all required games are owned
-        owned_games = UserGame.query.join(Game).filter(
-            UserGame.user_id == user_id
-        ).all()
-        owned_game_ids = {ug.game.steam_app_id for ug in owned_games}
-        return all(game_id in owned_game_ids for game_id in required_games)
-    
-    elif condition_type == 'playtime_total':
-        # Check if total playtime across games meets target
-        target_hours = float(custom_achievement.playtime_target or 0)
-        user_games = UserGame.query.join(Game).filter(
-            UserGame.user_id == user_id,
-            Game.steam_app_id.in_(required_games)
-        ).all()
-        total_playtime = sum(ug.playtime_hours for ug in user_games)
-        return total_playtime >= target_hours
-    
-    return False
-
-def get_custom_achievement_progress_db(user_id, custom_achievement):
-    """Get progress percentage for a custom achievement using database data"""
-    condition_type = custom_achievement.condition_type
-    required_games = custom_achievement.games_list
-    
-    if condition_type == 'all_games_100':
-        completed_games = 0
-        for game_id in required_games:
-            user_game = UserGame.query.join(Game).filter(
-                UserGame.user_id == user_id,
-                Game.steam_app_id == game_id
-            ).first()
-            if user_game and user_game.progress_percentage >= 100:
-                completed_games += 1
-        return (completed_games / len(required_games)) * 100 if required_games else 0
-    
-    elif condition_type == 'all_games_owned':
-        owned_games = UserGame.query.join(Game).filter(
-            UserGame.user_id == user_id
-        ).all()
-        owned_game_ids = {ug.game.steam_app_id for ug in owned_games}
-        owned_count = sum(1 for game_id in required_games if game_id in owned_game_ids)
-        return (owned_count / len(required_games)) * 100 if required_games else 0
-    
-    elif condition_type == 'playtime_total':
-        target_hours = float(custom_achievement.playtime_target or 0)
-        if target_hours == 0:
-            return 0
-        user_games = UserGame.query.join(Game).filter(
-            UserGame.user_id == user_id,
-            Game.steam_app_id.in_(required_games)
-        ).all()
-        total_playtime = sum(ug.playtime_hours for ug in user_games)
-        return min((total_playtime / target_hours) * 100, 100)
+    if game.get('playtime_forever', 0) != user_game.playtime_minutes:
+        return True
     
-    return 0
+    last_played = game.get('rtime_last_played') or 0
+    return last_played > 0 and datetime.utcfromtimestamp(last_played) > user_game.last_synced
 
-# Legacy functions removed - now using database-based functions check_custom_achievement_progress_db and get_custom_achievement_progress_db
-
-def fetch_and_save_steam_data(steam_api_key, steam_id):
-    """Fetch Steam data and save to database with progress feedback"""
-    print("🎮 Starting Steam data fetch...")
+def fetch_and_save_steam_data(steam_api_key, steam_id, user_id, job=None, full_sync=True):
+    """
+    Fetch Steam data and save to database with progress feedback
+    With full_sync=False only games whose playtime or last-played time changed are re-fetched
+    """
+    print(f"🎮 Starting {'full' if full_sync else 'incremental'} Steam data fetch...")
     
     # Step 1: Fetch owned games list
     print("📋 Fetching owned games list...")
@@ -314,16 +345,59 @@ def fetch_and_save_steam_data(steam_api_key, steam_id):
         
         print(f"📊 Found {total_games} games in library. Processing achievements...")
         
-        user_id = current_user.id
+        if job:
+            job.report_progress(games_total=total_games)
+            db.session.commit()
+        
         games_processed = 0
+        games_skipped = 0
         achievements_processed = 0
         games_with_achievements = 0
         
         # Process games in batches for better performance
         batch_size = 10
+        sync_started = time.monotonic()
+        
+        # Load every stored UserGame up front instead of one SELECT per game
+        user_games = {
+            user_game.game.steam_app_id: user_game
+            for user_game in UserGame.query.filter_by(user_id=user_id).options(db.joinedload(UserGame.game))
+        }
+        
+        # Incremental syncs only fetch achievements for games played since the last sync
+        appids = [
+            str(game['appid']) for game in games_data
+            if full_sync or steam_game_changed(game, user_games.get(str(game['appid'])))
+        ]
+        if not full_sync:
+            print(f"🔍 {len(appids)} of {total_games} games changed since the last sync")
+        
+        # Schemas are shared across users, so reuse anything another sync already downloaded
+        cached_schemas = get_cached_schemas(appids)
+        schema_cache = {
+            appid: {
+                'schema': row.schema,
+                'fresh': row.is_fresh,
+                'etag': row.etag,
+                'last_modified': row.last_modified
+            }
+            for appid, row in cached_schemas.items()
+        }
+        schemas_from_cache = 0
+        
+        # Rate limiting - achievement requests run concurrently, paced by the sync engine's token bucket
+        fetched = steam_sync_engine.fetch_achievements(steam_api_key, steam_id, appids, schema_cache)
+        changed_appids = set(appids)
         
-        for i, game in enumerate(games_data):
+        for game in games_data:
             appid = str(game['appid'])
+            if appid not in changed_appids:
+                games_skipped += 1
+                games_processed += 1
+                continue
+            
+            # Results come back in request order, so the next one belongs to this game
+            _, fetch_result = next(fetched)
             name = game.get('name', f'App {appid}')
             playtime_minutes = game['playtime_forever']
             
@@ -335,124 +409,120 @@ def fetch_and_save_steam_data(steam_api_key, steam_id):
             # Get or create game
             game_obj = get_or_create_game(appid, name)
             
-            # Get achievements from Steam API
-            achievements_url = 'https://api.steampowered.com/ISteamUserStats/GetPlayerAchievements/v1/'
-            achievements_params = {
-                'key': steam_api_key,
-                'steamid': steam_id,
-                'appid': appid
-            }
-            
-            schema_url = 'https://api.steampowered.com/ISteamUserStats/GetSchemaForGame/v2/'
-            schema_params = {
-                'key': steam_api_key,
-                'appid': appid
-            }
+            # Keep the shared schema cache current
+            schema_source = fetch_result['schema_source']
+            if schema_source == 'cache':
+                schemas_from_cache += 1
+            elif schema_source == 'revalidated':
+                schemas_from_cache += 1
+                cached_schemas[appid].mark_revalidated(steam_sync_engine.schema_ttl_hours)
+            elif schema_source == 'fetched':
+                schema_args = (fetch_result['schema'], steam_sync_engine.schema_ttl_hours)
+                schema_kwargs = {'etag': fetch_result['schema_etag'], 'last_modified': fetch_result['schema_last_modified']}
+                schema_row = cached_schemas.get(appid)
+                if schema_row:
+                    schema_row.update_schema(*schema_args, **schema_kwargs)
+                else:
+                    # Another user's sync may be caching the same new game right now
+                    upsert_game_schema(appid, *schema_args, **schema_kwargs)
             
-            achievements_list = []
+            total_achievements = 0
+            unlocked_achievements = 0
             try:
-                # Fetch achievement data with timeout
-                ach_response = requests.get(achievements_url, params=achievements_params, timeout=10)
-                schema_response = requests.get(schema_url, params=schema_params, timeout=10)
+                if fetch_result['error'] == 'timeout':
+                    print(f"   ⏰ Timeout fetching achievements for {name}")
+                elif fetch_result['error']:
+                    print(f"   ⚠️ Error fetching achievements for {name}: {fetch_result['error']}")
                 
-                if ach_response.status_code == 200 and schema_response.status_code == 200:
-                    ach_data = ach_response.json().get('playerstats', {})
-                    ach_list = ach_data.get('achievements', [])
-                    schema_data = schema_response.json().get('game', {}).get('availableGameStats', {}).get('achievements', [])
+                ach_list = fetch_result['achievements']
+                schema_data = fetch_result['schema']
+                
+                if ach_list and schema_data:
+                    games_with_achievements += 1
+                    schema_map = {a['name']: a for a in schema_data}
+                    achievement_rows = []
                     
-                    if ach_list and schema_data:
-                        games_with_achievements += 1
-                        schema_map = {a['name']: a for a in schema_data}
-                        
-                        for ach in ach_list:
-                            api_name = ach['apiname']
-                            achieved = bool(ach['achieved'])
-                            unlocktime = ach['unlocktime']
-                            
-                            schema = schema_map.get(api_name, {})
-                            display_name = schema.get('displayName', api_name)
-                            description = schema.get('description', '')
-                            
-                            unlock_time = None
-                            if unlocktime > 0:
-                                unlock_time = datetime.utcfromtimestamp(unlocktime)
-                            
-                            # Update or create Steam achievement
-                            steam_ach = SteamAchievement.query.filter_by(
-                                user_id=user_id,
-                                game_id=game_obj.id,
-                                api_name=api_name
-                            ).first()
-                            
-                            if steam_ach:
-                                # Update existing
-                                steam_ach.display_name = display_name
-                                steam_ach.description = description
-                                steam_ach.achieved = achieved
-                                steam_ach.unlock_time = unlock_time
-                            else:
-                                # Create new
-                                steam_ach = SteamAchievement(
-                                    user_id=user_id,
-                                    game_id=game_obj.id,
-                                    api_name=api_name,
-                                    display_name=display_name,
-                                    description=description,
-                                    achieved=achieved,
-                                    unlock_time=unlock_time
-                                )
-                                db.session.add(steam_ach)
-                            
-                            achievements_list.append(steam_ach)
-                            achievements_processed += 1
+                    for ach in ach_list:
+                        api_name = ach['apiname']
+                        unlocktime = ach['unlocktime']
+                        schema = schema_map.get(api_name, {})
                         
-                        # Log achievement count for games with many achievements
-                        if len(achievements_list) > 50:
-                            print(f"   🏆 {name}: {len(achievements_list)} achievements")
+                        achievement_rows.append({
+                            'api_name': api_name,
+                            'display_name': schema.get('displayName', api_name),
+                            'description': schema.get('description', ''),
+                            'achieved': bool(ach['achieved']),
+                            'unlock_time': datetime.utcfromtimestamp(unlocktime) if unlocktime > 0 else None
+                        })
+                    
+                    # One SELECT per game plus a bulk upsert of whatever changed
+                    upsert_steam_achievements(user_id, game_obj.id, achievement_rows)
+                    
+                    total_achievements = len(achievement_rows)
+                    unlocked_achievements = sum(1 for row in achievement_rows if row['achieved'])
+                    achievements_processed += total_achievements
+                    
+                    # Log achievement count for games with many achievements
+                    if total_achievements > 50:
+                        print(f"   🏆 {name}: {total_achievements} achievements")
                 
-            except requests.exceptions.Timeout:
-                print(f"   ⏰ Timeout fetching achievements for {name}")
             except Exception as e:
-                print(f"   ⚠️ Error fetching achievements for {name}: {str(e)[:100]}")
+                print(f"   ⚠️ Error saving achievements for {name}: {str(e)[:100]}")
             
             # Update or create UserGame record
-            user_game = UserGame.query.filter_by(user_id=user_id, game_id=game_obj.id).first()
-            total_achievements = len(achievements_list)
-            unlocked_achievements = sum(1 for ach in achievements_list if ach.achieved)
+            user_game = user_games.get(appid)
             
-            if user_game:
+            if user_game and fetch_result['error']:
+                # Leave the stored row untouched so the next incremental sync retries this game
+                pass
+            elif user_game:
                 # Update existing
                 user_game.playtime_minutes = playtime_minutes
                 user_game.achievements_total = total_achievements
                 user_game.achievements_unlocked = unlocked_achievements
                 user_game.last_synced = datetime.utcnow()
             else:
-                # Create new
+                # Create new; a failed fetch stays unsynced so the next incremental sync retries it
                 user_game = UserGame(
                     user_id=user_id,
                     game_id=game_obj.id,
                     playtime_minutes=playtime_minutes,
                     achievements_total=total_achievements,
                     achievements_unlocked=unlocked_achievements,
-                    last_synced=datetime.utcnow()
+                    last_synced=None if fetch_result['error'] else datetime.utcnow()
                 )
                 db.session.add(user_game)
             
             games_processed += 1
             
             # Commit in batches to avoid long transactions
-            if games_processed % batch_size == 0:
+            if (games_processed - games_skipped) % batch_size == 0:
+                if job:
+                    job.report_progress(games_processed=games_processed, achievements_processed=achievements_processed)
                 try:
                     db.session.commit()
-                    print(f"   💾 Saved batch {int(games_processed/batch_size)}")
+                    print(f"   💾 Saved batch {int((games_processed - games_skipped)/batch_size)}")
                 except Exception as e:
                     print(f"   ⚠️ Error saving batch: {e}")
                     db.session.rollback()
-            
-            # Rate limiting - be nice to Steam's API
-            time.sleep(0.2)
+        
+        # Update materialized custom achievement progress for games this sync touched
+        try:
+            newly_completed = refresh_custom_achievement_progress(user_id, changed_appids=changed_appids)
+            if newly_completed:
+                print(f"⭐ Completed {len(newly_completed)} custom achievements")
+        except Exception as e:
+            print(f"⚠️ Error updating custom achievement progress: {e}")
+        
+        # Library totals for the user's stats summary, committed with the synced games
+        try:
+            recompute_user_stats([user_id], USER_STATS_STEAM_COLUMNS)
+        except Exception as e:
+            print(f"⚠️ Error updating user stats: {e}")
         
         # Final commit for remaining games
+        if job:
+            job.report_progress(games_processed=games_processed, achievements_processed=achievements_processed)
         try:
             db.session.commit()
             print("✅ All data saved successfully!")
@@ -464,9 +534,12 @@ def fetch_and_save_steam_data(steam_api_key, steam_id):
         # Generate success message with statistics
         success_message = f"🎉 Steam sync completed successfully!\n"
         success_message += f"📊 Processed {games_processed} games\n"
+        if games_skipped:
+            success_message += f"⏭️ Skipped {games_skipped} games unchanged since the last sync\n"
         success_message += f"🏆 Found {achievements_processed} achievements\n"
         success_message += f"🎮 {games_with_achievements} games have achievements\n"
-        success_message += f"⏰ Sync took approximately {int(games_processed * 0.2)} seconds"
+        success_message += f"🗂️ {schemas_from_cache} achievement schemas served from cache\n"
+        success_message += f"⏰ Sync took {int(time.monotonic() - sync_started)} seconds"
         
         print(success_message)
         return True, success_message.replace('\n', ' • ')
@@ -756,12 +829,15 @@ def landing():
     """Dedicated landing page route"""
     return render_template('landing.html')
 
-@app.route('/dashboard')
-@login_required 
-def dashboard():
-    """Main dashboard showing game library"""
+@cache.cached(tags=lambda user_id: [f'user:{user_id}'])
+def get_dashboard_data(user_id):
+    """
+    Game library and completed custom achievements for a user's dashboard
+    Cached until the user's next sync or achievement change
+    """
     # Load user's games from database
-    user_games = UserGame.query.filter_by(user_id=current_user.id).join(Game).all()
+    user_games = UserGame.query.filter_by(user_id=user_id).join(Game)\
+        .options(db.contains_eager(UserGame.game)).all()
     
     games = []
     for user_game in user_games:
@@ -777,11 +853,14 @@ def dashboard():
         })
     
     # Load completed custom achievements for trophy showcase
-    user_custom_achievements = CustomAchievement.query.filter_by(user_id=current_user.id).all()
+    user_custom_achievements = CustomAchievement.query.filter_by(user_id=user_id).all()
+    
+    # Completion is precomputed on sync and create/import
+    results = get_custom_achievement_progress(user_id, user_custom_achievements)
     
     completed_achievements = []
     for custom_ach in user_custom_achievements:
-        if check_custom_achievement_progress_db(current_user.id, custom_ach, games):
+        if results[custom_ach.id]['completed']:
             completed_achievements.append({
                 'id': custom_ach.id,
                 'name': custom_ach.name,
@@ -793,6 +872,14 @@ def dashboard():
     # Sort by creation date (newest first)
     completed_achievements.sort(key=lambda x: x.get('created_date', ''), reverse=True)
     
+    return games, completed_achievements
+
+@app.route('/dashboard')
+@login_required 
+def dashboard():
+    """Main dashboard showing game library"""
+    games, completed_achievements = get_dashboard_data(current_user.id)
+    preload_achievement_image_states(achievement['image_filename'] for achievement in completed_achievements)
     return render_template('index.html', games=games, completed_achievements=completed_achievements)
 
 @app.route('/game/<appid>')
@@ -800,18 +887,18 @@ def dashboard():
 def game_detail(appid):
     """Individual game achievement page"""
     # Find game and user's data for this game
-    game_obj = Game.query.filter_by(steam_app_id=appid).first()
+    game_obj = game_cache.get(appid)
     if not game_obj:
         return "Game not found", 404
     
-    user_game = UserGame.query.filter_by(user_id=current_user.id, game_id=game_obj.id).first()
+    user_game = UserGame.query.filter_by(user_id=current_user.id, game_id=game_obj['id']).first()
     if not user_game:
         return "Game not in your library", 404
     
     # Load achievements for this game
     steam_achievements = SteamAchievement.query.filter_by(
         user_id=current_user.id, 
-        game_id=game_obj.id
+        game_id=game_obj['id']
     ).all()
     
     achievements = []
@@ -826,8 +913,8 @@ def game_detail(appid):
     
     # Build game data structure expected by template
     game = {
-        'appid': game_obj.steam_app_id,
-        'name': game_obj.name,
+        'appid': game_obj['steam_app_id'],
+        'name': game_obj['name'],
         'playtime': user_game.playtime_hours,
         'progress': user_game.progress_percentage,
         'total_achievements': user_game.achievements_total,
@@ -837,41 +924,241 @@ def game_detail(appid):
     
     return render_template('game_detail.html', game=game)
 
-@app.route('/api/refresh')
+def run_steam_refresh_job(job):
+    """Background job handler that syncs a user's Steam library"""
+    user = User.query.get(job.user_id)
+    if not user or not user.steam_api_key_encrypted or not user.steam_id:
+        raise ValueError('Steam API credentials not configured. Please update your profile.')
+    
+    # Run a full resync on demand or when the last one is older than the configured interval
+    full_sync = bool((job.payload or {}).get('full'))
+    if not full_sync:
+        cutoff = datetime.utcnow() - timedelta(hours=app.config['STEAM_FULL_SYNC_INTERVAL_HOURS'])
+        recent_jobs = SyncJob.query.filter(
+            SyncJob.user_id == user.id,
+            SyncJob.job_type == 'steam_refresh',
+            SyncJob.status == 'completed',
+            SyncJob.finished_at >= cutoff
+        ).all()
+        full_sync = not any((recent.payload or {}).get('full') for recent in recent_jobs)
+    
+    # Record the mode so later refreshes can find the last full sync
+    job.payload = dict(job.payload or {}, full=full_sync)
+    db.session.commit()
+    
+    # Decrypt Steam API key
+    steam_api_key = encryption_manager.decrypt_steam_api_key(user.steam_api_key_encrypted)
+    
+    success, message = fetch_and_save_steam_data(steam_api_key, user.steam_id, user.id, job=job, full_sync=full_sync)
+    
+    # Batches are committed as the sync goes, so even a failed sync may have changed the library
+    cache.invalidate(f'user:{user.id}')
+    if not success:
+        raise RuntimeError(message)
+    return message
+
+job_queue.register('steam_refresh', run_steam_refresh_job)
+
+@app.route('/api/refresh', methods=['POST'])
 @login_required
 def refresh_data():
-    """API endpoint to refresh Steam data"""
+    """
+    API endpoint to queue a Steam data refresh
+    Refreshes are incremental by default; pass ?full=1 to re-fetch the whole library
+    The page's CSRF token must be sent in the X-CSRFToken header
+    """
+    if app.config.get('WTF_CSRF_ENABLED', True):
+        try:
+            validate_csrf(request.headers.get('X-CSRFToken'))
+        except ValidationError:
+            return jsonify({'error': 'Session expired. Please reload the page and try again.'}), 400
+    
     if not current_user.steam_api_key_encrypted or not current_user.steam_id:
         return jsonify({'error': 'Steam API credentials not configured. Please update your profile.'}), 400
     
-    # Decrypt Steam API key
-    steam_api_key = encryption_manager.decrypt_steam_api_key(current_user.steam_api_key_encrypted)
+    full_sync = request.args.get('full', '').lower() in ('1', 'true', 'yes')
+    job = job_queue.enqueue(current_user.id, 'steam_refresh', payload={'full': full_sync})
     
-    success, message = fetch_and_save_steam_data(steam_api_key, current_user.steam_id)
+    # A full resync request upgrades a refresh that is still waiting in the queue
+    if full_sync and job.status == 'queued' and not (job.payload or {}).get('full'):
+        job.payload = dict(job.payload or {}, full=True)
+        db.session.commit()
     
-    if success:
-        return jsonify({'message': message})
-    else:
-        return jsonify({'error': message}), 500
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'message': 'Steam sync started. This may take a moment for large libraries.'
+    }), 202
+
+@app.route('/api/refresh/<int:job_id>')
+@login_required
+def refresh_status(job_id):
+    """API endpoint to check the progress of a Steam data refresh"""
+    job = SyncJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    
+    if not job:
+        return jsonify({'error': 'Refresh job not found'}), 404
+    
+    return jsonify(job.to_dict())
+
+def library_validators():
+    """Validators for the current user's library: newest sync or rename, and the number of games"""
+    last_synced, last_renamed, game_count = db.session.query(
+        db.func.max(UserGame.last_synced), db.func.max(Game.last_updated), db.func.count(UserGame.id)
+    ).join(Game).filter(UserGame.user_id == current_user.id).one()
+    return (current_user.id, game_count, last_synced, last_renamed), max(filter(None, (last_synced, last_renamed)), default=None)
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+def parse_api_fields(allowed):
+    """
+    Sparse fieldset from ?fields=a,b (every allowed field when absent)
+    Returns (fields, error_response); error_response is set for unknown field names
+    """
+    requested = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    if not requested:
+        return list(allowed), None
+    
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        return None, (jsonify({'error': f'Unknown fields: {", ".join(unknown)}', 'allowed_fields': list(allowed)}), 400)
+    return [field for field in allowed if field in requested], None
+
+def parse_api_cursor(parse_value=None):
+    """
+    Keyset position from ?cursor= (None when absent); parse_value converts the cursor's sort value
+    Returns (after, error_response); error_response is set for a cursor that cannot be decoded
+    """
+    cursor = request.args.get('cursor')
+    if not cursor:
+        return None, None
+    
+    after = decode_keyset_cursor(cursor)
+    if after and parse_value:
+        try:
+            after = (parse_value(after[0]), after[1])
+        except (TypeError, ValueError):
+            after = None
+    if after is None:
+        return None, (jsonify({'error': 'Invalid cursor'}), 400)
+    return after, None
+
+def contains_pattern(search):
+    """ILIKE pattern matching search anywhere, with its % and _ taken literally (use escape='\\')"""
+    escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+def api_page_size():
+    """Page size when ?limit= or ?cursor= asks for a page, or None to return the full listing"""
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return None
+    return min(max(request.args.get('limit', API_PAGE_SIZE, type=int), 1), API_MAX_PAGE_SIZE)
+
+def stream_json(rows, serialize, prefix='[', suffix=']'):
+    """
+    Stream a JSON array of serialize(row) for each row, in batches
+    Rows should come from a yield_per query so memory stays flat however long the listing is
+    """
+    def generate():
+        yield prefix
+        batch = []
+        separator = ''
+        for row in rows:
+            batch.append(app.json.dumps(serialize(row)))
+            if len(batch) >= STREAM_BATCH_SIZE:
+                yield separator + ','.join(batch)
+                batch, separator = [], ','
+        if batch:
+            yield separator + ','.join(batch)
+        yield suffix
+    
+    return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+GAME_API_FIELDS = ('appid', 'name', 'playtime', 'progress', 'total_achievements', 'unlocked_achievements')
+GAME_API_SORTS = {
+    # sort -> (column, descending by default)
+    'name': (lambda: db.func.lower(db.func.coalesce(Game.name, '')), False),
+    'playtime': (lambda: db.func.coalesce(UserGame.playtime_minutes, 0), True),
+    'progress': (user_game_progress_expression, True),
+}
+
+def serialize_game_row(row, fields):
+    """API dict for a row of the api_games query, limited to the requested fields"""
+    game = {
+        'appid': row.steam_app_id,
+        'name': row.name,
+        'playtime': round(row.playtime_minutes / 60, 2) if row.playtime_minutes else 0,
+        'progress': round((row.achievements_unlocked / row.achievements_total) * 100, 2) if row.achievements_total else 0,
+        'total_achievements': row.achievements_total,
+        'unlocked_achievements': row.achievements_unlocked
+    }
+    return {field: game[field] for field in fields}
 
 @app.route('/api/games')
 @login_required
+@response_pipeline.conditional(library_validators)
 def api_games():
-    """JSON API for games data"""
-    user_games = UserGame.query.filter_by(user_id=current_user.id).join(Game).all()
-    
-    games = []
-    for user_game in user_games:
-        games.append({
-            'appid': user_game.game.steam_app_id,
-            'name': user_game.game.name,
-            'playtime': user_game.playtime_hours,
-            'progress': user_game.progress_percentage,
-            'total_achievements': user_game.achievements_total,
-            'unlocked_achievements': user_game.achievements_unlocked
-        })
+    """
+    JSON API for games data
+    Sort with ?sort=name|playtime|progress&order=asc|desc and filter with ?q=, ?min_progress=,
+    ?max_progress=, ?min_playtime= and ?max_playtime= (hours); ?fields= selects fields.
+    Pass ?limit= for a page ({games, count, next_cursor}) and the returned next_cursor as ?cursor= for
+    the next one; without them the whole library is streamed as a JSON array
+    """
+    fields, error = parse_api_fields(GAME_API_FIELDS)
+    if error:
+        return error
+    
+    sort = request.args.get('sort', 'name')
+    if sort not in GAME_API_SORTS:
+        sort = 'name'
+    sort_expression, descending = GAME_API_SORTS[sort]
+    sort_column = sort_expression()
+    if request.args.get('order') in ('asc', 'desc'):
+        descending = request.args.get('order') == 'desc'
+    
+    query = db.session.query(
+        UserGame.id, Game.steam_app_id, Game.name, UserGame.playtime_minutes,
+        UserGame.achievements_total, UserGame.achievements_unlocked, sort_column.label('sort_value')
+    ).join(Game, UserGame.game_id == Game.id).filter(UserGame.user_id == current_user.id)
+    
+    # Filters run in the database so only matching rows are read
+    progress = user_game_progress_expression()
+    search = request.args.get('q', '').strip()
+    if search:
+        query = query.filter(Game.name.ilike(contains_pattern(search), escape='\\'))
+    if request.args.get('min_progress', type=float) is not None:
+        query = query.filter(progress >= request.args.get('min_progress', type=float))
+    if request.args.get('max_progress', type=float) is not None:
+        query = query.filter(progress <= request.args.get('max_progress', type=float))
+    if request.args.get('min_playtime', type=float) is not None:
+        query = query.filter(UserGame.playtime_minutes >= request.args.get('min_playtime', type=float) * 60)
+    if request.args.get('max_playtime', type=float) is not None:
+        query = query.filter(UserGame.playtime_minutes <= request.args.get('max_playtime', type=float) * 60)
+    
+    after, error = parse_api_cursor()
+    if error:
+        return error
+    
+    page_size = api_page_size()
+    query = apply_keyset_page(query, sort_column, UserGame.id, descending, after)
+    
+    if page_size is None:
+        return stream_json(query.yield_per(STREAM_BATCH_SIZE), lambda row: serialize_game_row(row, fields))
+    
+    rows = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_keyset_cursor(rows[-1].sort_value, rows[-1].id)
     
-    return jsonify(games)
+    return jsonify({
+        'games': [serialize_game_row(row, fields) for row in rows],
+        'count': len(rows),
+        'next_cursor': next_cursor
+    })
 
 @app.route('/custom-achievements')
 @login_required
@@ -880,20 +1167,21 @@ def custom_achievements():
     # Load user's custom achievements from database
     user_custom_achievements = CustomAchievement.query.filter_by(user_id=current_user.id).all()
     
-    # Calculate progress for each achievement
+    # Completion is precomputed on sync and create/import
+    results = get_custom_achievement_progress(current_user.id, user_custom_achievements)
+    
+    # Look up display names for all referenced games at once
+    game_name_map = game_cache.get_names(
+        {game_id for custom_ach in user_custom_achievements for game_id in custom_ach.games_list}
+    )
+    
     achievement_status = []
     for custom_ach in user_custom_achievements:
-        progress = get_custom_achievement_progress_db(current_user.id, custom_ach)
-        completed = check_custom_achievement_progress_db(current_user.id, custom_ach)
+        progress = results[custom_ach.id]['progress']
+        completed = results[custom_ach.id]['completed']
         
         # Get game names for display
-        game_names = []
-        for game_id in custom_ach.games_list:
-            game = Game.query.filter_by(steam_app_id=game_id).first()
-            if game:
-                game_names.append(game.name)
-            else:
-                game_names.append(f"App {game_id}")
+        game_names = [game_name_map[str(game_id)] for game_id in custom_ach.games_list]
         
         achievement_status.append({
             'id': custom_ach.id,
@@ -908,6 +1196,7 @@ def custom_achievements():
             'original_creator': custom_ach.original_creator_username
         })
     
+    preload_achievement_image_states(achievement['image_filename'] for achievement in achievement_status)
     return render_template('custom_achievements.html', achievements=achievement_status)
 
 @app.route('/create-achievement', methods=['GET', 'POST'])
@@ -926,29 +1215,14 @@ def create_achievement():
     
     if form.validate_on_submit():
         try:
-            # Process image upload
-            image_filename = None
-            image_url = None
+            # Spool the image upload; derivatives are built by a background worker
+            achievement_image, needs_processing = None, False
             if form.achievement_image.data:
-                print(f"🖼️  Processing image upload for user {current_user.id}")
-                # Create a unique filename
-                achievement_id = f"custom_{current_user.id}_{int(time.time())}"
-                image_filename, image_url = process_achievement_image(form.achievement_image.data, current_user.id, achievement_id)
-                print(f"📄 Image upload result: filename={image_filename}, url={image_url}")
-            
-            # Only store image metadata if upload was successful
-            if image_filename:
-                achievement_image = AchievementImage(
-                    filename=image_filename,
-                    original_filename=form.achievement_image.data.filename,
-                    file_size=0,  # Could calculate actual size
-                    mime_type='image/jpeg',
-                    uploaded_by=current_user.id,
-                    uploaded_at=datetime.utcnow()
-                )
-                db.session.add(achievement_image)
-            else:
-                flash('Image upload failed. Achievement created without image.', 'warning')
+                print(f"🖼️  Accepting image upload for user {current_user.id}")
+                achievement_image, needs_processing = process_achievement_image(form.achievement_image.data, current_user.id)
+                if not achievement_image:
+                    flash('Image upload failed. Achievement created without image.', 'warning')
+            image_filename = achievement_image.filename if achievement_image else None
             
             # Create condition_data JSON
             condition_data = {
@@ -968,6 +1242,9 @@ def create_achievement():
             )
             
             db.session.add(custom_achievement)
+            db.session.flush()
+            index_achievement_games(custom_achievement)
+            adjust_user_stats(current_user.id, custom_achievements_count=1)
             
             # Log activity for creating custom achievement
             log_activity(
@@ -982,6 +1259,12 @@ def create_achievement():
                 }
             )
             
+            refresh_custom_achievement_progress(current_user.id, [custom_achievement])
+            
+            # Queued in the same transaction as the achievement so a pending image always has its job
+            if needs_processing:
+                image_pipeline.enqueue(achievement_image)
+            cache.invalidate_on_commit(f'user:{current_user.id}')
             db.session.commit()
             
             flash(f'Custom achievement "{form.name.data}" created successfully!')
@@ -1006,20 +1289,12 @@ def delete_achievement(achievement_id):
     if custom_achievement:
         achievement_name = custom_achievement.name
         
-        # Delete associated image if exists
-        if custom_achievement.image_filename:
-            image_path = os.path.join(app.config['UPLOAD_FOLDER'], custom_achievement.image_filename)
-            if os.path.exists(image_path):
-                os.remove(image_path)
-            
-            # Remove from image database
-            achievement_image = AchievementImage.query.filter_by(
-                filename=custom_achievement.image_filename
-            ).first()
-            if achievement_image:
-                db.session.delete(achievement_image)
+        # Images are shared by content, so only drop this reference; collect_orphan_images.py removes unused files
+        adjust_image_refs(custom_achievement.image_filename, -1)
         
         db.session.delete(custom_achievement)
+        adjust_user_stats(current_user.id, custom_achievements_count=-1)
+        cache.invalidate_on_commit(f'user:{current_user.id}')
         db.session.commit()
         flash(f'Achievement "{achievement_name}" deleted successfully!')
     else:
@@ -1066,6 +1341,10 @@ def share_achievement_route(achievement_id):
     )
     
     db.session.add(shared_achievement)
+    db.session.flush()
+    index_achievement_games(shared_achievement)
+    adjust_image_refs(shared_achievement.image_filename, 1)
+    adjust_user_stats(current_user.id, shared_achievements_count=1)
     
     # Log activity for sharing achievement
     log_activity(
@@ -1081,6 +1360,7 @@ def share_achievement_route(achievement_id):
         }
     )
     
+    cache.invalidate_on_commit(f'user:{current_user.id}', 'shared:list')
     db.session.commit()
     
     flash(f'Achievement "{custom_achievement.name}" shared to the community!')
@@ -1108,6 +1388,9 @@ def unshare_achievement(achievement_id):
         else:
             # Safe to unshare
             db.session.delete(shared_achievement)
+            adjust_image_refs(shared_achievement.image_filename, -1)
+            adjust_user_stats(current_user.id, shared_achievements_count=-1)
+            cache.invalidate_on_commit(f'user:{current_user.id}', f'shared:{shared_achievement.id}', 'shared:list')
             db.session.commit()
             flash('Achievement removed from community sharing!')
     else:
@@ -1130,6 +1413,9 @@ def delete_shared_achievement(shared_id):
     try:
         achievement_name = shared_achievement.name
         db.session.delete(shared_achievement)
+        adjust_image_refs(shared_achievement.image_filename, -1)
+        adjust_user_stats(current_user.id, shared_achievements_count=-1)
+        cache.invalidate_on_commit(f'user:{current_user.id}', f'shared:{shared_id}', 'shared:list')
         db.session.commit()
         
         return jsonify({
@@ -1157,6 +1443,9 @@ def admin_delete_shared_achievement(shared_id):
         creator_name = shared_achievement.creator.username if shared_achievement.creator else 'Unknown'
         
         db.session.delete(shared_achievement)
+        adjust_image_refs(shared_achievement.image_filename, -1)
+        adjust_user_stats(shared_achievement.creator_id, shared_achievements_count=-1)
+        cache.invalidate_on_commit(f'user:{shared_achievement.creator_id}', f'shared:{shared_id}', 'shared:list')
         db.session.commit()
         
         return jsonify({
@@ -1167,93 +1456,137 @@ def admin_delete_shared_achievement(shared_id):
         db.session.rollback()
         return jsonify({'success': False, 'error': f'Failed to delete achievement: {str(e)}'}), 500
 
-@app.route('/community-achievements')
-@login_required
-def community_achievements():
-    """Display community shared achievements"""
-    # Load shared achievements from database (include all active achievements)
-    shared_achievements = SharedAchievement.query.filter(
-        SharedAchievement.is_active == True
-    ).join(User).all()
+COMMUNITY_SORTS = ('popularity', 'compatibility', 'newest', 'name', 'creator', 'completion_rate', 'rating')
+COMMUNITY_PAGE_SIZE = 20
+COMMUNITY_CACHE_SECONDS = 60  # Tries/completions are flushed by the counter buffer without invalidating
+
+class CachedPagination(Pagination):
+    """Pagination over a page of items and a total that were already loaded (e.g. from the cache)"""
     
-    # Load user's games to check compatibility
-    user_games = UserGame.query.filter_by(user_id=current_user.id).join(Game).all()
-    user_game_ids = {ug.game.steam_app_id for ug in user_games}
+    def _query_items(self):
+        return self._query_args['items']
     
-    # Get user's imported achievements for checking duplicates
-    user_imported = CustomAchievement.query.filter_by(user_id=current_user.id).filter(
-        CustomAchievement.imported_from_shared_id.isnot(None)
-    ).all()
-    imported_shared_ids = {ach.imported_from_shared_id for ach in user_imported}
-    
-    # Process shared achievements for display
-    community_list = []
-    for shared_ach in shared_achievements:
-        # Check compatibility (how many required games the user owns)
+    def _query_count(self):
+        return self._query_args['total']
+
+@cache.cached(timeout=COMMUNITY_CACHE_SECONDS,
+              tags=lambda sort, page, user_id=None: ['shared:list'] + ([f'user:{user_id}'] if user_id else []))
+def get_community_page(sort, page, user_id=None):
+    """
+    One page of active shared achievements in the requested order, without per-viewer details
+    Only the compatibility sort depends on the viewer, so only it passes (and is cached per) user_id
+    Returns (items, total)
+    """
+    # Load shared achievements from database (include all active achievements)
+    query = SharedAchievement.query.filter(SharedAchievement.is_active == True)\
+        .join(SharedAchievement.creator)\
+        .options(db.contains_eager(SharedAchievement.creator))
+    
+    # Sort in the database so pagination is stable
+    if sort == 'compatibility':
+        # Share of required games the viewer owns, grouped over the achievement_games index
+        compatibility = shared_compatibility_subquery(user_id)
+        query = query.outerjoin(compatibility, compatibility.c.shared_achievement_id == SharedAchievement.id)\
+            .order_by(compatibility_expression(compatibility).desc(),
+                      (SharedAchievement.tries_count + SharedAchievement.completions_count).desc())
+    elif sort == 'newest':
+        query = query.order_by(SharedAchievement.shared_at.desc())
+    elif sort == 'name':
+        query = query.order_by(SharedAchievement.name.asc())
+    elif sort == 'creator':
+        query = query.order_by(User.username.asc())
+    elif sort == 'completion_rate':
+        query = query.order_by(db.case(
+            (SharedAchievement.tries_count > 0,
+             SharedAchievement.completions_count * 1.0 / SharedAchievement.tries_count),
+            else_=0
+        ).desc())
+    elif sort == 'rating':
+        query = query.order_by(db.case(
+            (SharedAchievement.rating_count > 0,
+             SharedAchievement.rating_sum * 1.0 / SharedAchievement.rating_count),
+            else_=0
+        ).desc(), SharedAchievement.rating_count.desc())
+    else:  # popularity
+        query = query.order_by((SharedAchievement.tries_count + SharedAchievement.completions_count).desc(),
+                               SharedAchievement.shared_at.desc())
+    query = query.order_by(SharedAchievement.id.desc())
+    
+    pagination = query.paginate(page=page, per_page=COMMUNITY_PAGE_SIZE, error_out=False)
+    page_items = pagination.items
+    
+    # Resolve every required game name on the page at once
+    required_game_ids = {game_id for shared_ach in page_items for game_id in shared_ach.condition_data.get('games', [])}
+    game_name_map = game_cache.get_names(required_game_ids)
+    
+    # Ratings, unsharing and renamed games on this page invalidate it
+    cache.tag(*[f'shared:{shared_ach.id}' for shared_ach in page_items],
+              *[f'game:{game_id}' for game_id in required_game_ids])
+    
+    items = []
+    for shared_ach in page_items:
         required_games = shared_ach.condition_data.get('games', [])
-        owned_required = len([gid for gid in required_games if gid in user_game_ids])
-        compatibility = (owned_required / len(required_games)) * 100 if required_games else 0
-        
-        # Get game names
-        game_names = []
-        for game_id in required_games:
-            game = Game.query.filter_by(steam_app_id=game_id).first()
-            if game:
-                game_names.append(game.name)
-            else:
-                game_names.append(f"App {game_id}")
-        
-        # Check if already imported
-        already_imported = shared_ach.id in imported_shared_ids
         
-        # Get rating information
-        try:
-            # Get user's rating if exists
-            user_rating = None
-            user_rating_obj = AchievementRating.query.filter_by(
-                user_id=current_user.id,
-                shared_achievement_id=shared_ach.id
-            ).first()
-            if user_rating_obj:
-                user_rating = user_rating_obj.rating
-            
-            # Get average rating and count
-            avg_rating = db.session.query(db.func.avg(AchievementRating.rating)).filter_by(
-                shared_achievement_id=shared_ach.id
-            ).scalar()
-            
-            rating_count = AchievementRating.query.filter_by(
-                shared_achievement_id=shared_ach.id
-            ).count()
-        except Exception:
-            # Fallback if rating queries fail
-            user_rating = None
-            avg_rating = None
-            rating_count = 0
-        
-        community_list.append({
+        items.append({
             'shared_id': shared_ach.id,
             'name': shared_ach.name,
             'description': shared_ach.description,
             'creator': shared_ach.creator.username,
             'condition_type': shared_ach.condition_type,
-            'games': game_names,
+            'games': [game_name_map[str(game_id)] for game_id in required_games],
             'tries': shared_ach.tries_count,
             'completions': shared_ach.completions_count,
-            'compatibility': compatibility,
             'image_filename': shared_ach.image_filename,
             'shared_date': shared_ach.shared_at.isoformat() if shared_ach.shared_at else '',
             'playtime_target': shared_ach.condition_data.get('playtime_target', 0),
-            'already_imported': already_imported,
-            'user_rating': user_rating,
-            'average_rating': round(float(avg_rating), 1) if avg_rating else 0,
-            'rating_count': rating_count
+            'average_rating': shared_ach.average_rating,
+            'rating_count': shared_ach.rating_count
         })
     
-    # Sort by popularity (tries + completions) and compatibility
-    community_list.sort(key=lambda x: (x['tries'] + x['completions'], x['compatibility']), reverse=True)
+    return items, pagination.total
+
+@app.route('/community-achievements')
+@login_required
+def community_achievements():
+    """Display community shared achievements"""
+    sort = request.args.get('sort', 'popularity')
+    if sort not in COMMUNITY_SORTS:
+        sort = 'popularity'
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    items, total = get_community_page(sort, page, current_user.id if sort == 'compatibility' else None)
+    pagination = CachedPagination(page=page, per_page=COMMUNITY_PAGE_SIZE, error_out=False, items=items, total=total)
+    page_ids = [item['shared_id'] for item in items]
+    
+    # How many required games the user owns, for the whole page in one grouped query
+    compatibility_scores = get_shared_compatibility(current_user.id, page_ids)
     
-    return render_template('community_achievements.html', achievements=community_list)
+    # Get user's imported achievements for checking duplicates
+    imported_shared_ids = {
+        shared_id for (shared_id,) in db.session.query(CustomAchievement.imported_from_shared_id).filter(
+            CustomAchievement.user_id == current_user.id,
+            CustomAchievement.imported_from_shared_id.in_(page_ids)
+        )
+    } if page_ids else set()
+    
+    # Get the user's own ratings for this page in one query
+    user_ratings = dict(db.session.query(AchievementRating.shared_achievement_id, AchievementRating.rating).filter(
+        AchievementRating.user_id == current_user.id,
+        AchievementRating.shared_achievement_id.in_(page_ids)
+    ).all()) if page_ids else {}
+    
+    # Add the viewer's own details to the shared page
+    community_list = [
+        dict(item,
+             compatibility=compatibility_scores[item['shared_id']],
+             already_imported=item['shared_id'] in imported_shared_ids,
+             user_rating=user_ratings.get(item['shared_id']))
+        for item in items
+    ]
+    
+    preload_achievement_image_states(achievement['image_filename'] for achievement in community_list)
+    return render_template('community_achievements.html', achievements=community_list,
+                           pagination=pagination, sort=sort)
 
 @app.route('/import-achievement/<int:shared_id>')
 @login_required
@@ -1299,9 +1632,13 @@ def import_achievement_route(shared_id):
     )
     
     db.session.add(custom_achievement)
+    db.session.flush()
+    index_achievement_games(custom_achievement)
+    adjust_image_refs(custom_achievement.image_filename, 1)
+    adjust_user_stats(current_user.id, custom_achievements_count=1)
     
     # Increment tries counter
-    shared_achievement.tries_count += 1
+    counters.increment(shared_achievement, 'tries_count')
     
     # Log activity for importing achievement
     log_activity(
@@ -1317,6 +1654,8 @@ def import_achievement_route(shared_id):
         }
     )
     
+    refresh_custom_achievement_progress(current_user.id, [custom_achievement])
+    cache.invalidate_on_commit(f'user:{current_user.id}')
     db.session.commit()
     
     flash(f'Achievement "{shared_achievement.name}" imported successfully!')
@@ -1347,9 +1686,13 @@ def admin_cleanup_duplicates():
             achievements.sort(key=lambda x: x.shared_at, reverse=True)
             for dup in achievements[1:]:
                 db.session.delete(dup)
+                adjust_image_refs(dup.image_filename, -1)
+                adjust_user_stats(dup.creator_id, shared_achievements_count=-1)
+                cache.invalidate_on_commit(f'user:{dup.creator_id}', f'shared:{dup.id}')
                 duplicates_removed += 1
     
     if duplicates_removed > 0:
+        cache.invalidate_on_commit('shared:list')
         db.session.commit()
         flash(f'Cleaned up {duplicates_removed} duplicate shared achievements!')
     else:
@@ -1357,20 +1700,24 @@ def admin_cleanup_duplicates():
     
     return redirect(url_for('community_achievements'))
 
-@app.route('/trophy-feed')
-@login_required
-def trophy_feed():
-    """Display the community trophy feed"""
-    # Get filter parameters
-    activity_filter = request.args.get('filter', 'all')
-    user_filter = request.args.get('user')
-    page = int(request.args.get('page', 1))
+FEED_PAGE_SIZE = 20
+
+def get_activity_page(query_params, cursor=None, limit=FEED_PAGE_SIZE):
+    """
+    Fetch one keyset page of the activity feed
+    Returns (activities, next_cursor); next_cursor is None on the last page
+    """
+    before = decode_activity_cursor(cursor) if cursor else None
+    activities = get_recent_activities(limit=limit + 1, before=before, **query_params)
     
-    # Base query parameters
-    query_params = {
-        'limit': 20 * page,  # Load more as we paginate
-        'include_private': False
-    }
+    if len(activities) > limit:
+        activities = activities[:limit]
+        return activities, encode_activity_cursor(activities[-1])
+    return activities, None
+
+def get_feed_query_params(activity_filter, user_filter):
+    """Translate trophy feed filters into get_recent_activities arguments"""
+    query_params = {'include_private': False}
     
     # Apply filters
     if activity_filter != 'all':
@@ -1378,29 +1725,27 @@ def trophy_feed():
     
     if user_filter and user_filter != 'all':
         if user_filter == 'friends_only':
-            # Get user's friends and limit activities to friends only
-            friends = db.session.query(User).join(
-                UserFriendship, 
-                db.or_(
-                    db.and_(UserFriendship.user_id == current_user.id, UserFriendship.friend_id == User.id),
-                    db.and_(UserFriendship.friend_id == current_user.id, UserFriendship.user_id == User.id)
-                )
-            ).filter(UserFriendship.status == 'accepted').all()
-            
-            friend_ids = [friend.id for friend in friends]
-            if friend_ids:
-                query_params['user_ids'] = friend_ids
-            else:
-                # No friends, return empty activities
-                activities = []
+            # Friends' activities are fanned out on write, so this is a range scan of the user's own timeline
+            query_params['timeline_owner_id'] = current_user.id
         else:
             user = User.query.filter_by(username=user_filter).first()
             if user:
                 query_params['user_id'] = user.id
     
+    return query_params
+
+@app.route('/trophy-feed')
+@login_required
+def trophy_feed():
+    """Display the community trophy feed"""
+    # Get filter parameters
+    activity_filter = request.args.get('filter', 'all')
+    user_filter = request.args.get('user')
+    cursor = request.args.get('before')
+    
     # Get activities
-    if 'activities' not in locals():
-        activities = get_recent_activities(**query_params)
+    query_params = get_feed_query_params(activity_filter, user_filter)
+    activities, next_cursor = get_activity_page(query_params, cursor)
     
     # Get unique users for filter dropdown
     recent_users = db.session.query(User).join(ActivityFeed).filter(
@@ -1424,35 +1769,45 @@ def trophy_feed():
                          recent_users=recent_users,
                          current_filter=activity_filter,
                          current_user_filter=user_filter,
-                         page=page)
+                         next_cursor=next_cursor)
+
+def trophy_feed_validators():
+    """
+    Validators for a trophy feed request: the newest matching activity
+    The minute is part of the version so relative times ("5 minutes ago") in the payload stay current
+    """
+    query_params = get_feed_query_params(request.args.get('filter', 'all'), request.args.get('user'))
+    newest = get_activity_feed_version(**query_params)
+    minute = datetime.utcnow().replace(second=0, microsecond=0)
+    return (current_user.id, query_params, newest, minute), newest[0] if newest else None
 
 @app.route('/api/trophy-feed')
 @login_required
+@response_pipeline.conditional(trophy_feed_validators)
 def api_trophy_feed():
-    """JSON API for trophy feed (for AJAX loading)"""
+    """
+    JSON API for trophy feed (for AJAX loading)
+    Pass the previous response's next_cursor as ?before= to get the following page
+    """
     activity_filter = request.args.get('filter', 'all')
     user_filter = request.args.get('user')
-    limit = int(request.args.get('limit', 20))
+    cursor = request.args.get('before')
+    limit = min(max(request.args.get('limit', FEED_PAGE_SIZE, type=int), 1), 100)
     
-    query_params = {
-        'limit': limit,
-        'include_private': False
-    }
+    query_params = get_feed_query_params(activity_filter, user_filter)
+    activities, next_cursor = get_activity_page(query_params, cursor, limit)
     
-    if activity_filter != 'all':
-        query_params['activity_type'] = activity_filter
-    
-    if user_filter and user_filter != 'all':
-        user = User.query.filter_by(username=user_filter).first()
-        if user:
-            query_params['user_id'] = user.id
+    response = {
+        'activities': [activity.to_dict() for activity in activities],
+        'count': len(activities),
+        'next_cursor': next_cursor
+    }
     
-    activities = get_recent_activities(**query_params)
+    # The feed page appends server-rendered cards so they match the initial render
+    if request.args.get('html'):
+        response['html'] = render_template('components/activity_cards.html', activities=activities)
     
-    return jsonify({
-        'activities': [activity.to_dict() for activity in activities],
-        'count': len(activities)
-    })
+    return jsonify(response)
 
 @app.route('/admin/users')
 @login_required
@@ -1465,30 +1820,105 @@ def admin_users():
     users = User.query.order_by(User.created_at.desc()).all()
     return render_template('admin_users.html', users=users)
 
+def admin_users_validators():
+    """Validators for the admin user list: user count plus newest account or stats change (admins only)"""
+    if current_user.username != 'admin':
+        return None
+    
+    user_count, users_updated = db.session.query(db.func.count(User.id), db.func.max(User.updated_at)).one()
+    stats_updated = db.session.query(db.func.max(UserStats.updated_at)).scalar()
+    return (user_count, users_updated, stats_updated), max(filter(None, (users_updated, stats_updated)), default=None)
+
+ADMIN_USER_API_FIELDS = ('id', 'username', 'email', 'created_at', 'is_verified', 'is_active', 'has_steam_api_key',
+                         'games_count', 'custom_achievements_count')
+ADMIN_USER_API_SORTS = {
+    # sort -> (column, descending by default)
+    'created': (lambda: User.created_at, True),
+    'username': (lambda: User.username, False),
+    'games': (lambda: db.func.coalesce(UserStats.games_owned, 0), True),
+    'custom_achievements': (lambda: db.func.coalesce(UserStats.custom_achievements_count, 0), True),
+}
+
+def serialize_admin_user_row(row, fields):
+    """API dict for a row of the admin_users_json query, limited to the requested fields"""
+    user = {
+        'id': row.id,
+        'username': row.username,
+        'email': row.email,
+        'created_at': row.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'is_verified': row.is_verified,
+        'is_active': row.is_active,
+        'has_steam_api_key': row.has_steam_api_key,
+        'games_count': row.games_count,
+        'custom_achievements_count': row.custom_achievements_count
+    }
+    return {field: user[field] for field in fields}
+
 @app.route('/admin/users/json')
 @login_required  
+@response_pipeline.conditional(admin_users_validators)
 def admin_users_json():
-    """Admin route to get users as JSON (for API calls)"""
+    """
+    Admin route to get users as JSON (for API calls)
+    Sort with ?sort=created|username|games|custom_achievements&order=asc|desc, filter with ?q=
+    (username or email), ?active=0|1 and ?verified=0|1, and select fields with ?fields=.
+    Pass ?limit= / ?cursor= for a page; without them every user is streamed
+    """
     if current_user.username != 'admin':
         return jsonify({'error': 'Access denied'}), 403
     
-    users = User.query.order_by(User.created_at.desc()).all()
+    fields, error = parse_api_fields(ADMIN_USER_API_FIELDS)
+    if error:
+        return error
+    
+    sort = request.args.get('sort', 'created')
+    if sort not in ADMIN_USER_API_SORTS:
+        sort = 'created'
+    sort_expression, descending = ADMIN_USER_API_SORTS[sort]
+    sort_column = sort_expression()
+    if request.args.get('order') in ('asc', 'desc'):
+        descending = request.args.get('order') == 'desc'
+    
+    # Counts come from the maintained user_stats row instead of two COUNT queries per user
+    query = db.session.query(
+        User.id, User.username, User.email, User.created_at, User.is_verified, User.is_active,
+        User.steam_api_key_encrypted.isnot(None).label('has_steam_api_key'),
+        db.func.coalesce(UserStats.games_owned, 0).label('games_count'),
+        db.func.coalesce(UserStats.custom_achievements_count, 0).label('custom_achievements_count'),
+        sort_column.label('sort_value')
+    ).outerjoin(UserStats, UserStats.user_id == User.id)
+    
+    search = request.args.get('q', '').strip()
+    if search:
+        pattern = contains_pattern(search)
+        query = query.filter(db.or_(User.username.ilike(pattern, escape='\\'), User.email.ilike(pattern, escape='\\')))
+    for arg, column in (('active', User.is_active), ('verified', User.is_verified)):
+        if request.args.get(arg) in ('0', '1'):
+            query = query.filter(column == (request.args.get(arg) == '1'))
+    
+    after, error = parse_api_cursor(datetime.fromisoformat if sort == 'created' else None)
+    if error:
+        return error
+    
+    total_users = query.order_by(None).count()
+    query = apply_keyset_page(query, sort_column, User.id, descending, after)
+    
+    page_size = api_page_size()
+    if page_size is None:
+        return stream_json(query.yield_per(STREAM_BATCH_SIZE), lambda row: serialize_admin_user_row(row, fields),
+                           prefix='{"users":[', suffix=f'],"total_users":{total_users}}}')
+    
+    rows = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_keyset_cursor(rows[-1].sort_value, rows[-1].id)
+    
     return jsonify({
-        'users': [
-            {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'created_at': user.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'is_verified': user.is_verified,
-                'is_active': user.is_active,
-                'has_steam_api_key': bool(user.steam_api_key_encrypted),
-                'games_count': user.user_games.count(),
-                'custom_achievements_count': user.custom_achievements.count()
-            }
-            for user in users
-        ],
-        'total_users': len(users)
+        'users': [serialize_admin_user_row(row, fields) for row in rows],
+        'count': len(rows),
+        'next_cursor': next_cursor,
+        'total_users': total_users
     })
 
 @app.route('/admin/users/<int:user_id>/delete', methods=['POST'])
@@ -1510,6 +1940,14 @@ def admin_delete_user(user_id):
         # Delete all user data (CASCADE should handle most of this)
         # But let's be explicit about important tables
         
+        # Images are shared by content, so only release this user's references to them;
+        # collect_orphan_images.py removes whatever nobody uses any more
+        image_refs = defaultdict(int)
+        for model, owner in ((CustomAchievement, CustomAchievement.user_id), (SharedAchievement, SharedAchievement.creator_id)):
+            for filename, count in db.session.query(model.image_filename, db.func.count())\
+                    .filter(owner == user_id, model.image_filename.isnot(None)).group_by(model.image_filename):
+                image_refs[filename] += count
+        
         # Delete custom achievements (this will cascade to shared achievements)
         CustomAchievement.query.filter_by(user_id=user_id).delete()
         
@@ -1519,12 +1957,17 @@ def admin_delete_user(user_id):
         # Delete activity feed entries
         ActivityFeed.query.filter_by(user_id=user_id).delete()
         
-        # Delete achievement images uploaded by user
-        AchievementImage.query.filter_by(uploaded_by=user_id).delete()
+        for filename, count in image_refs.items():
+            adjust_image_refs(filename, -count)
+        
+        # Images this user uploaded first stay for anyone else using them, credited to the deleting admin
+        AchievementImage.query.filter_by(uploaded_by=user_id).update(
+            {'uploaded_by': current_user.id}, synchronize_session=False)
         
         # Delete email tokens
         try:
             EmailVerificationToken.query.filter_by(user_id=user_id).delete()
+            EmailChangeToken.query.filter_by(user_id=user_id).delete()
             PasswordResetToken.query.filter_by(user_id=user_id).delete()
         except:
             pass  # Tables might not exist yet
@@ -1534,6 +1977,7 @@ def admin_delete_user(user_id):
         
         # Finally delete the user
         db.session.delete(user_to_delete)
+        cache.invalidate_on_commit(f'user:{user_id}', 'shared:list')
         db.session.commit()
         
         print(f"🗑️  Admin deleted user: {username} (ID: {user_id})")
@@ -1645,6 +2089,8 @@ def admin_create_email_tables():
             used_at TIMESTAMP WITHOUT TIME ZONE
         );
         CREATE INDEX idx_email_verification_token ON email_verification_tokens(token);
+        CREATE INDEX ix_email_verification_tokens_expires_at ON email_verification_tokens(expires_at);
+        CREATE INDEX ix_email_verification_tokens_is_used ON email_verification_tokens(is_used);
         """
         
         password_reset_sql = """
@@ -1660,6 +2106,8 @@ def admin_create_email_tables():
             request_ip VARCHAR(45)
         );
         CREATE INDEX idx_password_reset_token ON password_reset_tokens(token);
+        CREATE INDEX ix_password_reset_tokens_expires_at ON password_reset_tokens(expires_at);
+        CREATE INDEX ix_password_reset_tokens_is_used ON password_reset_tokens(is_used);
         """
         
         email_change_sql = """
@@ -1674,7 +2122,9 @@ def admin_create_email_tables():
             is_used BOOLEAN NOT NULL DEFAULT FALSE,
             used_at TIMESTAMP WITHOUT TIME ZONE
         );
-        CREATE INDEX idx_email_change_token ON email_change_tokens(token);
+        CREATE UNIQUE INDEX ix_email_change_tokens_token ON email_change_tokens(token);
+        CREATE INDEX ix_email_change_tokens_expires_at ON email_change_tokens(expires_at);
+        CREATE INDEX ix_email_change_tokens_is_used ON email_change_tokens(is_used);
         """
         
         db.session.execute(db.text(email_verification_sql))
@@ -1778,6 +2228,7 @@ def admin_create_collection():
             )
             
             db.session.add(collection)
+            cache.invalidate_on_commit('collections')
             db.session.commit()
             
             flash(f'Collection "{name}" created successfully!', 'success')
@@ -1831,6 +2282,7 @@ def admin_edit_collection(collection_id):
                 flash('Name and description are required.', 'error')
                 return redirect(request.url)
             
+            cache.invalidate_on_commit('collections')
             db.session.commit()
             flash(f'Collection "{collection.name}" updated successfully!', 'success')
             return redirect(url_for('admin_collections'))
@@ -1878,6 +2330,11 @@ def admin_manage_collection(collection_id):
         )
     ).order_by(CustomAchievement.name).limit(50).all()  # Limit to 50 for performance
     
+    preload_achievement_image_states(
+        [item.shared_achievement.image_filename for item in items]
+        + [achievement.image_filename for achievement in available_shared_achievements]
+        + [achievement.image_filename for achievement in available_custom_achievements]
+    )
     return render_template('admin/manage_collection.html',
                          collection=collection,
                          items=items,
@@ -1927,10 +2384,10 @@ def admin_add_achievement_to_collection(collection_id):
         db.session.add(item)
         
         # Update user progress for all participants
-        progress_records = UserCollectionProgress.query.filter_by(collection_id=collection_id).all()
-        for progress in progress_records:
-            progress.update_progress()
+        db.session.flush()
+        recalculate_collection_progress(collection_id)
         
+        cache.invalidate_on_commit('collections')
         db.session.commit()
         
         return jsonify({
@@ -1984,6 +2441,9 @@ def admin_add_custom_achievement_to_collection(collection_id):
             )
             db.session.add(shared_achievement)
             db.session.flush()  # Get the ID
+            index_achievement_games(shared_achievement)
+            adjust_image_refs(shared_achievement.image_filename, 1)
+            cache.invalidate_on_commit('shared:list')
         
         # Check if achievement already in collection
         existing_item = CollectionItem.query.filter_by(
@@ -2008,6 +2468,7 @@ def admin_add_custom_achievement_to_collection(collection_id):
         )
         
         db.session.add(collection_item)
+        cache.invalidate_on_commit('collections')
         db.session.commit()
         
         action = "promoted and added" if not existing_shared else "added"
@@ -2036,10 +2497,10 @@ def admin_remove_achievement_from_collection(collection_id, item_id):
         db.session.delete(item)
         
         # Update user progress for all participants
-        progress_records = UserCollectionProgress.query.filter_by(collection_id=collection_id).all()
-        for progress in progress_records:
-            progress.update_progress()
+        db.session.flush()
+        recalculate_collection_progress(collection_id)
         
+        cache.invalidate_on_commit('collections')
         db.session.commit()
         
         return jsonify({
@@ -2124,9 +2585,14 @@ def admin_delete_collection(collection_id):
     try:
         collection = AchievementCollection.query.get_or_404(collection_id)
         collection_name = collection.name
+        participant_ids = [user_id for (user_id,) in db.session.query(UserCollectionProgress.user_id)
+                           .filter_by(collection_id=collection_id)]
         
         # Delete collection (cascades to items and progress)
         db.session.delete(collection)
+        if participant_ids:
+            recompute_user_stats(participant_ids, ('collections_joined', 'collections_completed'))
+        cache.invalidate_on_commit('collections')
         db.session.commit()
         
         return jsonify({
@@ -2358,38 +2824,71 @@ def admin_create_rating_tables():
 # USER COLLECTION ROUTES
 # ========================================
 
+@cache.cached(tags=['collections'])
+def get_collection_listing():
+    """
+    Every enabled collection as plain data, featured first
+    Start/end dates are checked by the caller so the cached list never goes stale on a schedule
+    """
+    enabled_collections = AchievementCollection.query.filter(
+        AchievementCollection.is_active == True
+    ).order_by(
+        AchievementCollection.is_featured.desc(),
+        AchievementCollection.created_at.desc()
+    ).all()
+    
+    # Item counts for every collection in one grouped query
+    item_counts = dict(db.session.query(CollectionItem.collection_id, db.func.count(CollectionItem.id))
+                       .group_by(CollectionItem.collection_id).all())
+    
+    return [{
+        'id': collection.id,
+        'name': collection.name,
+        'description': collection.description,
+        'collection_type': collection.collection_type,
+        'color_theme': collection.color_theme,
+        'difficulty_level': collection.difficulty_level,
+        'estimated_time': collection.estimated_time,
+        'is_featured': collection.is_featured,
+        'start_date': collection.start_date,
+        'end_date': collection.end_date,
+        'total_achievements': item_counts.get(collection.id, 0)
+    } for collection in enabled_collections]
+
 @app.route('/collections')
 @login_required
 def collections():
     """User page to view and participate in achievement collections"""
     # Get active collections for users
     now = datetime.utcnow()
-    active_collections = AchievementCollection.query.filter(
-        AchievementCollection.is_active == True,
-        db.or_(
-            AchievementCollection.start_date.is_(None),
-            AchievementCollection.start_date <= now
-        ),
-        db.or_(
-            AchievementCollection.end_date.is_(None),
-            AchievementCollection.end_date >= now
-        )
-    ).order_by(
-        AchievementCollection.is_featured.desc(),
-        AchievementCollection.created_at.desc()
-    ).all()
+    active_collections = [
+        collection for collection in get_collection_listing()
+        if (collection['start_date'] is None or collection['start_date'] <= now)
+        and (collection['end_date'] is None or collection['end_date'] >= now)
+    ]
     
-    # Get user's progress for each collection
-    user_progress = {}
+    # Get user's progress for every collection in one query
+    collection_ids = [collection['id'] for collection in active_collections]
+    user_progress = {
+        progress.collection_id: progress
+        for progress in UserCollectionProgress.query.filter(
+            UserCollectionProgress.user_id == current_user.id,
+            UserCollectionProgress.collection_id.in_(collection_ids)
+        )
+    } if collection_ids else {}
+    
+    # Participant counts change with every join, so they are read live (with unflushed joins) instead of cached
+    participants = {
+        collection.id: counters.live_value(collection, 'participants_count')
+        for collection in AchievementCollection.query.options(
+            db.load_only(AchievementCollection.id, AchievementCollection.participants_count)
+        ).filter(AchievementCollection.id.in_(collection_ids))
+    } if collection_ids else {}
     for collection in active_collections:
-        progress = UserCollectionProgress.query.filter_by(
-            user_id=current_user.id,
-            collection_id=collection.id
-        ).first()
-        user_progress[collection.id] = progress
+        collection['participants_count'] = participants.get(collection['id'], 0)
     
     # Get featured collections
-    featured_collections = [c for c in active_collections if c.is_featured]
+    featured_collections = [c for c in active_collections if c['is_featured']]
     
     return render_template('collections.html',
                          collections=active_collections,
@@ -2423,27 +2922,31 @@ def view_collection(collection_id):
             collection_id=collection_id
         )
         db.session.add(user_progress)
+        adjust_user_stats(current_user.id, collections_joined=1)
         
         # Update participant count
-        collection.participants_count += 1
-        db.session.commit()
+        counters.increment(collection, 'participants_count')
     
-    # Update progress
+    # Update progress (only writes when it changed)
     user_progress.update_progress()
+    db.session.commit()
     
     # Update view count
-    collection.views_count += 1
-    db.session.commit()
+    counters.increment(collection, 'views_count')
     
     # Check which achievements user has completed
-    user_achievements = {}
-    for item in items:
-        user_custom = CustomAchievement.query.filter_by(
-            user_id=current_user.id,
-            imported_from_shared_id=item.shared_achievement_id
-        ).first()
-        user_achievements[item.shared_achievement_id] = user_custom
+    shared_ids = [item.shared_achievement_id for item in items]
+    user_achievements = dict.fromkeys(shared_ids)
+    if shared_ids:
+        user_achievements.update({
+            user_custom.imported_from_shared_id: user_custom
+            for user_custom in CustomAchievement.query.filter(
+                CustomAchievement.user_id == current_user.id,
+                CustomAchievement.imported_from_shared_id.in_(shared_ids)
+            )
+        })
     
+    preload_achievement_image_states(item.shared_achievement.image_filename for item in items)
     return render_template('collection_detail.html',
                          collection=collection,
                          items=items,
@@ -2475,9 +2978,10 @@ def join_collection(collection_id):
             collection_id=collection_id
         )
         db.session.add(user_progress)
+        adjust_user_stats(current_user.id, collections_joined=1)
         
         # Update participant count
-        collection.participants_count += 1
+        counters.increment(collection, 'participants_count')
         
         # Update progress
         user_progress.update_progress()
@@ -2516,9 +3020,9 @@ def browse_users():
     if filter_by == 'new':
         query = query.order_by(User.created_at.desc())
     elif filter_by == 'top_achievers':
-        # Order by users with most custom achievements
-        query = query.outerjoin(CustomAchievement).group_by(User.id)\
-            .order_by(db.func.count(CustomAchievement.id).desc())
+        # Order by the maintained achievement count instead of grouping every user's achievements
+        query = query.outerjoin(UserStats, UserStats.user_id == User.id)\
+            .order_by(db.func.coalesce(UserStats.custom_achievements_count, 0).desc(), User.id)
     else:  # active
         query = query.order_by(User.updated_at.desc())
     
@@ -2526,30 +3030,33 @@ def browse_users():
     page = request.args.get('page', 1, type=int)
     users = query.paginate(page=page, per_page=20, error_out=False)
     
-    # Get friendship status for each user
+    # A few batched queries covering the whole page
+    user_ids = [user.id for user in users.items]
     user_friendships = {}
     friend_counts = {}
     achievement_counts = {}
+    collection_counts = {}
     
-    for user in users.items:
-        # Friendship status
-        user_friendships[user.id] = get_friendship_status(current_user.id, user.id)
-        
-        # Friend count
-        friend_counts[user.id] = UserFriendship.query.filter_by(
-            user_id=user.id, status='accepted'
-        ).count()
-        
-        # Achievement count
-        achievement_counts[user.id] = CustomAchievement.query.filter_by(
-            user_id=user.id
-        ).count()
+    if user_ids:
+        user_friendships = dict(
+            db.session.query(UserFriendship.friend_id, UserFriendship.status)
+            .filter(UserFriendship.user_id == current_user.id, UserFriendship.friend_id.in_(user_ids))
+        )
+        friend_counts = dict(
+            db.session.query(UserFriendship.user_id, db.func.count(UserFriendship.id))
+            .filter(UserFriendship.user_id.in_(user_ids), UserFriendship.status == 'accepted')
+            .group_by(UserFriendship.user_id)
+        )
+        for stats in UserStats.query.filter(UserStats.user_id.in_(user_ids)):
+            achievement_counts[stats.user_id] = stats.custom_achievements_count
+            collection_counts[stats.user_id] = stats.collections_completed
     
     return render_template('social/browse_users.html',
                          users=users,
                          user_friendships=user_friendships,
                          friend_counts=friend_counts,
                          achievement_counts=achievement_counts,
+                         collection_counts=collection_counts,
                          search=search,
                          filter_by=filter_by)
 
@@ -2581,19 +3088,28 @@ def user_profile(username):
     recent_activity = get_recent_activities(limit=10, user_id=user.id)
     
     # Get friends
-    friends = get_user_friends(user.id, status='accepted')[:12]  # Show first 12 friends
+    friends = get_user_friends(user.id, status='accepted')
+    
+    # Stats come from the maintained summary row; users who predate it get one built now
+    user_stats = UserStats.query.get(user.id)
+    if not user_stats:
+        recompute_user_stats([user.id])
+        db.session.commit()
+        user_stats = UserStats.query.get(user.id)
     
-    # Calculate stats
     stats = {
-        'total_achievements': CustomAchievement.query.filter_by(user_id=user.id).count(),
-        'shared_achievements': SharedAchievement.query.filter_by(creator_id=user.id).count(),
-        'collections_joined': UserCollectionProgress.query.filter_by(user_id=user.id).count(),
-        'collections_completed': UserCollectionProgress.query.filter_by(
-            user_id=user.id, status='completed'
-        ).count(),
+        'total_achievements': user_stats.custom_achievements_count,
+        'shared_achievements': user_stats.shared_achievements_count,
+        'collections_joined': user_stats.collections_joined,
+        'collections_completed': user_stats.collections_completed,
+        'games_owned': user_stats.games_owned,
+        'perfect_games': user_stats.perfect_games,
+        'achievements_unlocked': user_stats.achievements_unlocked,
+        'total_playtime_hours': user_stats.total_playtime_hours,
         'friend_count': len(friends),
         'join_date': user.created_at
     }
+    friends = friends[:12]  # Show first 12 friends
     
     return render_template('social/user_profile.html',
                          profile_user=user,
@@ -2745,6 +3261,7 @@ def remove_friend(user_id):
         if friendship2:
             db.session.delete(friendship2)
         
+        prune_friend_timeline(current_user.id, user_id)
         db.session.commit()
         
         user = User.query.get(user_id)
@@ -2806,22 +3323,14 @@ def get_achievement_rating(achievement_id):
     if user_rating_obj:
         user_rating = user_rating_obj.rating
     
-    # Get average rating
-    avg_rating = db.session.query(db.func.avg(AchievementRating.rating)).filter_by(
-        shared_achievement_id=achievement_id
-    ).scalar()
-    
-    rating_count = AchievementRating.query.filter_by(
-        shared_achievement_id=achievement_id
-    ).count()
-    
-    return jsonify({
+    # Polled by the rating widget; unchanged ratings are answered with 304
+    return response_pipeline.revalidate(jsonify({
         'achievement_id': achievement_id,
         'achievement_name': achievement.name,
         'user_rating': user_rating,
-        'average_rating': round(float(avg_rating), 1) if avg_rating else 0,
-        'rating_count': rating_count
-    })
+        'average_rating': achievement.average_rating,
+        'rating_count': achievement.rating_count
+    }))
 
 @app.route('/achievements/<int:achievement_id>/rate', methods=['POST'])
 @login_required
@@ -2838,17 +3347,19 @@ def rate_achievement(achievement_id):
     achievement = SharedAchievement.query.get_or_404(achievement_id)
     
     try:
-        # Check if user already rated this achievement
+        # Check if user already rated this achievement; locked so a concurrent re-rate waits and
+        # applies its delta against this rating rather than the same old value
         existing_rating = AchievementRating.query.filter_by(
             user_id=current_user.id,
             shared_achievement_id=achievement_id
-        ).first()
+        ).with_for_update().first()
         
         if existing_rating:
             # Update existing rating
             old_rating = existing_rating.rating
             existing_rating.rating = rating_value
             existing_rating.updated_at = datetime.utcnow()
+            achievement.record_rating(rating_value, previous_rating=old_rating)
             message = f'Updated your rating from {old_rating} to {rating_value} stars'
         else:
             # Create new rating
@@ -2858,8 +3369,10 @@ def rate_achievement(achievement_id):
                 rating=rating_value
             )
             db.session.add(new_rating)
+            achievement.record_rating(rating_value)
             message = f'Rated "{achievement.name}" {rating_value} stars'
         
+        cache.invalidate_on_commit(f'shared:{achievement_id}')
         db.session.commit()
         
         # Add activity feed entry for high ratings (4-5 stars) on new ratings
@@ -2878,21 +3391,12 @@ def rate_achievement(achievement_id):
             )
             db.session.commit()
         
-        # Calculate updated average rating
-        avg_rating = db.session.query(db.func.avg(AchievementRating.rating)).filter_by(
-            shared_achievement_id=achievement_id
-        ).scalar()
-        
-        rating_count = AchievementRating.query.filter_by(
-            shared_achievement_id=achievement_id
-        ).count()
-        
         return jsonify({
             'success': True,
             'message': message,
             'user_rating': rating_value,
-            'average_rating': round(float(avg_rating), 1) if avg_rating else 0,
-            'rating_count': rating_count
+            'average_rating': achievement.average_rating,
+            'rating_count': achievement.rating_count
         })
         
     except Exception as e:
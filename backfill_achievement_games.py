@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Create and backfill the achievement_games index from custom and shared achievement conditions
+Safe to re-run: each achievement's rows are rebuilt from its condition_data
+"""
+
+import os
+from flask import Flask
+from config import config
+from models import db, CustomAchievement, SharedAchievement, AchievementGame, index_achievement_games
+
+BATCH_SIZE = 500
+
+def backfill_achievement_games():
+    """Index the games referenced by every custom and shared achievement"""
+    print("🎮 Backfilling achievement games index...")
+
+    # Create Flask app
+    app = Flask(__name__)
+    config_name = os.environ.get('FLASK_ENV', 'development')
+    app.config.from_object(config[config_name])
+    db.init_app(app)
+
+    with app.app_context():
+        try:
+            AchievementGame.__table__.create(db.engine, checkfirst=True)
+
+            for model in (CustomAchievement, SharedAchievement):
+                indexed = 0
+                last_id = 0
+                while True:
+                    batch = model.query.filter(model.id > last_id).order_by(model.id).limit(BATCH_SIZE).all()
+                    if not batch:
+                        break
+
+                    for achievement in batch:
+                        index_achievement_games(achievement)
+                    db.session.commit()
+
+                    indexed += len(batch)
+                    last_id = batch[-1].id
+
+                print(f"✅ Indexed {indexed} {model.__tablename__}")
+
+            print(f"📊 Achievement game links: {AchievementGame.query.count()}")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error backfilling achievement games: {e}")
+            return False
+
+if __name__ == '__main__':
+    backfill_achievement_games()
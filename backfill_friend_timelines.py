@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Create and backfill the friend_timeline table for friendships accepted before fan-out existed
+Safe to re-run: entries that are already present are skipped
+"""
+
+import os
+from flask import Flask
+from config import config
+from models import db, UserFriendship, FriendTimeline, backfill_friend_timeline
+
+def backfill_friend_timelines():
+    """Seed every accepted friendship's timeline with the friend's recent public activity"""
+    print("👥 Backfilling friend timelines...")
+
+    # Create Flask app
+    app = Flask(__name__)
+    config_name = os.environ.get('FLASK_ENV', 'development')
+    app.config.from_object(config[config_name])
+    db.init_app(app)
+
+    with app.app_context():
+        try:
+            FriendTimeline.__table__.create(db.engine, checkfirst=True)
+
+            # Each accepted row is one direction: user_id reads friend_id's activity
+            friendships = db.session.query(UserFriendship.user_id, UserFriendship.friend_id)\
+                .filter(UserFriendship.status == 'accepted').all()
+
+            for owner_id, author_id in friendships:
+                backfill_friend_timeline(owner_id, author_id)
+
+            db.session.commit()
+
+            print(f"✅ Backfilled timelines for {len(friendships)} friendship directions")
+            print(f"📊 Friend timeline entries: {FriendTimeline.query.count()}")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error backfilling friend timelines: {e}")
+            return False
+
+if __name__ == '__main__':
+    backfill_friend_timelines()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Add and backfill the denormalized rating_sum/rating_count columns on shared achievements
+Safe to re-run: it also repairs aggregates that drifted from the achievement_ratings table
+"""
+
+import os
+from flask import Flask
+from config import config
+from models import db, SharedAchievement, AchievementRating
+
+def add_rating_columns():
+    """Add the aggregate columns to databases created before they existed"""
+    existing_columns = {col['name'] for col in db.inspect(db.engine).get_columns('shared_achievements')}
+
+    for column in ('rating_sum', 'rating_count'):
+        if column in existing_columns:
+            print(f"✅ Column {column} already exists")
+            continue
+
+        db.session.execute(db.text(
+            f'ALTER TABLE shared_achievements ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0'
+        ))
+        print(f"✅ Added column {column}")
+
+    db.session.commit()
+
+def backfill_rating_aggregates():
+    """Recompute every shared achievement's rating aggregates in one set-based UPDATE"""
+    print("⭐ Backfilling shared achievement rating aggregates...")
+
+    # Create Flask app
+    app = Flask(__name__)
+    config_name = os.environ.get('FLASK_ENV', 'development')
+    app.config.from_object(config[config_name])
+    db.init_app(app)
+
+    with app.app_context():
+        try:
+            add_rating_columns()
+
+            rating_sum = db.select(db.func.coalesce(db.func.sum(AchievementRating.rating), 0))\
+                .where(AchievementRating.shared_achievement_id == SharedAchievement.id)\
+                .scalar_subquery()
+            rating_count = db.select(db.func.count(AchievementRating.id))\
+                .where(AchievementRating.shared_achievement_id == SharedAchievement.id)\
+                .scalar_subquery()
+
+            result = db.session.execute(
+                db.update(SharedAchievement).values(rating_sum=rating_sum, rating_count=rating_count)
+            )
+            db.session.commit()
+
+            print(f"✅ Updated rating aggregates for {result.rowcount} shared achievements")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error backfilling rating aggregates: {e}")
+            return False
+
+if __name__ == '__main__':
+    backfill_rating_aggregates()
@@ -0,0 +1,342 @@
+"""
+Shared data cache with tag-based invalidation
+Entries live in Redis (CACHE_BACKEND=redis), so every web and worker process sees each invalidation;
+without a shared backend caching is off (CACHE_BACKEND=none). The in-process LRU (CACHE_BACKEND=memory)
+is only safe with a single process and no separate worker, e.g. in tests.
+Every entry records a token for each tag it depends on (user:<id>, game:<appid>, shared:<id>, ...);
+invalidating a tag replaces its token, so stale entries are ignored on their next read without
+having to find and delete them
+"""
+
+import functools
+import hashlib
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db
+
+try:
+    import redis
+except ImportError:  # Optional: only needed when CACHE_BACKEND is redis
+    redis = None
+
+
+TAG_KEY_PREFIX = 'tag:'
+LOCK_KEY_SUFFIX = ':lock'
+PENDING_TAGS_KEY = 'cache_invalidate_tags'
+LOCK_POLL_SECONDS = 0.05
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """Per-process LRU of raw values; invalidations never reach other processes, so only for tests and single-process runs"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        """Unexpired value for key (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] < now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key, value, timeout):
+        """Store a value, evicting the least recently used (caller holds the lock)"""
+        self._entries[key] = (time.monotonic() + timeout if timeout else None, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return [self._live(key, now) for key in keys]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._store(key, value, timeout)
+
+    def add(self, key, value, timeout=None):
+        """Store only if the key is not already set; returns whether it was stored"""
+        with self._lock:
+            if self._live(key, time.monotonic()) is not None:
+                return False
+            self._store(key, value, timeout)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, prefix):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Redis store shared by every web and worker process"""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+
+    def get_many(self, keys):
+        return self.client.mget(keys)
+
+    def set(self, key, value, timeout=None):
+        self.client.set(key, value, ex=int(timeout) if timeout else None)
+
+    def add(self, key, value, timeout=None):
+        return bool(self.client.set(key, value, ex=int(timeout) if timeout else None, nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def clear(self, prefix):
+        for key in self.client.scan_iter(match=f'{prefix}*', count=1000):
+            self.client.delete(key)
+
+
+class CacheManager:
+    """Caches picklable function results and invalidates them by tag"""
+
+    def __init__(self):
+        self.backend = None
+        self.enabled = False
+        self.default_timeout = 300
+        self.lock_timeout = 10
+        self.key_prefix = 'sat:'
+        self._computing = threading.local()  # Stack of tag sets for results being computed
+
+    def init_app(self, app):
+        """Initialize cache with Flask app config"""
+        self.default_timeout = int(app.config.get('CACHE_DEFAULT_TIMEOUT', self.default_timeout))
+        self.lock_timeout = int(app.config.get('CACHE_LOCK_TIMEOUT', self.lock_timeout))
+        self.key_prefix = app.config.get('CACHE_KEY_PREFIX', self.key_prefix)
+
+        backend = (app.config.get('CACHE_BACKEND') or 'none').lower()
+        if backend == 'redis' and redis is None:
+            # A per-process fallback would keep serving stale pages after invalidations made elsewhere
+            print("⚠️  CACHE_BACKEND is redis but the redis package is not installed; caching disabled")
+            backend = 'none'
+
+        if backend == 'redis':
+            self.backend = RedisBackend(app.config.get('CACHE_REDIS_URL') or app.config.get('REDIS_URL'))
+            print("✅ Cache using Redis")
+        elif backend == 'memory':
+            self.backend = MemoryBackend(int(app.config.get('CACHE_MAX_ENTRIES', 10000)))
+        elif backend == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {backend!r}")
+        self.enabled = self.backend is not None
+
+        # Deferred invalidations are applied once the transaction that made the change commits
+        if not event.contains(Session, 'after_commit', self._after_commit):
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_soft_rollback', self._after_soft_rollback)
+
+    def _key(self, name):
+        return f'{self.key_prefix}{name}'
+
+    @staticmethod
+    def make_key(name, args=(), kwargs=None):
+        """Cache key for a function name and its arguments"""
+        digest = hashlib.sha1(repr((args, sorted((kwargs or {}).items()))).encode()).hexdigest()
+        return f'fn:{name}:{digest}'
+
+    def _tag_tokens(self, tags):
+        """Current token for each tag, creating tokens for tags that have none yet"""
+        tags = sorted(set(tags))
+        keys = [self._key(TAG_KEY_PREFIX + tag) for tag in tags]
+        tokens = self.backend.get_many(keys) if keys else []
+
+        for index, token in enumerate(tokens):
+            if token is None:
+                # add() so concurrent readers agree on one token
+                self.backend.add(keys[index], uuid.uuid4().hex.encode())
+                tokens[index] = self.backend.get_many([keys[index]])[0]
+        return dict(zip(tags, tokens))
+
+    def _read(self, key):
+        """Cached value for key, or _MISSING when absent or any of its tags was invalidated"""
+        raw = self.backend.get_many([self._key(key)])[0]
+        if raw is None:
+            return _MISSING
+
+        tag_tokens, value = pickle.loads(raw)
+        if tag_tokens and self._tag_tokens(tag_tokens) != tag_tokens:
+            return _MISSING
+        return value
+
+    def get(self, key, default=None):
+        """Cached value for key, or default"""
+        if not self.enabled:
+            return default
+        try:
+            value = self._read(key)
+        except Exception as e:
+            print(f"⚠️  Cache read failed: {e}")
+            return default
+        return default if value is _MISSING else value
+
+    def set(self, key, value, timeout=None, tags=()):
+        """Cache a picklable value under key until it times out or one of its tags is invalidated"""
+        if not self.enabled:
+            return
+        try:
+            self._write(key, value, timeout, self._tag_tokens(tags))
+        except Exception as e:
+            print(f"⚠️  Cache write failed: {e}")
+
+    def _write(self, key, value, timeout, tag_tokens):
+        self.backend.set(
+            self._key(key),
+            pickle.dumps((tag_tokens, value), protocol=pickle.HIGHEST_PROTOCOL),
+            timeout or self.default_timeout
+        )
+
+    def _wait_for(self, key):
+        """Wait for another process to fill key, up to the lock timeout"""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            value = self._read(key)
+            if value is not _MISSING:
+                return value
+            if self.backend.get_many([self._key(key) + LOCK_KEY_SUFFIX])[0] is None:
+                break  # The holder gave up without storing a value
+        return _MISSING
+
+    def get_or_set(self, key, compute, timeout=None, tags=()):
+        """
+        Return the cached value for key, or compute and cache it
+        Only one caller computes a missing key at a time; the others wait for its result
+        instead of all hitting the database at once
+        """
+        if not self.enabled:
+            return compute()
+
+        lock_key = self._key(key) + LOCK_KEY_SUFFIX
+        try:
+            value = self._read(key)
+            if value is not _MISSING:
+                return value
+
+            # Taken before computing, so an invalidation that lands mid-compute still wins
+            tag_tokens = self._tag_tokens(tags)
+            locked = self.backend.add(lock_key, b'1', self.lock_timeout)
+            if not locked:
+                value = self._wait_for(key)
+                if value is not _MISSING:
+                    return value
+        except Exception as e:
+            print(f"⚠️  Cache unavailable, computing directly: {e}")
+            return compute()
+
+        self._computing.__dict__.setdefault('stack', []).append(set())
+        try:
+            value = compute()
+            extra_tags = self._computing.stack[-1] - set(tag_tokens)
+        except Exception:
+            if locked:
+                self._release(lock_key)
+            raise
+        finally:
+            self._computing.stack.pop()
+
+        try:
+            if extra_tags:
+                tag_tokens.update(self._tag_tokens(extra_tags))
+            self._write(key, value, timeout, tag_tokens)
+        except Exception as e:
+            print(f"⚠️  Cache write failed: {e}")
+        if locked:
+            self._release(lock_key)
+        return value
+
+    def _release(self, lock_key):
+        """Let waiting callers go once the value is stored (or computing it failed)"""
+        try:
+            self.backend.delete(lock_key)
+        except Exception as e:
+            print(f"⚠️  Cache lock release failed: {e}")
+
+    def tag(self, *tags):
+        """Add tags to the result currently being computed, for tags only known from its data"""
+        stack = getattr(self._computing, 'stack', None)
+        if stack:
+            stack[-1].update(tags)
+
+    def cached(self, timeout=None, tags=None):
+        """
+        Decorator caching a function's return value by its arguments
+        tags is a list of tags, or a callable taking the function's arguments and returning one;
+        return values must be picklable (plain data, not ORM objects)
+        """
+        def decorator(fn):
+            name = f'{fn.__module__}.{fn.__qualname__}'
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                entry_tags = tags(*args, **kwargs) if callable(tags) else (tags or ())
+                return self.get_or_set(
+                    self.make_key(name, args, kwargs),
+                    lambda: fn(*args, **kwargs),
+                    timeout=timeout,
+                    tags=entry_tags
+                )
+
+            wrapper.uncached = fn
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tags):
+        """Invalidate every entry that depends on any of these tags"""
+        if not self.enabled:
+            return
+        try:
+            for tag in set(tags):
+                self.backend.set(self._key(TAG_KEY_PREFIX + tag), uuid.uuid4().hex.encode())
+        except Exception as e:
+            print(f"⚠️  Cache invalidation failed: {e}")
+
+    def invalidate_on_commit(self, *tags):
+        """Invalidate tags once the current transaction commits, so no reader can re-cache the old rows"""
+        db.session.info.setdefault(PENDING_TAGS_KEY, set()).update(tags)
+
+    def _after_commit(self, session):
+        if session.in_nested_transaction():
+            return  # Releasing a savepoint; wait for the real commit
+        tags = session.info.pop(PENDING_TAGS_KEY, None)
+        if tags:
+            self.invalidate(*tags)
+
+    def _after_soft_rollback(self, session, previous_transaction):
+        if not previous_transaction.nested:
+            session.info.pop(PENDING_TAGS_KEY, None)
+
+    def clear(self):
+        """Drop every cached entry"""
+        if not self.enabled:
+            return
+        try:
+            self.backend.clear(self.key_prefix)
+        except Exception as e:
+            print(f"⚠️  Cache clear failed: {e}")
+
+# Global instance
+cache = CacheManager()
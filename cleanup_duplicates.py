@@ -6,7 +6,7 @@ Clean up duplicate shared achievements created before duplicate prevention
 import os
 from flask import Flask
 from config import config
-from models import db, SharedAchievement, User
+from models import db, SharedAchievement, User, adjust_image_refs
 
 def cleanup_duplicate_shared_achievements():
     """Remove duplicate shared achievements, keeping the most recent one"""
@@ -50,6 +50,7 @@ def cleanup_duplicate_shared_achievements():
                     for dup in remove:
                         print(f"   🗑️  Removing: ID {dup.id} (shared {dup.shared_at})")
                         db.session.delete(dup)
+                        adjust_image_refs(dup.image_filename, -1)
                         duplicates_removed += 1
             
             if duplicates_removed > 0:
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Garbage-collect achievement images that no custom or shared achievement references any more
+Reference counts are recomputed first, so counts that drifted never cause a live image to be removed
+Safe to re-run: an interrupted run leaves rows marked 'deleting' that the next run finishes
+"""
+
+import os
+from flask import Flask
+from config import config
+from models import db, AchievementImage, recount_image_refs
+from s3_manager import s3_manager
+
+BATCH_SIZE = 500
+
+def collect_orphan_images():
+    """Delete unreferenced images from storage in batches, then drop their rows"""
+    print("🧹 Collecting orphaned achievement images...")
+
+    # Create Flask app
+    app = Flask(__name__)
+    config_name = os.environ.get('FLASK_ENV', 'development')
+    app.config.from_object(config[config_name])
+    db.init_app(app)
+    s3_manager.init_app(app)
+
+    with app.app_context():
+        try:
+            recount_image_refs()
+            db.session.commit()
+
+            collected = 0
+            kept = 0
+            last_id = 0
+            while True:
+                batch = db.session.query(AchievementImage.id, AchievementImage.filename).filter(
+                    AchievementImage.id > last_id,
+                    AchievementImage.ref_count <= 0,
+                    AchievementImage.status.in_(['ready', 'failed', 'deleting'])
+                ).order_by(AchievementImage.id).limit(BATCH_SIZE).all()
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                ids = [row.id for row in batch]
+
+                # Claim the batch; an upload of the same bytes in the meantime flips a row back to 'pending'
+                AchievementImage.query.filter(
+                    AchievementImage.id.in_(ids),
+                    AchievementImage.ref_count <= 0
+                ).update({'status': 'deleting'}, synchronize_session=False)
+                db.session.commit()
+
+                # Re-check under row locks held until the rows are gone, so an upload that revived a row
+                # between the claim and here keeps its files, and one that arrives now waits for the delete
+                claimed = [filename for (filename,) in db.session.query(AchievementImage.filename).filter(
+                    AchievementImage.id.in_(ids),
+                    AchievementImage.status == 'deleting'
+                ).with_for_update()]
+                deleted = s3_manager.delete_images(claimed)
+
+                if deleted:
+                    AchievementImage.query.filter(
+                        AchievementImage.filename.in_(deleted),
+                        AchievementImage.status == 'deleting'
+                    ).delete(synchronize_session=False)
+                db.session.commit()
+
+                collected += len(deleted)
+                kept += len(claimed) - len(deleted)
+
+            print(f"✅ Collected {collected} orphaned images ({kept} could not be deleted and will be retried)")
+            print(f"📊 Images remaining: {AchievementImage.query.count()}")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error collecting orphaned images: {e}")
+            return False
+
+if __name__ == '__main__':
+    collect_orphan_images()
@@ -41,15 +41,64 @@ class Config:
     AWS_S3_REGION = os.environ.get('AWS_S3_REGION', 'us-east-1')
     CLOUDFRONT_DOMAIN = os.environ.get('CLOUDFRONT_DOMAIN', 'dlo67ihc291lh.cloudfront.net')
     USE_S3 = os.environ.get('USE_S3', 'False').lower() == 'true'
+    S3_MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 10))  # Pooled connections (and parallel uploads) per process
     
-    # Redis Configuration (for future caching)
+    # Image Processing Configuration
+    IMAGE_SPOOL_FOLDER = os.environ.get('IMAGE_SPOOL_FOLDER', 'image_spool')  # Uploads waiting for processing (kept in the bucket when USE_S3 is on)
+    IMAGE_PROCESS_WORKERS = int(os.environ.get('IMAGE_PROCESS_WORKERS', 2))  # Processes encoding derivatives (0 = in the job worker thread)
+    
+    # Steam Sync Configuration
+    STEAM_SYNC_MAX_WORKERS = int(os.environ.get('STEAM_SYNC_MAX_WORKERS', 8))  # Concurrent Steam API requests
+    STEAM_API_RATE_LIMIT = float(os.environ.get('STEAM_API_RATE_LIMIT', 10))  # Requests per second
+    STEAM_API_TIMEOUT = int(os.environ.get('STEAM_API_TIMEOUT', 10))  # Seconds
+    STEAM_SCHEMA_CACHE_TTL_HOURS = int(os.environ.get('STEAM_SCHEMA_CACHE_TTL_HOURS', 72))  # Shared schema cache lifetime
+    STEAM_FULL_SYNC_INTERVAL_HOURS = int(os.environ.get('STEAM_FULL_SYNC_INTERVAL_HOURS', 168))  # Refreshes are incremental between full resyncs
+    
+    # Background Job Configuration
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 2))  # Local worker threads per web process (0 = use worker.py)
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 2))  # Seconds between queue polls
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 600))  # Re-queue running jobs without a heartbeat
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))  # Runs of a retried or stalled job before it is marked failed
+    
+    # Game Metadata Cache Configuration
+    GAME_CACHE_MAX_ENTRIES = int(os.environ.get('GAME_CACHE_MAX_ENTRIES', 10000))  # Games kept per worker process
+    GAME_CACHE_TTL_SECONDS = int(os.environ.get('GAME_CACHE_TTL_SECONDS', 3600))  # Lifetime of a cached game name
+    
+    # Engagement Counter Configuration
+    COUNTER_FLUSH_INTERVAL = float(os.environ.get('COUNTER_FLUSH_INTERVAL', 10))  # Seconds between counter flushes (0 = manual)
+    COUNTER_REDIS_URL = os.environ.get('COUNTER_REDIS_URL')  # Share buffered counters across processes (optional)
+    
+    # Redis Configuration
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
     
+    # Data Cache Configuration
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'none')  # 'redis', 'none', or 'memory' (single process only)
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or REDIS_URL
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))  # Seconds an entry lives without being invalidated
+    CACHE_LOCK_TIMEOUT = int(os.environ.get('CACHE_LOCK_TIMEOUT', 10))  # Longest wait for another process to fill a missing entry
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))  # Entries kept by the memory backend
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'sat:')
+    
+    # Response Compression Configuration (brotli is used when installed, otherwise gzip)
+    RESPONSE_COMPRESSION_MIN_SIZE = int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024))  # Smallest body worth compressing, in bytes (0 = off)
+    RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+    RESPONSE_BROTLI_QUALITY = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 5))
+    
     # Email Configuration with SendGrid
     SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
     SENDGRID_FROM_EMAIL = os.environ.get('SENDGRID_FROM_EMAIL', 'noreply@em8032.zstall.com')
     SENDGRID_FROM_NAME = os.environ.get('SENDGRID_FROM_NAME', 'Steam Achievement Tracker')
     
+    # Email Delivery Queue Configuration
+    EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND')  # 'sendgrid', 'smtp' or 'file' (default: whichever is configured)
+    EMAIL_FILE_DIR = os.environ.get('EMAIL_FILE_DIR')  # Write .eml files here instead of sending (offline testing)
+    EMAIL_DELIVERY_INTERVAL = float(os.environ.get('EMAIL_DELIVERY_INTERVAL', 5))  # Seconds between queue polls (0 = manual)
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 50))  # Emails sent per connection
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 6))  # Attempts before an email is dead-lettered
+    EMAIL_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 30))  # First retry delay, doubled per attempt
+    TOKEN_RETENTION_HOURS = float(os.environ.get('TOKEN_RETENTION_HOURS', 24))  # Keep expired/used tokens this long for friendly link errors
+    TOKEN_REAP_INTERVAL = int(os.environ.get('TOKEN_REAP_INTERVAL', 3600))  # Seconds between token reaper runs (0 = reap_expired_tokens.py only)
+    
     # Legacy email config (keeping for compatibility)
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
@@ -91,6 +140,11 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    JOB_WORKER_THREADS = 0
+    COUNTER_FLUSH_INTERVAL = 0
+    IMAGE_PROCESS_WORKERS = 0
+    EMAIL_DELIVERY_INTERVAL = 0
+    CACHE_BACKEND = 'memory'
 
 
 # Configuration dictionary
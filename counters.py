@@ -0,0 +1,179 @@
+"""
+Write-behind buffer for hot engagement counters (views, participants, tries, completions)
+Increments are collected in process, or in Redis when COUNTER_REDIS_URL is set, and flushed
+periodically as batched UPDATE ... SET x = x + n statements
+"""
+
+import atexit
+import threading
+import uuid
+from collections import defaultdict
+
+from models import db
+
+try:
+    import redis
+except ImportError:  # Optional: only needed when COUNTER_REDIS_URL is configured
+    redis = None
+
+
+# Only these columns may be buffered; each is a plain integer counter on a table with an id primary key
+COUNTER_COLUMNS = {
+    ('achievement_collections', 'views_count'),
+    ('achievement_collections', 'participants_count'),
+    ('shared_achievements', 'tries_count'),
+    ('shared_achievements', 'completions_count'),
+}
+
+REDIS_PENDING_KEY = 'counters:pending'
+
+
+class CounterBuffer:
+    """Buffers counter increments and writes them to the database in batches"""
+
+    def __init__(self):
+        self.app = None
+        self.flush_interval = 10.0
+        self.redis = None
+        self._pending = defaultdict(int)  # (table, column, row_id) -> buffered increment
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def init_app(self, app):
+        """Initialize counter buffer with Flask app config and start the flush thread"""
+        self.app = app
+        self.flush_interval = float(app.config.get('COUNTER_FLUSH_INTERVAL', self.flush_interval))
+
+        redis_url = app.config.get('COUNTER_REDIS_URL')
+        if redis_url:
+            if redis is None:
+                print("⚠️  COUNTER_REDIS_URL is set but the redis package is not installed; buffering in process")
+            else:
+                self.redis = redis.Redis.from_url(redis_url)
+                print("✅ Counter buffer using Redis")
+
+        if self.flush_interval > 0 and not self._thread:
+            self._thread = threading.Thread(target=self._flush_loop, name='counter-flush', daemon=True)
+            self._thread.start()
+            atexit.register(self._flush_on_exit)
+
+    @staticmethod
+    def _key(obj, column):
+        """Buffer key for a model instance's counter column"""
+        table = obj.__tablename__
+        if (table, column) not in COUNTER_COLUMNS:
+            raise ValueError(f"{table}.{column} is not a buffered counter")
+        return table, column, obj.id
+
+    def increment(self, obj, column, amount=1):
+        """Buffer an increment to obj.<column>; nothing is written until the next flush"""
+        table, column, row_id = self._key(obj, column)
+
+        if self.redis is not None:
+            try:
+                self.redis.hincrby(REDIS_PENDING_KEY, f'{table}|{column}|{row_id}', amount)
+                return
+            except Exception as e:
+                print(f"⚠️  Redis counter increment failed, buffering in process: {e}")
+
+        with self._lock:
+            self._pending[(table, column, row_id)] += amount
+
+    def pending(self, obj, column):
+        """Increments to obj.<column> that have not been flushed yet"""
+        table, column, row_id = self._key(obj, column)
+        amount = 0
+
+        if self.redis is not None:
+            try:
+                amount += int(self.redis.hget(REDIS_PENDING_KEY, f'{table}|{column}|{row_id}') or 0)
+            except Exception:
+                pass
+
+        with self._lock:
+            return amount + self._pending.get((table, column, row_id), 0)
+
+    def live_value(self, obj, column):
+        """Approximate current value: the stored counter plus buffered increments"""
+        return (getattr(obj, column) or 0) + self.pending(obj, column)
+
+    def _drain(self):
+        """Take every buffered increment, leaving the buffer empty"""
+        with self._lock:
+            deltas, self._pending = self._pending, defaultdict(int)
+
+        if self.redis is not None:
+            # Rename first so increments arriving during the flush land in a fresh hash
+            flushing_key = f'{REDIS_PENDING_KEY}:{uuid.uuid4().hex}'
+            try:
+                self.redis.rename(REDIS_PENDING_KEY, flushing_key)
+            except Exception:
+                flushing_key = None  # Nothing buffered in Redis (or Redis is unavailable)
+
+            if flushing_key:
+                for field, amount in self.redis.hgetall(flushing_key).items():
+                    table, column, row_id = field.decode().split('|')
+                    deltas[(table, column, int(row_id))] += int(amount)
+                self.redis.delete(flushing_key)
+
+        return deltas
+
+    def _restore(self, deltas):
+        """Put increments back after a failed flush so they are retried"""
+        with self._lock:
+            for key, amount in deltas.items():
+                self._pending[key] += amount
+
+    def flush(self):
+        """
+        Write buffered increments as one executemany UPDATE per counter column (requires an app context)
+        Returns the number of counters written
+        """
+        deltas = self._drain()
+        grouped = defaultdict(list)
+        for (table, column, row_id), amount in deltas.items():
+            if amount:
+                grouped[(table, column)].append({'b_id': row_id, 'b_amount': amount})
+
+        if not grouped:
+            return 0
+
+        try:
+            for (table_name, column), rows in grouped.items():
+                table = db.metadata.tables[table_name]
+                db.session.execute(
+                    table.update()
+                    .where(table.c.id == db.bindparam('b_id'))
+                    .values({column: table.c[column] + db.bindparam('b_amount')}),
+                    rows
+                )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._restore(deltas)
+            print(f"⚠️  Counter flush failed, will retry: {e}")
+            return 0
+
+        return sum(len(rows) for rows in grouped.values())
+
+    def _flush_loop(self):
+        """Flush on an interval until stopped"""
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception as e:
+                print(f"⚠️  Counter flush thread error: {e}")
+
+    def _flush_on_exit(self):
+        """Write whatever is still buffered when the process exits"""
+        self._stopping.set()
+        try:
+            with self.app.app_context():
+                self.flush()
+        except Exception as e:
+            print(f"⚠️  Could not flush counters on exit: {e}")
+
+# Global instance
+counters = CounterBuffer()
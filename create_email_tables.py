@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 """
-Create email verification and password reset tables manually
+Create email verification, password reset and outbound email queue tables manually
 """
 
 import os
 from flask import Flask
 from config import config
-from models import db
+from models import db, OutboundEmail
 
 def create_email_tables():
     """Create email tables manually to avoid conflicts"""
@@ -37,6 +37,8 @@ def create_email_tables():
                 used_at TIMESTAMP WITHOUT TIME ZONE
             );
             CREATE INDEX IF NOT EXISTS idx_email_verification_token ON email_verification_tokens(token);
+            CREATE INDEX IF NOT EXISTS ix_email_verification_tokens_expires_at ON email_verification_tokens(expires_at);
+            CREATE INDEX IF NOT EXISTS ix_email_verification_tokens_is_used ON email_verification_tokens(is_used);
             """
             
             password_reset_sql = """
@@ -52,12 +54,17 @@ def create_email_tables():
                 request_ip VARCHAR(45)
             );
             CREATE INDEX IF NOT EXISTS idx_password_reset_token ON password_reset_tokens(token);
+            CREATE INDEX IF NOT EXISTS ix_password_reset_tokens_expires_at ON password_reset_tokens(expires_at);
+            CREATE INDEX IF NOT EXISTS ix_password_reset_tokens_is_used ON password_reset_tokens(is_used);
             """
             
             db.session.execute(db.text(email_verification_sql))
             db.session.execute(db.text(password_reset_sql))
             db.session.commit()
             
+            # Outbound queue keeps undelivered mail, so it is created in place rather than dropped
+            OutboundEmail.__table__.create(db.engine, checkfirst=True)
+            
             print("✅ Email tables created successfully!")
             return True
             
@@ -1,76 +1,333 @@
 """
-Email service using SendGrid for email verification and password recovery
+Email service for email verification and password recovery
+Emails are queued in the outbound_emails table and delivered in batches by a background thread
+through SendGrid, SMTP, or (for offline testing) .eml files on disk
 """
 
 import os
 import secrets
+import smtplib
+import threading
+import atexit
+import time
 from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, From, To, Subject, Content
 from flask import current_app, url_for
-from models import db, EmailVerificationToken, PasswordResetToken, EmailChangeToken
+from models import db, EmailVerificationToken, PasswordResetToken, EmailChangeToken, OutboundEmail
+
+TOKEN_MODELS = (EmailVerificationToken, EmailChangeToken, PasswordResetToken)
+
+
+class SendGridBackend:
+    """Delivers through the SendGrid API with one long-lived client"""
+
+    def __init__(self, api_key):
+        self.client = SendGridAPIClient(api_key)
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send(self, from_email, from_name, email):
+        # Use HTML content as primary, fallback to text
+        if email.text_content:
+            mail = Mail(From(from_email, from_name), To(email.to_email), Subject(email.subject),
+                        Content("text/plain", email.text_content))
+            mail.add_content(Content("text/html", email.html_content))
+        else:
+            mail = Mail(From(from_email, from_name), To(email.to_email), Subject(email.subject),
+                        Content("text/html", email.html_content))
+
+        response = self.client.send(mail)
+        if response.status_code not in (200, 201, 202):
+            raise RuntimeError(f"SendGrid returned {response.status_code}")
+
+
+def build_mime_message(from_email, from_name, email):
+    """Multipart text/HTML message for the SMTP and file backends"""
+    message = EmailMessage()
+    message['From'] = formataddr((from_name, from_email))
+    message['To'] = email.to_email
+    message['Subject'] = email.subject
+    message.set_content(email.text_content or '')
+    message.add_alternative(email.html_content, subtype='html')
+    return message
+
+
+class SMTPBackend:
+    """Delivers over SMTP, reusing one connection for a whole batch"""
+
+    def __init__(self, host, port, use_tls, username=None, password=None):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.connection = None
+
+    def open(self):
+        self.connection = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            self.connection.starttls()
+        if self.username:
+            self.connection.login(self.username, self.password)
+
+    def close(self):
+        if self.connection:
+            try:
+                self.connection.quit()
+            except smtplib.SMTPException:
+                pass
+            self.connection = None
+
+    def send(self, from_email, from_name, email):
+        self.connection.send_message(build_mime_message(from_email, from_name, email))
+
+
+class FileBackend:
+    """Writes each email to <directory>/<id>.eml instead of sending it (local development and tests)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    def close(self):
+        pass
+
+    def send(self, from_email, from_name, email):
+        with open(os.path.join(self.directory, f'{email.id}.eml'), 'wb') as f:
+            f.write(bytes(build_mime_message(from_email, from_name, email)))
+
 
 class EmailService:
-    """Handles all email operations using SendGrid"""
+    """Queues emails and delivers them in batches with exponential-backoff retries"""
     
     def __init__(self):
-        self.client = None
+        self.app = None
+        self.backend = None
         self.from_email = None
         self.from_name = None
+        self.delivery_interval = 5.0
+        self.batch_size = 50
+        self.max_attempts = 6
+        self.retry_base_seconds = 30
+        self.stale_after = 600
+        self.token_retention = timedelta(hours=24)
+        self.token_reap_interval = 3600
+        self.token_reap_chunk_size = 1000
+        self._last_token_reap = 0
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
         
     def init_app(self, app):
-        """Initialize email service with Flask app config"""        
-        api_key = app.config.get('SENDGRID_API_KEY')
+        """Initialize email service with Flask app config and start the delivery thread"""        
+        self.app = app
         self.from_email = app.config.get('SENDGRID_FROM_EMAIL', 'noreply@steam-achievement-tracker.zstall.com')
         self.from_name = app.config.get('SENDGRID_FROM_NAME', 'Steam Achievement Tracker')
+        self.delivery_interval = float(app.config.get('EMAIL_DELIVERY_INTERVAL', self.delivery_interval))
+        self.batch_size = int(app.config.get('EMAIL_BATCH_SIZE', self.batch_size))
+        self.max_attempts = int(app.config.get('EMAIL_MAX_ATTEMPTS', self.max_attempts))
+        self.retry_base_seconds = int(app.config.get('EMAIL_RETRY_BASE_SECONDS', self.retry_base_seconds))
+        self.token_retention = timedelta(hours=float(app.config.get('TOKEN_RETENTION_HOURS', 24)))
+        self.token_reap_interval = int(app.config.get('TOKEN_REAP_INTERVAL', self.token_reap_interval))
+        
+        # Explicit EMAIL_BACKEND wins; otherwise use whichever provider is configured
+        backend = app.config.get('EMAIL_BACKEND')
+        if not backend:
+            if app.config.get('SENDGRID_API_KEY'):
+                backend = 'sendgrid'
+            elif app.config.get('MAIL_SERVER'):
+                backend = 'smtp'
+            elif app.config.get('EMAIL_FILE_DIR'):
+                backend = 'file'
         
-        if api_key:
-            try:
-                self.client = SendGridAPIClient(api_key)
+        try:
+            if backend == 'sendgrid':
+                self.backend = SendGridBackend(app.config.get('SENDGRID_API_KEY'))
                 print("✅ SendGrid email service initialized successfully")
                 print(f"✅ Using from email: {self.from_email}")
-            except Exception as e:
-                print(f"❌ Failed to initialize SendGrid: {e}")
-                self.client = None
-        else:
-            print("⚠️  SendGrid API key not found - email service disabled")
-            print(f"🔍 Available env vars starting with SEND: {[k for k in os.environ.keys() if k.startswith('SEND')]}")
+            elif backend == 'smtp':
+                self.backend = SMTPBackend(
+                    app.config.get('MAIL_SERVER'),
+                    app.config.get('MAIL_PORT', 587),
+                    app.config.get('MAIL_USE_TLS', True),
+                    app.config.get('MAIL_USERNAME'),
+                    app.config.get('MAIL_PASSWORD')
+                )
+                print(f"✅ SMTP email service initialized ({app.config.get('MAIL_SERVER')})")
+            elif backend == 'file':
+                self.backend = FileBackend(app.config.get('EMAIL_FILE_DIR') or 'outbox')
+                print(f"✅ File email sink initialized ({self.backend.directory})")
+            else:
+                print("⚠️  SendGrid API key not found - email service disabled")
+                print(f"🔍 Available env vars starting with SEND: {[k for k in os.environ.keys() if k.startswith('SEND')]}")
+        except Exception as e:
+            print(f"❌ Failed to initialize email backend: {e}")
+            self.backend = None
+        
+        if self.backend and self.delivery_interval > 0 and not self._thread:
+            self._thread = threading.Thread(target=self._delivery_loop, name='email-delivery', daemon=True)
+            self._thread.start()
+            atexit.register(self._stopping.set)
     
     def _send_email(self, to_email, subject, html_content, text_content=None):
-        """Send an email using SendGrid"""
-        if not self.client:
+        """Queue an email for background delivery (commits); returns False if email is disabled"""
+        if not self.backend:
             print("❌ Email service not initialized")
             return False
         
         try:
-            # Create email
-            from_addr = From(self.from_email, self.from_name)
-            to_addr = To(to_email)
-            subject_obj = Subject(subject)
-            
-            # Use HTML content as primary, fallback to text
-            if text_content:
-                content = Content("text/plain", text_content)
-                html_content_obj = Content("text/html", html_content)
-                mail = Mail(from_addr, to_addr, subject_obj, content)
-                mail.add_content(html_content_obj)
-            else:
-                content = Content("text/html", html_content)
-                mail = Mail(from_addr, to_addr, subject_obj, content)
-            
-            # Send email
-            response = self.client.send(mail)
-            
-            if response.status_code in [200, 201, 202]:
-                print(f"✅ Email sent to {to_email}: {subject}")
-                return True
-            else:
-                print(f"❌ Failed to send email to {to_email}: {response.status_code}")
-                return False
-                
+            db.session.add(OutboundEmail(
+                to_email=to_email,
+                subject=subject,
+                html_content=html_content,
+                text_content=text_content
+            ))
+            db.session.commit()
         except Exception as e:
-            print(f"❌ Error sending email to {to_email}: {e}")
+            db.session.rollback()
+            print(f"❌ Error queueing email to {to_email}: {e}")
             return False
+        
+        # Deliver promptly instead of waiting for the next poll
+        self._wakeup.set()
+        print(f"📨 Email queued for {to_email}: {subject}")
+        return True
+    
+    def _requeue_stale(self):
+        """Return emails whose delivery worker died mid-batch"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        OutboundEmail.query.filter(
+            OutboundEmail.status == 'sending',
+            OutboundEmail.claimed_at < cutoff
+        ).update({'status': 'queued'}, synchronize_session=False)
+        db.session.commit()
+    
+    def _claim_batch(self):
+        """
+        Claim due emails for this worker
+        Uses SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL so concurrent workers never send the same email
+        """
+        now = datetime.utcnow()
+        batch = OutboundEmail.query.filter(
+            OutboundEmail.status == 'queued',
+            OutboundEmail.next_attempt_at <= now
+        ).order_by(OutboundEmail.next_attempt_at, OutboundEmail.id)\
+            .with_for_update(skip_locked=True)\
+            .limit(self.batch_size).all()
+        
+        for email in batch:
+            email.status = 'sending'
+            email.claimed_at = now
+        db.session.commit()
+        return batch
+    
+    def retry_delay(self, attempts):
+        """Exponential backoff: base, 2x base, 4x base, ... capped at six hours"""
+        return timedelta(seconds=min(self.retry_base_seconds * 2 ** (attempts - 1), 6 * 3600))
+    
+    def deliver_pending(self):
+        """
+        Deliver one batch of due emails over a single backend connection (requires an app context)
+        Returns the number of emails sent
+        """
+        if not self.backend:
+            return 0
+        
+        self._requeue_stale()
+        batch = self._claim_batch()
+        if not batch:
+            return 0
+        
+        sent = 0
+        try:
+            self.backend.open()
+            connection_error = None
+        except Exception as e:
+            connection_error = e
+        
+        for email in batch:
+            email.attempts += 1
+            try:
+                if connection_error:
+                    raise connection_error
+                self.backend.send(self.from_email, self.from_name, email)
+                email.status = 'sent'
+                email.sent_at = datetime.utcnow()
+                email.last_error = None
+                sent += 1
+                print(f"✅ Email sent to {email.to_email}: {email.subject}")
+            except Exception as e:
+                email.last_error = str(e)
+                if email.attempts >= self.max_attempts:
+                    email.status = 'dead'
+                    print(f"💀 Giving up on email {email.id} to {email.to_email} after {email.attempts} attempts: {e}")
+                else:
+                    email.status = 'queued'
+                    email.next_attempt_at = datetime.utcnow() + self.retry_delay(email.attempts)
+                    print(f"⚠️  Email {email.id} to {email.to_email} failed, retrying at {email.next_attempt_at}: {e}")
+        
+        if not connection_error:
+            self.backend.close()
+        db.session.commit()
+        return sent
+    
+    def reap_expired_tokens(self):
+        """
+        Delete verification, email change and reset tokens that expired or were used more than
+        TOKEN_RETENTION_HOURS ago, in chunks so no single statement holds locks for long (commits)
+        Returns the number of tokens deleted
+        """
+        cutoff = datetime.utcnow() - self.token_retention
+        reaped = 0
+        
+        for model in TOKEN_MODELS:
+            # Both branches are served by the expires_at and is_used indexes
+            dead = db.or_(
+                model.expires_at < cutoff,
+                db.and_(model.is_used == True, model.used_at < cutoff)
+            )
+            while True:
+                ids = [token_id for (token_id,) in
+                       db.session.query(model.id).filter(dead).limit(self.token_reap_chunk_size)]
+                if not ids:
+                    break
+                
+                model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+                db.session.commit()
+                reaped += len(ids)
+                
+                if len(ids) < self.token_reap_chunk_size:
+                    break
+        
+        if reaped:
+            print(f"🧹 Reaped {reaped} expired or used email tokens")
+        return reaped
+    
+    def _delivery_loop(self):
+        """Deliver batches until stopped; a full batch is followed immediately by the next one"""
+        while not self._stopping.is_set():
+            delivered_full_batch = False
+            try:
+                with self.app.app_context():
+                    if self.token_reap_interval > 0 and time.monotonic() - self._last_token_reap > self.token_reap_interval:
+                        self._last_token_reap = time.monotonic()
+                        self.reap_expired_tokens()
+                    delivered_full_batch = self.deliver_pending() >= self.batch_size
+            except Exception as e:
+                print(f"⚠️  Email delivery thread error: {e}")
+            
+            if not delivered_full_batch:
+                self._wakeup.wait(self.delivery_interval)
+                self._wakeup.clear()
     
     def generate_verification_token(self, user):
         """Generate and store email verification token"""
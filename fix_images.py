@@ -6,7 +6,8 @@ Fix broken achievement image references
 import os
 from flask import Flask
 from config import config
-from models import db, CustomAchievement, AchievementImage
+from models import db, CustomAchievement, AchievementImage, adjust_image_refs
+from s3_manager import derivative_paths
 
 def fix_image_references():
     """Fix broken image references by checking what files actually exist"""
@@ -43,10 +44,13 @@ def fix_image_references():
                 print(f"\n🎯 Achievement: '{achievement.name}'")
                 print(f"   📄 Database filename: {achievement.image_filename}")
                 
-                if achievement.image_filename in existing_files:
+                # Derivative images are a directory of sizes; every one of them must be present
+                paths = derivative_paths(achievement.image_filename)
+                if all(os.path.exists(os.path.join(image_dir, path)) for path in paths):
                     print("   ✅ File exists - no fix needed")
                 else:
                     print("   ❌ File missing - removing reference")
+                    adjust_image_refs(achievement.image_filename, -1)
                     achievement.image_filename = None
                     removed_count += 1
             
@@ -0,0 +1,119 @@
+"""
+Game metadata cache for resolving Steam app ids to names
+Combines a per-request identity map with a bounded, TTL'd LRU shared by every request in a worker
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, has_app_context
+
+from models import db, Game
+
+
+class GameCache:
+    """Caches Game id/name lookups by Steam app id"""
+
+    def __init__(self):
+        self.max_entries = 10000
+        self.ttl_seconds = 3600
+        self._entries = OrderedDict()  # steam_app_id -> (expires_at, game dict)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Initialize game cache with Flask app config"""
+        self.max_entries = int(app.config.get('GAME_CACHE_MAX_ENTRIES', self.max_entries))
+        self.ttl_seconds = int(app.config.get('GAME_CACHE_TTL_SECONDS', self.ttl_seconds))
+
+    def _request_map(self):
+        """Identity map for the current request/app context, or None outside of one"""
+        if not has_app_context():
+            return None
+        if '_game_cache' not in g:
+            g._game_cache = {}
+        return g._game_cache
+
+    def _remember(self, games):
+        """Store looked-up games in the shared LRU, evicting the least recently used"""
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for appid, game in games.items():
+                self._entries[appid] = (expires_at, game)
+                self._entries.move_to_end(appid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_many(self, appids):
+        """
+        Look up many games at once, costing at most one query
+        Returns {steam_app_id: {'id', 'steam_app_id', 'name'}} for games that exist
+        """
+        appids = {str(appid) for appid in appids}
+        request_map = self._request_map()
+        found = {}
+
+        if request_map is not None:
+            found.update({appid: request_map[appid] for appid in appids if appid in request_map})
+
+        missing = appids - set(found)
+        if missing:
+            now = time.monotonic()
+            with self._lock:
+                for appid in missing:
+                    entry = self._entries.get(appid)
+                    if not entry:
+                        continue
+                    if entry[0] < now:
+                        del self._entries[appid]
+                        continue
+                    self._entries.move_to_end(appid)
+                    found[appid] = entry[1]
+
+        missing = appids - set(found)
+        if missing:
+            loaded = {
+                row.steam_app_id: {'id': row.id, 'steam_app_id': row.steam_app_id, 'name': row.name}
+                for row in db.session.query(Game.id, Game.steam_app_id, Game.name)
+                .filter(Game.steam_app_id.in_(missing))
+            }
+            self._remember(loaded)
+            found.update(loaded)
+
+        if request_map is not None:
+            request_map.update(found)
+
+        return found
+
+    def get(self, appid):
+        """Look up a single game, or None if it is unknown"""
+        return self.get_many([appid]).get(str(appid))
+
+    def get_names(self, appids):
+        """Map app ids to display names, falling back to "App <id>" for unknown games"""
+        games = self.get_many(appids)
+        return {
+            str(appid): games[str(appid)]['name'] if str(appid) in games else f"App {appid}"
+            for appid in appids
+        }
+
+    def invalidate(self, appids=None):
+        """Drop cached entries after game rows change (all entries when appids is None)"""
+        request_map = self._request_map()
+
+        with self._lock:
+            if appids is None:
+                self._entries.clear()
+            else:
+                for appid in appids:
+                    self._entries.pop(str(appid), None)
+
+        if request_map is not None:
+            if appids is None:
+                request_map.clear()
+            else:
+                for appid in appids:
+                    request_map.pop(str(appid), None)
+
+# Global instance
+game_cache = GameCache()
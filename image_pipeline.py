@@ -0,0 +1,242 @@
+"""
+Off-request processing for uploaded achievement images
+Requests only spool the upload and queue a job; a job worker hands decoding, resizing and
+encoding to a process pool (outside the GIL and the request threads) and then pushes the
+derivatives to storage
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+from sqlalchemy.exc import IntegrityError
+
+from models import db, AchievementImage, adjust_image_refs
+from s3_manager import (
+    s3_manager, build_image_derivatives, image_has_alpha, parse_derivative_filename, content_image_stem,
+    DERIVATIVE_PREFIX, FORMAT_CONTENT_TYPES
+)
+from job_queue import job_queue, RetryJob
+
+IMAGE_JOB_TYPE = 'image_process'
+SPOOL_CHUNK_SIZE = 64 * 1024
+
+
+def build_derivatives_from_spool(spool_path):
+    """Process pool entry point: read a spooled upload and encode its derivatives"""
+    with open(spool_path, 'rb') as f:
+        return build_image_derivatives(f.read())
+
+
+class ImagePipeline:
+    """Spools uploads in the request and processes them on background workers"""
+
+    def __init__(self):
+        self.spool_folder = 'image_spool'
+        self.process_workers = 2
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Initialize image pipeline with Flask app config"""
+        self.spool_folder = app.config.get('IMAGE_SPOOL_FOLDER', self.spool_folder)
+        self.process_workers = int(app.config.get('IMAGE_PROCESS_WORKERS', self.process_workers))
+        job_queue.register(IMAGE_JOB_TYPE, self.run_job)
+
+    @staticmethod
+    def _spool_name(stem):
+        return f'{os.path.basename(stem)}.upload'
+
+    def _spool_path(self, stem):
+        return os.path.join(self.spool_folder, self._spool_name(stem))
+
+    def _store_spool(self, incoming_path, stem):
+        """
+        Keep an upload until its job runs; with S3 it goes to the bucket, since worker.py may run on
+        another host, otherwise to IMAGE_SPOOL_FOLDER
+        """
+        os.replace(incoming_path, self._spool_path(stem))
+        if s3_manager.use_s3:
+            s3_manager.put_spool(self._spool_name(stem), self._spool_path(stem))
+
+    def _load_spool(self, stem):
+        """Local path of a spooled upload, downloading it from the bucket when needed"""
+        spool_path = self._spool_path(stem)
+        if s3_manager.use_s3 and not os.path.exists(spool_path):
+            os.makedirs(self.spool_folder, exist_ok=True)
+            s3_manager.fetch_spool(self._spool_name(stem), spool_path)
+        elif not os.path.exists(spool_path):
+            raise FileNotFoundError(f"Spooled upload {spool_path} not found")
+        return spool_path
+
+    def accept_upload(self, file, user_id):
+        """
+        Spool an uploaded image and take a reference to it (the caller commits, then calls enqueue)
+        Images are content-addressed, so an upload whose bytes are already stored or queued reuses
+        that image instead of being processed again
+        Returns (achievement_image, needs_processing)
+        """
+        os.makedirs(self.spool_folder, exist_ok=True)
+        incoming_path = os.path.join(self.spool_folder, f'incoming_{uuid.uuid4().hex}.upload')
+
+        # Hash while spooling so the upload is only read once
+        content_hash = hashlib.sha256()
+        with open(incoming_path, 'wb') as spool_file:
+            for chunk in iter(lambda: file.stream.read(SPOOL_CHUNK_SIZE), b''):
+                content_hash.update(chunk)
+                spool_file.write(chunk)
+
+        try:
+            # Opening is lazy: this validates the format and reads the mode without decoding pixels
+            with Image.open(incoming_path) as image:
+                fallback = 'png' if image_has_alpha(image) else 'jpg'
+        except Exception:
+            os.remove(incoming_path)
+            raise ValueError('Uploaded file is not a supported image')
+
+        stem = content_image_stem(content_hash.hexdigest())
+        filename = f"{DERIVATIVE_PREFIX}{stem}.{fallback}"
+
+        # Locked so the orphan collector cannot delete the files of a row this upload revives;
+        # a row it is deleting right now is waited for and then treated as gone
+        achievement_image = AchievementImage.query.filter_by(filename=filename).with_for_update().first()
+        if not achievement_image:
+            try:
+                with db.session.begin_nested():
+                    achievement_image = AchievementImage(
+                        filename=filename,
+                        original_filename=file.filename,
+                        file_size=os.path.getsize(incoming_path),
+                        mime_type=FORMAT_CONTENT_TYPES[fallback],
+                        status='pending',
+                        ref_count=1,
+                        uploaded_by=user_id
+                    )
+                    db.session.add(achievement_image)
+                    db.session.flush()
+                    # Inside the savepoint, so a storage error also drops the new row
+                    self._store_spool(incoming_path, stem)
+            except IntegrityError:
+                # A concurrent upload of the same bytes created the row first
+                achievement_image = AchievementImage.query.filter_by(filename=filename).first()
+            else:
+                return achievement_image, True
+
+        if achievement_image.status in ('failed', 'deleting'):
+            # Rebuild an image that failed earlier or is being garbage collected from this copy of the bytes;
+            # spooled before the reference is taken so a storage error leaves the row as it was
+            self._store_spool(incoming_path, stem)
+            adjust_image_refs(filename, 1)
+            achievement_image.status = 'pending'
+            return achievement_image, True
+
+        adjust_image_refs(filename, 1)
+        os.remove(incoming_path)
+        return achievement_image, False
+
+    def enqueue(self, achievement_image):
+        """Queue processing for a committed pending image"""
+        return job_queue.enqueue(
+            achievement_image.uploaded_by,
+            IMAGE_JOB_TYPE,
+            payload={'image_id': achievement_image.id, 'filename': achievement_image.filename},
+            unique=False
+        )
+
+    def _build(self, spool_path):
+        """Encode derivatives in the process pool, or inline when IMAGE_PROCESS_WORKERS is 0"""
+        if self.process_workers <= 0:
+            return build_derivatives_from_spool(spool_path)
+
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.process_workers)
+            pool = self._pool
+        try:
+            return pool.submit(build_derivatives_from_spool, spool_path).result()
+        except BrokenProcessPool:
+            # A worker process died (e.g. killed for memory); start a fresh pool for the retry
+            with self._pool_lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False)
+            raise
+
+    def run_job(self, job):
+        """Background job handler that turns a spooled upload into stored derivatives"""
+        payload = job.payload or {}
+        achievement_image = AchievementImage.query.get(payload.get('image_id'))
+        if not achievement_image:
+            # The achievement was deleted before its image was processed
+            self._discard_spool(payload.get('filename'))
+            return 'Image was deleted before processing'
+        if achievement_image.status != 'pending':
+            return 'Image already processed'
+
+        stem, _ = parse_derivative_filename(achievement_image.filename)
+        try:
+            spool_path = self._load_spool(stem)
+        except FileNotFoundError:
+            self._mark_failed(achievement_image)
+            raise
+        except Exception as e:
+            self._retry_or_fail(job, achievement_image, e)
+
+        try:
+            derivatives = self._build(spool_path)
+        except BrokenProcessPool as e:
+            self._retry_or_fail(job, achievement_image, e)
+        except Exception:
+            # The upload cannot be decoded, so retrying cannot help
+            self._mark_failed(achievement_image)
+            raise
+
+        try:
+            stored = s3_manager.save_derivatives(stem, derivatives)
+        except Exception as e:
+            self._retry_or_fail(job, achievement_image, e)
+
+        achievement_image.status = 'ready'
+        achievement_image.file_size = stored['file_size']
+        achievement_image.placeholder = stored['placeholder']
+        achievement_image.variants = stored['sizes']
+        db.session.commit()
+
+        self._discard_spool(achievement_image.filename)
+        return f"Processed image {achievement_image.filename}"
+
+    def _retry_or_fail(self, job, achievement_image, error):
+        """Keep the image pending and its spool file for another attempt, until the job runs out of them"""
+        if job.attempts >= job_queue.max_attempts:
+            self._mark_failed(achievement_image)
+        raise RetryJob(f"Image {achievement_image.filename} not stored: {error}") from error
+
+    def _mark_failed(self, achievement_image):
+        """
+        Give up on an image; pages show the default icon for it, and the achievements keep their
+        reference so uploading the same image again rebuilds it
+        """
+        db.session.rollback()
+        achievement_image.status = 'failed'
+        db.session.commit()
+        self._discard_spool(achievement_image.filename)
+
+    def _discard_spool(self, filename):
+        """Remove the spooled upload for an image filename, if it is still there"""
+        parsed = parse_derivative_filename(filename)
+        if not parsed:
+            return
+        if os.path.exists(self._spool_path(parsed[0])):
+            os.remove(self._spool_path(parsed[0]))
+        if s3_manager.use_s3:
+            try:
+                s3_manager.delete_spool(self._spool_name(parsed[0]))
+            except Exception as e:
+                print(f"⚠️  Could not remove spooled upload {parsed[0]}: {e}")
+
+# Global instance
+image_pipeline = ImagePipeline()
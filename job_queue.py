@@ -0,0 +1,233 @@
+"""
+Database-backed background job queue for long-running work such as Steam refreshes
+"""
+
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from models import db, SyncJob
+
+
+class RetryJob(Exception):
+    """Raised by a handler whose job failed for a passing reason; the job is queued again until max_attempts"""
+
+
+class JobQueue:
+    """Queues jobs in the sync_jobs table and runs them on local worker threads"""
+
+    def __init__(self):
+        self.app = None
+        self.handlers = {}
+        self.worker_threads = 2
+        self.poll_interval = 2.0
+        self.stale_after = 600
+        self.max_attempts = 3
+        self._last_stale_check = 0
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._claim_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Initialize job queue with Flask app config and start local workers"""
+        self.app = app
+        self.worker_threads = int(app.config.get('JOB_WORKER_THREADS', self.worker_threads))
+        self.poll_interval = float(app.config.get('JOB_POLL_INTERVAL', self.poll_interval))
+        self.stale_after = int(app.config.get('JOB_STALE_SECONDS', self.stale_after))
+        self.max_attempts = max(1, int(app.config.get('JOB_MAX_ATTEMPTS', self.max_attempts)))
+
+        if self.worker_threads > 0 and not self._threads:
+            self.start(self.worker_threads)
+
+    def register(self, job_type, handler):
+        """Register the function that runs jobs of a given type"""
+        self.handlers[job_type] = handler
+
+    def enqueue(self, user_id, job_type, payload=None, unique=True):
+        """
+        Queue a job for a user
+        When unique, returns the already queued/running job of the same type if there is one
+        """
+        if unique:
+            existing = SyncJob.query.filter(
+                SyncJob.user_id == user_id,
+                SyncJob.job_type == job_type,
+                SyncJob.status.in_(['queued', 'running'])
+            ).order_by(SyncJob.created_at.desc()).first()
+
+            if existing:
+                return existing
+
+        job = SyncJob(
+            user_id=user_id,
+            job_type=job_type,
+            payload=payload or {},
+            status='queued'
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        # Wake an idle local worker instead of waiting for the next poll
+        self._wakeup.set()
+        return job
+
+    def _requeue_stale_jobs(self):
+        """
+        Return jobs whose worker stopped sending heartbeats to the queue
+        A job that has already used max_attempts is failed instead, so one that kills its worker
+        (e.g. running out of memory) is not retried forever
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        stale = SyncJob.query.filter(
+            SyncJob.status == 'running',
+            db.func.coalesce(SyncJob.heartbeat_at, SyncJob.started_at) < cutoff
+        )
+
+        failed = stale.filter(SyncJob.attempts >= self.max_attempts).update({
+            'status': 'failed',
+            'worker_id': None,
+            'error': f'Worker stopped responding on each of {self.max_attempts} attempts',
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        requeued = stale.filter(SyncJob.attempts < self.max_attempts)\
+            .update({'status': 'queued', 'worker_id': None}, synchronize_session=False)
+
+        if requeued:
+            print(f"♻️  Re-queued {requeued} stale background jobs")
+        if failed:
+            print(f"❌ Failed {failed} stale background jobs that ran out of attempts")
+        db.session.commit()
+
+    def _claim_next_job(self, worker_id):
+        """
+        Claim the oldest queued job
+        Uses SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL so concurrent workers never block each other
+        """
+        if not self.handlers:
+            return None
+
+        with self._claim_lock:
+            # Only claim job types this process knows how to run
+            job = SyncJob.query.filter(
+                SyncJob.status == 'queued',
+                SyncJob.job_type.in_(list(self.handlers))
+            ).order_by(SyncJob.created_at, SyncJob.id)\
+                .with_for_update(skip_locked=True)\
+                .first()
+
+            if not job:
+                db.session.commit()
+                return None
+
+            now = datetime.utcnow()
+            claimed = SyncJob.query.filter_by(id=job.id, status='queued').update({
+                'status': 'running',
+                'worker_id': worker_id,
+                'attempts': SyncJob.attempts + 1,
+                'started_at': now,
+                'heartbeat_at': now
+            }, synchronize_session=False)
+            db.session.commit()
+
+            if not claimed:
+                return None
+
+            db.session.refresh(job)
+            return job
+
+    def _finish_job(self, job, status, message=None, error=None):
+        """Record the outcome of a job"""
+        job.status = status
+        job.message = message
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def run_next_job(self, worker_id=None):
+        """
+        Claim and run a single queued job (requires an app context)
+        Returns the finished job, or None if the queue was empty
+        """
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        job = self._claim_next_job(worker_id)
+        if not job:
+            return None
+
+        handler = self.handlers[job.job_type]
+        print(f"🛠️  Running job {job.id} ({job.job_type}) for user {job.user_id}")
+        try:
+            message = handler(job)
+            self._finish_job(job, 'completed', message=message)
+            print(f"✅ Job {job.id} completed")
+        except RetryJob as e:
+            db.session.rollback()
+            if job.attempts >= self.max_attempts:
+                self._finish_job(job, 'failed', error=str(e))
+                print(f"❌ Job {job.id} failed after {job.attempts} attempts: {e}")
+            else:
+                # Back of the queue, so other work runs before the retry
+                job.status = 'queued'
+                job.worker_id = None
+                job.error = str(e)
+                job.created_at = datetime.utcnow()
+                db.session.commit()
+                print(f"🔁 Job {job.id} will be retried: {e}")
+        except Exception as e:
+            db.session.rollback()
+            self._finish_job(job, 'failed', error=str(e))
+            print(f"❌ Job {job.id} failed: {e}")
+
+        return job
+
+    def _worker_loop(self, worker_number):
+        """Poll for jobs until the queue is stopped"""
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{worker_number}"
+
+        while not self._stopping.is_set():
+            ran_job = None
+            try:
+                with self.app.app_context():
+                    if worker_number == 0 and time.monotonic() - self._last_stale_check > 60:
+                        self._last_stale_check = time.monotonic()
+                        self._requeue_stale_jobs()
+                    ran_job = self.run_next_job(worker_id)
+            except Exception as e:
+                print(f"⚠️  Job worker {worker_id} error: {e}")
+
+            if not ran_job:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def start(self, worker_threads):
+        """Start local worker threads"""
+        for worker_number in range(worker_threads):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(worker_number,),
+                name=f'job-worker-{worker_number}',
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        print(f"✅ Started {worker_threads} background job workers")
+
+    def stop(self):
+        """Ask local worker threads to exit after their current job"""
+        self._stopping.set()
+        self._wakeup.set()
+
+    def work_forever(self, worker_threads):
+        """Run workers in the foreground (used by the standalone worker process)"""
+        if not self._threads:
+            self.start(worker_threads)
+        try:
+            while any(thread.is_alive() for thread in self._threads):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stop()
+
+# Global instance
+job_queue = JobQueue()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Add derivative, processing-status and reference-count columns to achievement_images and convert
+legacy single-file images into content-addressed thumb/card/full WebP + JPEG/PNG derivative sets
+Safe to re-run: images that already use the derivative layout are skipped, and the
+original files are left in place (collect_orphan_images.py does not touch them)
+"""
+
+import hashlib
+import os
+from flask import Flask
+from config import config
+from models import db, CustomAchievement, SharedAchievement, AchievementImage, recount_image_refs
+from s3_manager import s3_manager, parse_derivative_filename, content_image_stem
+
+def add_image_derivative_columns():
+    """Add status, ref_count, placeholder and variants columns to achievement_images tables created before they existed"""
+    existing_columns = {col['name'] for col in db.inspect(db.engine).get_columns('achievement_images')}
+
+    for column, column_type in (
+        ('status', "VARCHAR(20) NOT NULL DEFAULT 'ready'"),
+        ('ref_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('placeholder', 'TEXT'),
+        ('variants', 'JSON'),
+    ):
+        if column in existing_columns:
+            continue
+
+        db.session.execute(db.text(f'ALTER TABLE achievement_images ADD COLUMN {column} {column_type}'))
+        print(f"✅ Added column {column}")
+
+    db.session.commit()
+
+def legacy_image_filenames():
+    """Every distinct image filename still stored as a single flat file"""
+    filenames = set()
+    for column in (CustomAchievement.image_filename, SharedAchievement.image_filename, AchievementImage.filename):
+        filenames.update(
+            filename for (filename,) in db.session.query(column).filter(column.isnot(None)).distinct()
+        )
+    return sorted(filename for filename in filenames if not parse_derivative_filename(filename))
+
+def migrate_image_derivatives():
+    """Generate derivatives for every legacy image and repoint references to them"""
+    print("🖼️  Migrating achievement images to derivative sets...")
+
+    # Create Flask app
+    app = Flask(__name__)
+    config_name = os.environ.get('FLASK_ENV', 'development')
+    app.config.from_object(config[config_name])
+    db.init_app(app)
+    s3_manager.init_app(app)
+
+    with app.app_context():
+        try:
+            add_image_derivative_columns()
+
+            converted = 0
+            failed = 0
+            for legacy_filename in legacy_image_filenames():
+                try:
+                    image_bytes = s3_manager.read_image(legacy_filename)
+                    stored = s3_manager.store_derivatives(
+                        image_bytes,
+                        content_image_stem(hashlib.sha256(image_bytes).hexdigest())
+                    )
+                except Exception as e:
+                    print(f"⚠️  Skipping {legacy_filename}: {e}")
+                    failed += 1
+                    continue
+
+                new_filename = stored['filename']
+                CustomAchievement.query.filter_by(image_filename=legacy_filename)\
+                    .update({'image_filename': new_filename}, synchronize_session=False)
+                SharedAchievement.query.filter_by(image_filename=legacy_filename)\
+                    .update({'image_filename': new_filename}, synchronize_session=False)
+
+                # Identical legacy files collapse into one content-addressed image row
+                if AchievementImage.query.filter_by(filename=new_filename).first():
+                    AchievementImage.query.filter_by(filename=legacy_filename).delete(synchronize_session=False)
+                else:
+                    AchievementImage.query.filter_by(filename=legacy_filename).update({
+                        'filename': new_filename,
+                        'file_size': stored['file_size'],
+                        'mime_type': stored['mime_type'],
+                        'placeholder': stored['placeholder'],
+                        'variants': stored['sizes'],
+                    }, synchronize_session=False)
+                db.session.commit()
+                converted += 1
+
+            recount_image_refs()
+            db.session.commit()
+
+            print(f"✅ Converted {converted} images ({failed} skipped)")
+            print("✅ Recounted image references")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error migrating images: {e}")
+            return False
+
+if __name__ == '__main__':
+    migrate_image_derivatives()
@@ -2,7 +2,11 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
 from sqlalchemy import JSON
+from sqlalchemy.exc import IntegrityError
+from datetime import timedelta
+import base64
 import json
+import zlib
 
 db = SQLAlchemy()
 
@@ -71,6 +75,51 @@ class Game(db.Model):
         }
 
 
+class GameSchemaCache(db.Model):
+    """GetSchemaForGame achievement schema shared by every user who owns the game"""
+    __tablename__ = 'game_schema_cache'
+    
+    steam_app_id = db.Column(db.String(20), primary_key=True)
+    
+    # zlib-compressed JSON list of schema achievements
+    schema_blob = db.Column(db.LargeBinary, nullable=False)
+    achievement_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # HTTP validators for conditional revalidation
+    etag = db.Column(db.String(255), nullable=True)
+    last_modified = db.Column(db.String(64), nullable=True)
+    
+    # Cache lifetime
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<GameSchemaCache {self.steam_app_id}>'
+    
+    @property
+    def schema(self):
+        """Decompressed list of schema achievements"""
+        return json.loads(zlib.decompress(self.schema_blob).decode('utf-8'))
+    
+    @property
+    def is_fresh(self):
+        """Check if the cached schema is still within its TTL"""
+        return datetime.utcnow() < self.expires_at
+    
+    def update_schema(self, schema, ttl_hours, etag=None, last_modified=None):
+        """Store a freshly downloaded schema"""
+        self.schema_blob = zlib.compress(json.dumps(schema, separators=(',', ':')).encode('utf-8'))
+        self.achievement_count = len(schema)
+        self.etag = etag
+        self.last_modified = last_modified
+        self.mark_revalidated(ttl_hours)
+    
+    def mark_revalidated(self, ttl_hours):
+        """Extend the TTL after Steam confirmed the schema is unchanged"""
+        self.fetched_at = datetime.utcnow()
+        self.expires_at = self.fetched_at + timedelta(hours=ttl_hours)
+
+
 class UserGame(db.Model):
     """User's Steam library - games owned by user"""
     __tablename__ = 'user_games'
@@ -202,6 +251,97 @@ class CustomAchievement(db.Model):
         }
 
 
+class AchievementGame(db.Model):
+    """Games referenced by a custom or shared achievement's condition, normalized out of condition_data for indexed lookups"""
+    __tablename__ = 'achievement_games'
+
+    id = db.Column(db.Integer, primary_key=True)
+    custom_achievement_id = db.Column(db.Integer, db.ForeignKey('custom_achievements.id', ondelete='CASCADE'), nullable=True)
+    shared_achievement_id = db.Column(db.Integer, db.ForeignKey('shared_achievements.id', ondelete='CASCADE'), nullable=True)
+    steam_app_id = db.Column(db.String(20), nullable=False)
+
+    # Relationships
+    custom_achievement = db.relationship('CustomAchievement', backref=db.backref('game_links', cascade='all, delete-orphan', passive_deletes=True))
+    shared_achievement = db.relationship('SharedAchievement', backref=db.backref('game_links', cascade='all, delete-orphan', passive_deletes=True))
+
+    # Constraints
+    __table_args__ = (
+        db.UniqueConstraint('custom_achievement_id', 'steam_app_id', name='unique_custom_achievement_game'),
+        db.UniqueConstraint('shared_achievement_id', 'steam_app_id', name='unique_shared_achievement_game'),
+        db.CheckConstraint('(custom_achievement_id IS NULL) != (shared_achievement_id IS NULL)', name='one_achievement_per_link'),
+        db.Index('idx_achievement_games_custom_app', 'steam_app_id', 'custom_achievement_id'),
+        db.Index('idx_achievement_games_shared_app', 'steam_app_id', 'shared_achievement_id'),
+    )
+
+    def __repr__(self):
+        return f'<AchievementGame {self.custom_achievement_id or self.shared_achievement_id}:{self.steam_app_id}>'
+
+
+class CustomAchievementProgress(db.Model):
+    """Materialized completion state of a user's custom achievements, updated on sync and create/import"""
+    __tablename__ = 'custom_achievement_progress'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    custom_achievement_id = db.Column(db.Integer, db.ForeignKey('custom_achievements.id'), nullable=False)
+
+    # Evaluation results
+    progress = db.Column(db.Float, default=0, nullable=False)
+    completed = db.Column(db.Boolean, default=False, nullable=False)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    user = db.relationship('User', backref=db.backref('custom_achievement_progress', lazy='dynamic', cascade='all, delete-orphan'))
+    custom_achievement = db.relationship('CustomAchievement', backref=db.backref('progress_records', lazy='dynamic', cascade='all, delete-orphan'))
+
+    # Constraints
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'custom_achievement_id', name='unique_user_custom_progress'),
+        db.Index('idx_custom_progress_completed', 'user_id', 'completed'),
+    )
+
+    def __repr__(self):
+        return f'<CustomAchievementProgress {self.user_id}:{self.custom_achievement_id} {self.progress}%>'
+
+
+class UserStats(db.Model):
+    """Per-user summary kept up to date as it changes, so profiles and listings read one row instead of aggregating"""
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+
+    # Steam library, recomputed for the user after each sync
+    games_owned = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    perfect_games = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    achievements_unlocked = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    total_playtime_minutes = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
+    # Site activity, adjusted by the routes that change it
+    custom_achievements_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    shared_achievements_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    collections_joined = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    collections_completed = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    user = db.relationship('User', backref=db.backref('user_stats', uselist=False, cascade='all, delete-orphan', passive_deletes=True))
+
+    # Constraints
+    __table_args__ = (
+        db.Index('idx_user_stats_achievements', 'custom_achievements_count'),
+    )
+
+    def __repr__(self):
+        return f'<UserStats {self.user_id}>'
+
+    @property
+    def total_playtime_hours(self):
+        """Convert minutes to hours for display"""
+        return round(self.total_playtime_minutes / 60, 2) if self.total_playtime_minutes else 0
+
+
 class SharedAchievement(db.Model):
     """Community shared achievements"""
     __tablename__ = 'shared_achievements'
@@ -221,6 +361,10 @@ class SharedAchievement(db.Model):
     tries_count = db.Column(db.Integer, default=0, nullable=False)
     completions_count = db.Column(db.Integer, default=0, nullable=False)
     
+    # Rating aggregates, maintained alongside AchievementRating writes (see record_rating)
+    rating_sum = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    rating_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    
     # Metadata
     shared_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
@@ -231,14 +375,32 @@ class SharedAchievement(db.Model):
         return f'<SharedAchievement {self.creator.username}:{self.name}>'
     
     def increment_tries(self):
-        """Increment the tries counter"""
-        self.tries_count += 1
-        db.session.commit()
+        """Increment the tries counter (buffered, written on the next counter flush)"""
+        from counters import counters
+        counters.increment(self, 'tries_count')
     
     def increment_completions(self):
-        """Increment the completions counter"""
-        self.completions_count += 1
-        db.session.commit()
+        """Increment the completions counter (buffered, written on the next counter flush)"""
+        from counters import counters
+        counters.increment(self, 'completions_count')
+    
+    @property
+    def average_rating(self):
+        """Average star rating rounded for display"""
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
+    
+    def record_rating(self, rating, previous_rating=None):
+        """
+        Apply a new or changed rating to the aggregates with an atomic UPDATE
+        Call in the same transaction as the AchievementRating write (caller should commit)
+        """
+        SharedAchievement.query.filter_by(id=self.id).update({
+            'rating_sum': SharedAchievement.rating_sum + (rating - (previous_rating or 0)),
+            'rating_count': SharedAchievement.rating_count + (0 if previous_rating else 1)
+        }, synchronize_session=False)
+        db.session.expire(self, ['rating_sum', 'rating_count'])
     
     def to_dict(self):
         return {
@@ -251,6 +413,8 @@ class SharedAchievement(db.Model):
             'creator': self.creator.username,
             'tries_count': self.tries_count,
             'completions_count': self.completions_count,
+            'average_rating': self.average_rating,
+            'rating_count': self.rating_count,
             'shared_at': self.shared_at.isoformat() if self.shared_at else None
         }
 
@@ -265,6 +429,17 @@ class AchievementImage(db.Model):
     file_size = db.Column(db.Integer, nullable=True)
     mime_type = db.Column(db.String(50), nullable=True)
     
+    # 'pending' until the background worker has stored the derivatives, then 'ready' (or 'failed');
+    # 'deleting' while collect_orphan_images.py removes an unreferenced image
+    status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
+    
+    # Custom and shared achievements using this image; unreferenced images are removed by collect_orphan_images.py
+    ref_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    
+    # Derivatives: tiny inline data URI shown while loading, and {size: [width, height]}
+    placeholder = db.Column(db.Text, nullable=True)
+    variants = db.Column(db.JSON, nullable=True)
+    
     # Upload metadata
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -282,11 +457,44 @@ class AchievementImage(db.Model):
             'original_filename': self.original_filename,
             'file_size': self.file_size,
             'mime_type': self.mime_type,
+            'status': self.status,
+            'ref_count': self.ref_count,
+            'variants': self.variants,
             'uploaded_by': self.uploader.username,
             'uploaded_at': self.uploaded_at.isoformat() if self.uploaded_at else None
         }
 
 
+def adjust_image_refs(filename, delta):
+    """
+    Atomically add delta to an image's reference count when an achievement starts or stops using it
+    Legacy images without an AchievementImage row are ignored (caller should commit)
+    """
+    if not filename:
+        return
+
+    db.session.execute(
+        db.update(AchievementImage).where(AchievementImage.filename == filename)
+        .values(ref_count=AchievementImage.ref_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+def image_reference_counts():
+    """Correlated subquery counting the custom and shared achievements that use each AchievementImage"""
+    custom_refs = db.select(db.func.count()).where(CustomAchievement.image_filename == AchievementImage.filename)\
+        .correlate(AchievementImage).scalar_subquery()
+    shared_refs = db.select(db.func.count()).where(SharedAchievement.image_filename == AchievementImage.filename)\
+        .correlate(AchievementImage).scalar_subquery()
+    return custom_refs + shared_refs
+
+def recount_image_refs():
+    """Recompute every image's reference count from the achievements that use it (caller should commit)"""
+    return db.session.execute(
+        db.update(AchievementImage).values(ref_count=image_reference_counts())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
 # Database utility functions
 def init_db(app):
     """Initialize database with Flask app"""
@@ -306,20 +514,391 @@ def reset_db():
 
 def get_or_create_game(steam_app_id, name):
     """Get existing game or create new one"""
+    from game_cache import game_cache
+    from cache import cache
+    
     game = Game.query.filter_by(steam_app_id=steam_app_id).first()
     if not game:
         game = Game(steam_app_id=steam_app_id, name=name)
         db.session.add(game)
         db.session.commit()
+        game_cache.invalidate([steam_app_id])
+        cache.invalidate(f'game:{steam_app_id}')
     elif game.name != name:
         # Update game name if it changed
         game.name = name
         game.last_updated = datetime.utcnow()
         db.session.commit()
+        game_cache.invalidate([steam_app_id])
+        cache.invalidate(f'game:{steam_app_id}')
     
     return game
 
 
+def get_cached_schemas(steam_app_ids):
+    """Load cached game schemas for many games in one query"""
+    if not steam_app_ids:
+        return {}
+    
+    rows = GameSchemaCache.query.filter(GameSchemaCache.steam_app_id.in_(steam_app_ids)).all()
+    return {row.steam_app_id: row for row in rows}
+
+def upsert_game_schema(steam_app_id, schema, ttl_hours, etag=None, last_modified=None):
+    """
+    Store a downloaded schema for a game that had no cached row when the sync started
+    Another user's sync may insert the same game first, so this upserts instead of adding a row
+    """
+    row = GameSchemaCache(steam_app_id=steam_app_id)
+    row.update_schema(schema, ttl_hours, etag=etag, last_modified=last_modified)
+    values = {column.name: getattr(row, column.name) for column in GameSchemaCache.__table__.columns}
+
+    table = GameSchemaCache.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['steam_app_id'],
+            set_={name: stmt.excluded[name] for name in values if name != 'steam_app_id'}
+        )
+        db.session.execute(stmt)
+    else:
+        # Other databases: a savepoint keeps a duplicate key from rolling back the caller's batch
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert(), [values])
+        except IntegrityError:
+            db.session.execute(
+                table.update().where(table.c.steam_app_id == steam_app_id)
+                .values({name: value for name, value in values.items() if name != 'steam_app_id'})
+            )
+
+
+STEAM_ACHIEVEMENT_FIELDS = ('display_name', 'description', 'achieved', 'unlock_time')
+UPSERT_CHUNK_SIZE = 500
+
+def upsert_steam_achievements(user_id, game_id, achievements):
+    """
+    Reconcile a user's Steam achievements for one game in bulk
+    achievements is a list of dicts with api_name plus the STEAM_ACHIEVEMENT_FIELDS values
+    Loads existing rows in one query and only writes rows that are new or changed
+    Returns the number of rows written
+    """
+    # Last entry wins if Steam ever repeats an apiname; ON CONFLICT cannot touch a row twice
+    incoming = {ach['api_name']: ach for ach in achievements}
+    if not incoming:
+        return 0
+
+    existing = {
+        row.api_name: tuple(getattr(row, field) for field in STEAM_ACHIEVEMENT_FIELDS)
+        for row in db.session.query(
+            SteamAchievement.api_name,
+            *[getattr(SteamAchievement, field) for field in STEAM_ACHIEVEMENT_FIELDS]
+        ).filter_by(user_id=user_id, game_id=game_id)
+    }
+
+    changes = []
+    for api_name, ach in incoming.items():
+        values = tuple(ach[field] for field in STEAM_ACHIEVEMENT_FIELDS)
+        if existing.get(api_name) != values:
+            changes.append(dict(zip(STEAM_ACHIEVEMENT_FIELDS, values), user_id=user_id, game_id=game_id, api_name=api_name))
+
+    if not changes:
+        return 0
+
+    table = SteamAchievement.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        # Multi-row INSERT ... ON CONFLICT DO UPDATE against unique_user_game_achievement
+        for start in range(0, len(changes), UPSERT_CHUNK_SIZE):
+            stmt = insert(table).values(changes[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id', 'game_id', 'api_name'],
+                set_={field: stmt.excluded[field] for field in STEAM_ACHIEVEMENT_FIELDS}
+            )
+            db.session.execute(stmt)
+    else:
+        # Other databases: executemany UPDATE for changed rows, bulk INSERT for new ones
+        updates = [row for row in changes if row['api_name'] in existing]
+        inserts = [row for row in changes if row['api_name'] not in existing]
+        if updates:
+            db.session.execute(
+                table.update()
+                .where(table.c.user_id == db.bindparam('b_user_id'))
+                .where(table.c.game_id == db.bindparam('b_game_id'))
+                .where(table.c.api_name == db.bindparam('b_api_name')),
+                [dict({field: row[field] for field in STEAM_ACHIEVEMENT_FIELDS},
+                      b_user_id=row['user_id'], b_game_id=row['game_id'], b_api_name=row['api_name'])
+                 for row in updates]
+            )
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+
+    return len(changes)
+
+def index_achievement_games(achievement):
+    """
+    Rebuild the achievement_games rows for a custom or shared achievement from its condition_data
+    Call after the achievement has an id and whenever its condition changes (caller should commit)
+    """
+    column = 'shared_achievement_id' if isinstance(achievement, SharedAchievement) else 'custom_achievement_id'
+    app_ids = {str(app_id) for app_id in (achievement.condition_data or {}).get('games', [])}
+
+    db.session.execute(
+        db.delete(AchievementGame).where(getattr(AchievementGame, column) == achievement.id)
+        .execution_options(synchronize_session=False)
+    )
+    if app_ids:
+        db.session.execute(
+            db.insert(AchievementGame),
+            [{column: achievement.id, 'steam_app_id': app_id} for app_id in sorted(app_ids)]
+        )
+
+def shared_compatibility_subquery(user_id, shared_ids=None):
+    """
+    Per shared achievement: how many required games there are and how many of them the user owns
+    One GROUP BY over achievement_games (limited to shared_ids if given), joinable on shared_achievement_id
+    """
+    owned_games = db.select(Game.steam_app_id)\
+        .join(UserGame, UserGame.game_id == Game.id)\
+        .where(UserGame.user_id == user_id)\
+        .subquery()
+
+    return db.select(
+        AchievementGame.shared_achievement_id,
+        db.func.count(AchievementGame.id).label('required_games'),
+        db.func.count(owned_games.c.steam_app_id).label('owned_games')
+    ).outerjoin(
+        owned_games, owned_games.c.steam_app_id == AchievementGame.steam_app_id
+    ).where(
+        AchievementGame.shared_achievement_id.in_(shared_ids) if shared_ids is not None
+        else AchievementGame.shared_achievement_id.isnot(None)
+    ).group_by(AchievementGame.shared_achievement_id).subquery()
+
+def compatibility_expression(compatibility):
+    """Percentage of required games owned, from a shared_compatibility_subquery"""
+    return db.case(
+        (compatibility.c.required_games > 0, compatibility.c.owned_games * 100.0 / compatibility.c.required_games),
+        else_=0
+    )
+
+def user_game_progress_expression():
+    """
+    Achievement completion percentage of a UserGame row, as SQL (matches UserGame.progress_percentage unrounded)
+    Cast to double precision so the value a keyset cursor carries compares equal to the stored row;
+    PostgreSQL would otherwise compute an exact NUMERIC that the cursor's float never matches
+    """
+    return db.cast(db.case(
+        (UserGame.achievements_total > 0, UserGame.achievements_unlocked * 100.0 / UserGame.achievements_total),
+        else_=0
+    ), db.Float)
+
+def get_shared_compatibility(user_id, shared_ids):
+    """Map shared achievement ids to the percentage of their required games the user owns"""
+    if not shared_ids:
+        return {}
+
+    compatibility = shared_compatibility_subquery(user_id, shared_ids)
+    scores = dict(db.session.query(compatibility.c.shared_achievement_id, compatibility_expression(compatibility)))
+    return {shared_id: float(scores.get(shared_id, 0)) for shared_id in shared_ids}
+
+def get_custom_achievements_for_games(user_id, steam_app_ids):
+    """A user's custom achievements whose condition involves any of the given games"""
+    if not steam_app_ids:
+        return []
+
+    return CustomAchievement.query.filter(
+        CustomAchievement.user_id == user_id,
+        CustomAchievement.id.in_(
+            db.select(AchievementGame.custom_achievement_id)
+            .where(AchievementGame.steam_app_id.in_([str(app_id) for app_id in steam_app_ids]))
+        )
+    ).all()
+
+USER_STATS_STEAM_COLUMNS = ('games_owned', 'perfect_games', 'achievements_unlocked', 'total_playtime_minutes')
+USER_STATS_COLUMNS = USER_STATS_STEAM_COLUMNS + (
+    'custom_achievements_count', 'shared_achievements_count', 'collections_joined', 'collections_completed'
+)
+
+def user_stats_aggregates():
+    """Correlated subqueries computing each UserStats column from its source table"""
+    def aggregate(expression, model, *conditions):
+        return db.select(db.func.coalesce(expression, 0))\
+            .where(model.user_id == UserStats.user_id, *conditions)\
+            .scalar_subquery()
+
+    return {
+        'games_owned': aggregate(db.func.count(UserGame.id), UserGame),
+        'perfect_games': aggregate(
+            db.func.count(UserGame.id), UserGame,
+            UserGame.achievements_total > 0, UserGame.achievements_unlocked >= UserGame.achievements_total
+        ),
+        'achievements_unlocked': aggregate(db.func.sum(UserGame.achievements_unlocked), UserGame),
+        'total_playtime_minutes': aggregate(db.func.sum(UserGame.playtime_minutes), UserGame),
+        'custom_achievements_count': aggregate(db.func.count(CustomAchievement.id), CustomAchievement),
+        'shared_achievements_count': db.select(db.func.count(SharedAchievement.id))
+            .where(SharedAchievement.creator_id == UserStats.user_id).scalar_subquery(),
+        'collections_joined': aggregate(db.func.count(UserCollectionProgress.id), UserCollectionProgress),
+        'collections_completed': aggregate(
+            db.func.count(UserCollectionProgress.id), UserCollectionProgress,
+            UserCollectionProgress.status == 'completed'
+        ),
+    }
+
+def insert_user_stats_rows(user_select):
+    """
+    Create empty stats rows for the user ids a select returns, skipping users that already have one
+    (even one a concurrent transaction just created); returns the number of rows inserted
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(UserStats).from_select(['user_id'], user_select)\
+            .on_conflict_do_nothing(index_elements=['user_id'])
+    else:
+        stmt = db.insert(UserStats).from_select(['user_id'], user_select)
+    return db.session.execute(stmt).rowcount
+
+def recompute_user_stats(user_ids=None, columns=USER_STATS_COLUMNS):
+    """
+    Rebuild stats from the source tables with set-based SQL
+    user_ids is a list or a select of ids (every user when None)
+    Creates missing stats rows; returns the number of rows updated (caller should commit)
+    """
+    db.session.flush()
+
+    missing = db.select(User.id).where(~db.exists().where(UserStats.user_id == User.id))
+    if user_ids is not None:
+        missing = missing.where(User.id.in_(user_ids))
+    insert_user_stats_rows(missing)
+
+    aggregates = user_stats_aggregates()
+    values = {column: aggregates[column] for column in columns}
+    values['updated_at'] = datetime.utcnow()
+    stmt = db.update(UserStats).values(values)
+    if user_ids is not None:
+        stmt = stmt.where(UserStats.user_id.in_(user_ids))
+    return db.session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+def adjust_user_stats(user_id, **deltas):
+    """
+    Atomically add deltas to a user's stats counters, e.g. adjust_user_stats(1, custom_achievements_count=1)
+    Call after the change is in the session; a user without a stats row gets one computed from scratch
+    (caller should commit)
+    """
+    if not db.session.query(UserStats.user_id).filter_by(user_id=user_id).first():
+        db.session.flush()
+        if insert_user_stats_rows(db.select(User.id).where(User.id == user_id)):
+            recompute_user_stats([user_id])
+            return
+        # A concurrent request created the row first; its totals do not include this change yet
+
+    # Relative UPDATE so concurrent requests never lose each other's increments
+    values = {column: getattr(UserStats, column) + delta for column, delta in deltas.items()}
+    values['updated_at'] = datetime.utcnow()
+    db.session.execute(
+        db.update(UserStats).where(UserStats.user_id == user_id).values(values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+class SyncJob(db.Model):
+    """Background jobs such as Steam library refreshes"""
+    __tablename__ = 'sync_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    job_type = db.Column(db.String(50), nullable=False, default='steam_refresh')
+    payload = db.Column(JSON, nullable=True)
+    
+    # Queue state
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'completed', 'failed'
+    worker_id = db.Column(db.String(100), nullable=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Progress counters
+    games_total = db.Column(db.Integer, default=0, nullable=False)
+    games_processed = db.Column(db.Integer, default=0, nullable=False)
+    achievements_processed = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Outcome
+    message = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relationships
+    user = db.relationship('User', backref=db.backref('sync_jobs', lazy='dynamic', cascade='all, delete-orphan'))
+    
+    # Constraints and indexes
+    __table_args__ = (
+        db.Index('idx_sync_job_queue', 'status', 'created_at'),
+        db.Index('idx_sync_job_user', 'user_id', 'job_type', 'status'),
+    )
+    
+    def __repr__(self):
+        return f'<SyncJob {self.id}:{self.job_type}:{self.status}>'
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+    
+    @property
+    def progress_percentage(self):
+        """Calculate job completion percentage"""
+        if self.status == 'completed':
+            return 100
+        if self.games_total == 0:
+            return 0
+        return round((self.games_processed / self.games_total) * 100, 1)
+    
+    def report_progress(self, games_total=None, games_processed=None, achievements_processed=None):
+        """Update progress counters (committed with the caller's next commit)"""
+        if games_total is not None:
+            self.games_total = games_total
+        if games_processed is not None:
+            self.games_processed = games_processed
+        if achievements_processed is not None:
+            self.achievements_processed = achievements_processed
+        self.heartbeat_at = datetime.utcnow()
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'games_total': self.games_total,
+            'games_processed': self.games_processed,
+            'achievements_processed': self.achievements_processed,
+            'progress_percentage': self.progress_percentage,
+            'message': self.message,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
 class ActivityFeed(db.Model):
     """Community activity feed for user achievements and milestones"""
     __tablename__ = 'activity_feed'
@@ -423,6 +1002,80 @@ class ActivityFeed(db.Model):
         }
 
 
+class FriendTimeline(db.Model):
+    """Per-user friends feed, filled by fanning out each public activity to the author's friends"""
+    __tablename__ = 'friend_timeline'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)  # Who reads this entry
+    author_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)  # Friend who did the activity
+    activity_id = db.Column(db.Integer, db.ForeignKey('activity_feed.id', ondelete='CASCADE'), nullable=False)
+    
+    # Copied from the activity so the feed is a single range scan on this table
+    created_at = db.Column(db.DateTime, nullable=False)
+    
+    # Relationships
+    activity = db.relationship('ActivityFeed', backref=db.backref('timeline_entries', cascade='all, delete-orphan', passive_deletes=True))
+    owner = db.relationship('User', foreign_keys=[owner_id], backref=db.backref('friend_timeline', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True))
+    
+    # Constraints
+    __table_args__ = (
+        db.UniqueConstraint('owner_id', 'activity_id', name='unique_timeline_activity'),
+        db.Index('idx_friend_timeline_owner_recent', 'owner_id', 'created_at', 'activity_id'),
+        db.Index('idx_friend_timeline_owner_author', 'owner_id', 'author_id'),
+    )
+    
+    def __repr__(self):
+        return f'<FriendTimeline {self.owner_id}:{self.activity_id}>'
+
+
+FRIEND_TIMELINE_BACKFILL = 200
+
+def fan_out_activity(activity):
+    """Copy a public activity into the timeline of every accepted friend of its author"""
+    if not activity.is_public:
+        return
+    
+    friends = db.select(
+        UserFriendship.user_id,
+        db.literal(activity.user_id),
+        db.literal(activity.id),
+        db.literal(activity.created_at, db.DateTime)
+    ).where(
+        UserFriendship.friend_id == activity.user_id,
+        UserFriendship.status == 'accepted'
+    )
+    db.session.execute(
+        db.insert(FriendTimeline).from_select(['owner_id', 'author_id', 'activity_id', 'created_at'], friends)
+    )
+
+def backfill_friend_timeline(owner_id, author_id, limit=FRIEND_TIMELINE_BACKFILL):
+    """Seed a new friend's recent public activities into a user's timeline"""
+    recent = db.select(
+        db.literal(owner_id),
+        ActivityFeed.user_id,
+        ActivityFeed.id,
+        ActivityFeed.created_at
+    ).where(
+        ActivityFeed.user_id == author_id,
+        ActivityFeed.is_public == True,
+        ~db.exists().where(
+            FriendTimeline.owner_id == owner_id,
+            FriendTimeline.activity_id == ActivityFeed.id
+        )
+    ).order_by(ActivityFeed.created_at.desc()).limit(limit)
+    db.session.execute(
+        db.insert(FriendTimeline).from_select(['owner_id', 'author_id', 'activity_id', 'created_at'], recent)
+    )
+
+def prune_friend_timeline(user1_id, user2_id):
+    """Remove two former friends' activities from each other's timelines"""
+    FriendTimeline.query.filter(db.or_(
+        db.and_(FriendTimeline.owner_id == user1_id, FriendTimeline.author_id == user2_id),
+        db.and_(FriendTimeline.owner_id == user2_id, FriendTimeline.author_id == user1_id)
+    )).delete(synchronize_session=False)
+
+
 # Activity feed utility functions
 def log_activity(user_id, activity_type, title, description=None, **kwargs):
     """Log user activity for the community feed"""
@@ -440,13 +1093,62 @@ def log_activity(user_id, activity_type, title, description=None, **kwargs):
     )
     
     db.session.add(activity)
+    
+    # Fan out to friends' timelines in the same transaction (needs the activity id)
+    db.session.flush()
+    fan_out_activity(activity)
+    
     # Note: Caller should commit the transaction
     return activity
 
-def get_recent_activities(limit=50, user_id=None, user_ids=None, activity_type=None, include_private=False):
-    """Get recent community activities with filtering"""
-    query = ActivityFeed.query
+def encode_activity_cursor(activity):
+    """Opaque keyset cursor pointing just past an activity"""
+    return f"{activity.created_at.isoformat()}_{activity.id}"
+
+def decode_activity_cursor(cursor):
+    """Parse a cursor from encode_activity_cursor into (created_at, id), or None if invalid"""
+    try:
+        created_at, activity_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(activity_id)
+    except (AttributeError, ValueError):
+        return None
+
+def encode_keyset_cursor(value, row_id):
+    """Opaque cursor pointing just past a row of a listing ordered by (value, id)"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode().rstrip('=')
+
+def decode_keyset_cursor(cursor):
+    """Parse a cursor from encode_keyset_cursor into (value, id), or None if invalid"""
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return value, int(row_id)
+    except (TypeError, ValueError):
+        return None
+
+def apply_keyset_page(query, sort_column, id_column, descending=False, after=None):
+    """
+    Order a query by (sort_column, id_column) and, given an (value, id) position, start just after it
+    Each page is then an index range scan rather than an ever-growing OFFSET
+    """
+    if after:
+        value, row_id = after
+        if descending:
+            query = query.filter(db.or_(sort_column < value, db.and_(sort_column == value, id_column < row_id)))
+        else:
+            query = query.filter(db.or_(sort_column > value, db.and_(sort_column == value, id_column > row_id)))
     
+    if descending:
+        return query.order_by(sort_column.desc(), id_column.desc())
+    return query.order_by(sort_column.asc(), id_column.asc())
+
+def filter_activity_feed(query, user_id=None, user_ids=None, activity_type=None, include_private=False,
+                         timeline_owner_id=None):
+    """
+    Apply feed filters to a query over ActivityFeed
+    Returns (query, created_at_column, id_column); the columns to order and page the result by
+    """
     # Privacy filter
     if not include_private:
         query = query.filter(ActivityFeed.is_public == True)
@@ -461,8 +1163,51 @@ def get_recent_activities(limit=50, user_id=None, user_ids=None, activity_type=N
     if activity_type:
         query = query.filter(ActivityFeed.activity_type == activity_type)
     
+    # Friends timeline: walk idx_friend_timeline_owner_recent instead of the global feed
+    created_at_column, id_column = ActivityFeed.created_at, ActivityFeed.id
+    if timeline_owner_id:
+        query = query.join(FriendTimeline, FriendTimeline.activity_id == ActivityFeed.id)\
+            .filter(FriendTimeline.owner_id == timeline_owner_id)
+        created_at_column, id_column = FriendTimeline.created_at, FriendTimeline.activity_id
+    
+    return query, created_at_column, id_column
+
+def get_recent_activities(limit=50, user_id=None, user_ids=None, activity_type=None, include_private=False, before=None,
+                          timeline_owner_id=None):
+    """
+    Get recent community activities with filtering
+    before is a (created_at, id) keyset cursor; only activities older than it are returned
+    timeline_owner_id reads that user's friends timeline instead of the global feed
+    """
+    query, created_at_column, id_column = filter_activity_feed(ActivityFeed.query.options(
+        db.joinedload(ActivityFeed.user),
+        db.joinedload(ActivityFeed.game),
+        db.joinedload(ActivityFeed.custom_achievement),
+        db.joinedload(ActivityFeed.shared_achievement)
+    ), user_id=user_id, user_ids=user_ids, activity_type=activity_type, include_private=include_private,
+        timeline_owner_id=timeline_owner_id)
+    
+    # Keyset pagination: the created_at bound is a plain range scan on the (..., created_at) indexes
+    if before:
+        before_created_at, before_id = before
+        query = query.filter(
+            created_at_column <= before_created_at,
+            db.or_(created_at_column < before_created_at, id_column < before_id)
+        )
+    
     # Order by most recent and limit
-    return query.order_by(ActivityFeed.created_at.desc()).limit(limit).all()
+    return query.order_by(created_at_column.desc(), id_column.desc()).limit(limit).all()
+
+def get_activity_feed_version(user_id=None, user_ids=None, activity_type=None, include_private=False,
+                              timeline_owner_id=None):
+    """(created_at, id) of the newest activity matching the feed filters, or None; one index probe"""
+    query, created_at_column, id_column = filter_activity_feed(
+        db.session.query(ActivityFeed.id), user_id=user_id, user_ids=user_ids, activity_type=activity_type,
+        include_private=include_private, timeline_owner_id=timeline_owner_id
+    )
+    newest = query.with_entities(created_at_column, id_column)\
+        .order_by(created_at_column.desc(), id_column.desc()).first()
+    return tuple(newest) if newest else None
 
 
 class EmailVerificationToken(db.Model):
@@ -476,8 +1221,8 @@ class EmailVerificationToken(db.Model):
     
     # Token metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
-    is_used = db.Column(db.Boolean, default=False, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    is_used = db.Column(db.Boolean, default=False, nullable=False, index=True)
     used_at = db.Column(db.DateTime, nullable=True)
     
     # Relationships
@@ -504,12 +1249,12 @@ class EmailChangeToken(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    token = db.Column(db.String(255), unique=True, nullable=False)
+    token = db.Column(db.String(255), unique=True, nullable=False, index=True)
     old_email = db.Column(db.String(255), nullable=True)
     new_email = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, nullable=False)
-    is_used = db.Column(db.Boolean, default=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    is_used = db.Column(db.Boolean, default=False, index=True)
     used_at = db.Column(db.DateTime, nullable=True)
     
     # Relationship
@@ -542,8 +1287,8 @@ class PasswordResetToken(db.Model):
     
     # Token metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
-    is_used = db.Column(db.Boolean, default=False, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    is_used = db.Column(db.Boolean, default=False, nullable=False, index=True)
     used_at = db.Column(db.DateTime, nullable=True)
     
     # IP tracking for security
@@ -568,6 +1313,35 @@ class PasswordResetToken(db.Model):
         self.used_at = datetime.utcnow()
 
 
+class OutboundEmail(db.Model):
+    """Queued outgoing email, delivered in batches by EmailService's delivery worker"""
+    __tablename__ = 'outbound_emails'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html_content = db.Column(db.Text, nullable=False)
+    text_content = db.Column(db.Text, nullable=True)
+    
+    # Delivery state
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'sending', 'sent', 'dead'
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('idx_outbound_email_due', 'status', 'next_attempt_at'),
+    )
+    
+    def __repr__(self):
+        return f'<OutboundEmail {self.id} to {self.to_email} ({self.status})>'
+
+
 class AchievementCollection(db.Model):
     """Curated collections of achievements for themed campaigns"""
     __tablename__ = 'achievement_collections'
@@ -782,56 +1556,7 @@ class UserCollectionProgress(db.Model):
     
     def update_progress(self):
         """Recalculate progress based on current collection items"""
-        from sqlalchemy import and_
-        
-        # Get all collection items
-        collection_items = CollectionItem.query.filter_by(collection_id=self.collection_id).all()
-        
-        if not collection_items:
-            return
-        
-        # Count total achievements and points
-        self.total_achievements = len(collection_items)
-        self.total_points = sum(item.point_value for item in collection_items)
-        
-        # Count completed achievements
-        completed_count = 0
-        earned_points = 0
-        progress_data = self.progress_data or {}
-        
-        for item in collection_items:
-            # Check if user has imported this shared achievement
-            user_custom_achievement = CustomAchievement.query.filter(
-                and_(
-                    CustomAchievement.user_id == self.user_id,
-                    CustomAchievement.imported_from_shared_id == item.shared_achievement_id
-                )
-            ).first()
-            
-            if user_custom_achievement:
-                completed_count += 1
-                earned_points += item.point_value
-                progress_data[str(item.id)] = {
-                    'completed': True,
-                    'completed_at': user_custom_achievement.created_at.isoformat(),
-                    'points': item.point_value
-                }
-        
-        # Update progress
-        self.achievements_completed = completed_count
-        self.points_earned = earned_points
-        self.progress_data = progress_data
-        self.last_activity = datetime.utcnow()
-        
-        # Update status
-        if self.achievements_completed == self.total_achievements:
-            if self.status != 'completed':
-                self.status = 'completed'
-                self.completed_at = datetime.utcnow()
-        elif self.achievements_completed > 0:
-            self.status = 'in_progress'
-        else:
-            self.status = 'not_started'
+        update_collection_progress(self.collection_id, [self])
     
     def to_dict(self):
         return {
@@ -853,6 +1578,137 @@ class UserCollectionProgress(db.Model):
         }
 
 
+# Collection progress utility functions
+def get_collection_completions(collection_id, user_ids):
+    """
+    Find which collection items each user has completed (imported) with one join
+    Returns {user_id: {item_id: completed_at}}
+    """
+    completions = {user_id: {} for user_id in user_ids}
+    if not completions:
+        return completions
+    
+    rows = db.session.query(
+        CustomAchievement.user_id,
+        CollectionItem.id,
+        db.func.min(CustomAchievement.created_at)
+    ).join(
+        CustomAchievement, CustomAchievement.imported_from_shared_id == CollectionItem.shared_achievement_id
+    ).filter(
+        CollectionItem.collection_id == collection_id,
+        CustomAchievement.user_id.in_(list(completions))
+    ).group_by(CustomAchievement.user_id, CollectionItem.id)
+    
+    for user_id, item_id, completed_at in rows:
+        completions[user_id][item_id] = completed_at
+    return completions
+
+def _apply_collection_status(progress):
+    """Derive status from the completed count, keeping the user's completed collections stat in step"""
+    was_completed = progress.status == 'completed'
+    if progress.achievements_completed == progress.total_achievements:
+        if progress.status != 'completed':
+            progress.status = 'completed'
+            progress.completed_at = datetime.utcnow()
+    elif progress.achievements_completed > 0:
+        progress.status = 'in_progress'
+    else:
+        progress.status = 'not_started'
+    
+    if was_completed != (progress.status == 'completed'):
+        adjust_user_stats(progress.user_id, collections_completed=1 if progress.status == 'completed' else -1)
+
+def update_collection_progress(collection_id, progress_records):
+    """
+    Recalculate one collection's progress for any number of participants
+    Costs two queries however many records or items there are (caller should commit)
+    """
+    items = db.session.query(CollectionItem.id, CollectionItem.point_value)\
+        .filter_by(collection_id=collection_id).all()
+    
+    if not items or not progress_records:
+        return
+    
+    points = dict(items)
+    completions = get_collection_completions(collection_id, {progress.user_id for progress in progress_records})
+    now = datetime.utcnow()
+    
+    for progress in progress_records:
+        completed = completions[progress.user_id]
+        progress_data = dict(progress.progress_data or {})
+        for item_id, completed_at in completed.items():
+            progress_data[str(item_id)] = {
+                'completed': True,
+                'completed_at': completed_at.isoformat(),
+                'points': points[item_id]
+            }
+        
+        totals = (len(items), sum(points.values()), len(completed), sum(points[item_id] for item_id in completed))
+        if totals == (progress.total_achievements, progress.total_points, progress.achievements_completed, progress.points_earned) \
+                and progress_data == progress.progress_data:
+            continue  # Unchanged, so viewing a collection does not write
+        
+        progress.total_achievements, progress.total_points, progress.achievements_completed, progress.points_earned = totals
+        progress.progress_data = progress_data
+        progress.last_activity = now
+        _apply_collection_status(progress)
+
+def recalculate_collection_progress(collection_id):
+    """
+    Recalculate every participant of a collection in a single UPDATE
+    For admin edits to a collection's items; per-item progress_data is refreshed
+    the next time a participant's progress is updated individually (caller should commit)
+    Returns the number of progress records updated
+    """
+    total_achievements, total_points = db.session.query(
+        db.func.count(CollectionItem.id), db.func.coalesce(db.func.sum(CollectionItem.point_value), 0)
+    ).filter(CollectionItem.collection_id == collection_id).one()
+    
+    if not total_achievements:
+        return 0
+    
+    # Items of this collection the participant has imported
+    item_completed = db.and_(
+        CollectionItem.collection_id == collection_id,
+        db.exists().where(
+            CustomAchievement.user_id == UserCollectionProgress.user_id,
+            CustomAchievement.imported_from_shared_id == CollectionItem.shared_achievement_id
+        ).correlate_except(CustomAchievement)
+    )
+    achievements_completed = db.select(db.func.count(CollectionItem.id)).where(item_completed).scalar_subquery()
+    points_earned = db.select(db.func.coalesce(db.func.sum(CollectionItem.point_value), 0))\
+        .where(item_completed).scalar_subquery()
+    now = datetime.utcnow()
+    
+    result = db.session.execute(
+        db.update(UserCollectionProgress)
+        .where(UserCollectionProgress.collection_id == collection_id)
+        .values(
+            total_achievements=total_achievements,
+            total_points=total_points,
+            achievements_completed=achievements_completed,
+            points_earned=points_earned,
+            status=db.case(
+                (achievements_completed == total_achievements, 'completed'),
+                (achievements_completed > 0, 'in_progress'),
+                else_='not_started'
+            ),
+            completed_at=db.case(
+                (db.and_(achievements_completed == total_achievements, UserCollectionProgress.status != 'completed'), now),
+                else_=UserCollectionProgress.completed_at
+            ),
+            last_activity=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+    
+    # Completed collection counts may have moved for any participant
+    participants = db.select(UserCollectionProgress.user_id).where(UserCollectionProgress.collection_id == collection_id)
+    recompute_user_stats(participants, ('collections_completed',))
+    
+    return result.rowcount
+
+
 class UserFriendship(db.Model):
     """User friendship relationships and friend requests"""
     __tablename__ = 'user_friendship'
@@ -917,6 +1773,10 @@ class UserFriendship(db.Model):
             else:
                 reciprocal.status = 'accepted'
                 reciprocal.accepted_at = datetime.utcnow()
+            
+            # Seed both friends feeds with each other's recent activity
+            backfill_friend_timeline(self.user_id, self.friend_id)
+            backfill_friend_timeline(self.friend_id, self.user_id)
     
     def block_user(self):
         """Block a user (can be used on any friendship status)"""
@@ -932,6 +1792,8 @@ class UserFriendship(db.Model):
         if reciprocal:
             reciprocal.status = 'blocked'
             reciprocal.blocked_at = datetime.utcnow()
+        
+        prune_friend_timeline(self.user_id, self.friend_id)
     
     def to_dict(self):
         return {
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Add lifecycle indexes to the email token tables and delete expired or used tokens in chunks
+Run from cron when the web process's reaper is disabled (TOKEN_REAP_INTERVAL=0); safe to re-run
+"""
+
+import os
+from datetime import timedelta
+from flask import Flask
+from config import config
+from models import db
+from email_service import email_service, TOKEN_MODELS
+
+def add_token_indexes():
+    """Create the expires_at/is_used indexes and the unique email change token index if missing"""
+    for model in TOKEN_MODELS:
+        table = model.__tablename__
+        for column in ('expires_at', 'is_used'):
+            db.session.execute(db.text(f'CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})'))
+
+    db.session.execute(db.text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ix_email_change_tokens_token ON email_change_tokens (token)'
+    ))
+    db.session.commit()
+    print("✅ Token indexes in place")
+
+def reap_expired_tokens():
+    """Delete tokens that expired or were used longer ago than TOKEN_RETENTION_HOURS"""
+    print("🧹 Reaping expired email tokens...")
+
+    # Create Flask app
+    app = Flask(__name__)
+    config_name = os.environ.get('FLASK_ENV', 'development')
+    app.config.from_object(config[config_name])
+    db.init_app(app)
+
+    # Only the reaper settings are needed; init_app would also start the delivery thread
+    email_service.token_retention = timedelta(hours=float(app.config.get('TOKEN_RETENTION_HOURS', 24)))
+
+    with app.app_context():
+        try:
+            add_token_indexes()
+            reaped = email_service.reap_expired_tokens()
+
+            print(f"✅ Reaped {reaped} tokens")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error reaping tokens: {e}")
+            return False
+
+if __name__ == '__main__':
+    reap_expired_tokens()
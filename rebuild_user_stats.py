@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Create, migrate and rebuild the user_stats summary table from the source tables
+Safe to re-run: it also repairs counters that drifted from the rows they summarize
+"""
+
+import os
+from flask import Flask
+from config import config
+from models import db, UserStats, USER_STATS_COLUMNS, recompute_user_stats
+
+def add_user_stats_columns():
+    """Add summary columns to user_stats tables created before they existed"""
+    existing_columns = {col['name'] for col in db.inspect(db.engine).get_columns('user_stats')}
+
+    for column in USER_STATS_COLUMNS:
+        if column in existing_columns:
+            continue
+
+        db.session.execute(db.text(
+            f'ALTER TABLE user_stats ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0'
+        ))
+        print(f"✅ Added column {column}")
+
+    db.session.commit()
+
+def rebuild_user_stats():
+    """Recompute every user's stats with set-based SQL"""
+    print("📊 Rebuilding user stats...")
+
+    # Create Flask app
+    app = Flask(__name__)
+    config_name = os.environ.get('FLASK_ENV', 'development')
+    app.config.from_object(config[config_name])
+    db.init_app(app)
+
+    with app.app_context():
+        try:
+            UserStats.__table__.create(db.engine, checkfirst=True)
+            add_user_stats_columns()
+
+            updated = recompute_user_stats()
+            db.session.commit()
+
+            print(f"✅ Rebuilt stats for {updated} users")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error rebuilding user stats: {e}")
+            return False
+
+if __name__ == '__main__':
+    rebuild_user_stats()
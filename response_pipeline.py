@@ -0,0 +1,206 @@
+"""
+Response pipeline for the JSON APIs
+Answers conditional GETs (ETag / Last-Modified) from cheap validator queries before a payload is
+built, compresses large text bodies with brotli or gzip, and serializes JSON with orjson when it
+is installed
+"""
+
+import functools
+import gzip
+import hashlib
+import zlib
+
+from flask import current_app, make_response, request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import is_resource_modified
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library json is used without it
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is used without it
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'image/svg+xml',
+}
+
+# Dates are passed to Flask's default() so they serialize exactly as they do with the stdlib provider
+ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson, falling back to the stdlib for anything it rejects"""
+
+    def _orjson_dumps(self, obj):
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)  # Callers asking for specific stdlib options get them
+        try:
+            return self._orjson_dumps(obj).decode()
+        except TypeError:  # orjson.JSONEncodeError, e.g. integers wider than 64 bits
+            return super().dumps(obj)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)  # Pretty-printed debug output
+
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = self._orjson_dumps(obj)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+class ResponsePipeline:
+    """Conditional requests, compression and fast JSON for Flask responses"""
+
+    def __init__(self):
+        self.compression_min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 5
+
+    def init_app(self, app):
+        """Initialize response pipeline with Flask app config"""
+        self.compression_min_size = int(app.config.get('RESPONSE_COMPRESSION_MIN_SIZE', self.compression_min_size))
+        self.gzip_level = int(app.config.get('RESPONSE_GZIP_LEVEL', self.gzip_level))
+        self.brotli_quality = int(app.config.get('RESPONSE_BROTLI_QUALITY', self.brotli_quality))
+
+        if orjson is not None:
+            app.json = FastJSONProvider(app)
+            print("✅ JSON responses using orjson")
+
+        if self.compression_min_size > 0:
+            app.after_request(self.compress)
+
+    @staticmethod
+    def _etag(version):
+        """Strong ETag for this request's path and query string at a given data version"""
+        key = repr((request.path, sorted(request.args.items(multi=True)), version))
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    @staticmethod
+    def _not_modified(etag, last_modified):
+        """Empty 304 carrying the same validators the full response would have"""
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def conditional(self, validators):
+        """
+        Decorator answering conditional GETs before the view builds its payload
+        validators(*args, **kwargs) returns (version, last_modified), or None to skip validation;
+        version can be any repr-able value that changes whenever the response would
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                result = validators(*args, **kwargs)
+                if result is None:
+                    return view(*args, **kwargs)
+
+                version, last_modified = result
+                etag = self._etag(version)
+                if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                    return self._not_modified(etag, last_modified)
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    response.set_etag(etag)
+                    if last_modified:
+                        response.last_modified = last_modified
+                    response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+                return response
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def revalidate(response):
+        """
+        Tag a response with an ETag of its body and answer If-None-Match with 304
+        For cheap endpoints where the validator query would cost as much as the payload
+        """
+        response.add_etag()
+        response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        return response.make_conditional(request)
+
+    def _encoding(self):
+        """Best encoding the client accepts, preferring brotli"""
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _compress_stream(self, chunks, encoding):
+        """Compress a streamed body chunk by chunk, so it is never held in memory whole"""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            compress, finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+            compress, finish = compressor.compress, compressor.flush
+
+        try:
+            for chunk in chunks:
+                data = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def compress(self, response):
+        """after_request hook compressing large text bodies and every streamed one"""
+        if (response.direct_passthrough or 'Content-Encoding' in response.headers
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self._encoding()
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        elif (response.content_length or 0) < self.compression_min_size:
+            return response
+        else:
+            data = response.get_data()
+            if encoding == 'br':
+                response.set_data(brotli.compress(data, quality=self.brotli_quality))
+            else:
+                response.set_data(gzip.compress(data, compresslevel=self.gzip_level, mtime=0))
+        response.headers['Content-Encoding'] = encoding
+
+        # The compressed bytes are a different representation, so the body's strong ETag becomes weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+# Global instance
+response_pipeline = ResponsePipeline()
@@ -6,12 +6,119 @@ import boto3
 import os
 import uuid
 import time
+import base64
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import NoCredentialsError, ClientError
 from werkzeug.utils import secure_filename
-from PIL import Image
+from PIL import Image, ImageOps
 import io
 from flask import current_app
 
+# Derivative sizes as (name, max box); each is stored as WebP plus a JPEG/PNG fallback
+IMAGE_SIZES = (
+    ('thumb', (64, 64)),      # 50px card icons
+    ('card', (200, 200)),     # 100px trophy images and 2x card icons
+    ('full', (800, 600)),     # Original upload limit
+)
+IMAGE_SIZE_NAMES = tuple(name for name, _ in IMAGE_SIZES)
+PLACEHOLDER_BOX = (16, 16)
+
+# Filenames under this prefix name a directory of derivatives; older filenames are a single flat image
+DERIVATIVE_PREFIX = 'v2/'
+
+FORMAT_CONTENT_TYPES = {
+    'webp': 'image/webp',
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+}
+
+# Uploads waiting for a job worker are kept outside achievement_images/, so they are never served
+SPOOL_PREFIX = 'image_spool/'
+
+S3_DELETE_BATCH_SIZE = 1000  # delete_objects accepts at most 1000 keys per call
+
+def content_image_stem(content_hash):
+    """Sharded, content-addressed stem for an image: 'ab/cd/abcd...' from its SHA-256 hex digest"""
+    return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+def parse_derivative_filename(filename):
+    """
+    Split 'v2/<stem>.<fallback>' into (stem, fallback); None for legacy single-image filenames
+    Stems are content-addressed ('ab/cd/<sha256>') or, for images stored before that, 'custom_<user>_<ts>_<id>'
+    """
+    if not filename or not filename.startswith(DERIVATIVE_PREFIX):
+        return None
+    stem, _, fallback = filename[len(DERIVATIVE_PREFIX):].rpartition('.')
+    if not stem or fallback not in ('jpg', 'png'):
+        return None
+    return stem, fallback
+
+def derivative_paths(filename):
+    """Storage paths (relative to the image root) of every file belonging to an image"""
+    parsed = parse_derivative_filename(filename)
+    if not parsed:
+        return [filename]
+    stem, fallback = parsed
+    return [f"{DERIVATIVE_PREFIX}{stem}/{size}.{fmt}" for size in IMAGE_SIZE_NAMES for fmt in ('webp', fallback)]
+
+def image_has_alpha(image):
+    """Whether an opened image carries transparency (decides the PNG vs JPEG fallback)"""
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+def build_image_derivatives(image_bytes):
+    """
+    Decode an image once and encode every derivative size
+    Returns dict with 'fallback' ('jpg' or 'png'), 'files' ({'thumb.webp': bytes, ...}),
+    'sizes' ({'thumb': [w, h], ...}) and 'placeholder' (a tiny inline data URI)
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    image = ImageOps.exif_transpose(image)
+
+    # Keep transparency where the upload has it, otherwise flatten for JPEG
+    has_alpha = image_has_alpha(image)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    fallback = 'png' if has_alpha else 'jpg'
+
+    files = {}
+    sizes = {}
+
+    # Largest first so each smaller size is resampled from the previous one instead of the original
+    resized = image
+    for name, box in reversed(IMAGE_SIZES):
+        resized = resized.copy()
+        resized.thumbnail(box, Image.Resampling.LANCZOS)
+        sizes[name] = list(resized.size)
+
+        buffer = io.BytesIO()
+        resized.save(buffer, format='WEBP', quality=80, method=4)
+        files[f'{name}.webp'] = buffer.getvalue()
+
+        buffer = io.BytesIO()
+        if has_alpha:
+            resized.save(buffer, format='PNG', optimize=True)
+        else:
+            resized.save(buffer, format='JPEG', quality=85, optimize=True, progressive=True)
+        files[f'{name}.{fallback}'] = buffer.getvalue()
+
+    tiny = resized.copy()
+    tiny.thumbnail(PLACEHOLDER_BOX)
+    if has_alpha:
+        background = Image.new('RGB', tiny.size, (255, 255, 255))
+        background.paste(tiny, mask=tiny.split()[-1])
+        tiny = background
+    buffer = io.BytesIO()
+    tiny.save(buffer, format='JPEG', quality=40)
+    placeholder = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+    return {
+        'fallback': fallback,
+        'files': files,
+        'sizes': sizes,
+        'placeholder': placeholder,
+    }
+
 class S3Manager:
     """Manages file uploads and downloads to/from AWS S3"""
     
@@ -20,154 +127,194 @@ class S3Manager:
         self.bucket_name = None
         self.cloudfront_domain = None
         self.use_s3 = False
+        self.upload_pool = None
         
     def init_app(self, app):
         """Initialize S3 manager with Flask app config"""
         self.bucket_name = app.config.get('AWS_S3_BUCKET')
         self.cloudfront_domain = app.config.get('CLOUDFRONT_DOMAIN')
         self.use_s3 = app.config.get('USE_S3', False)
+        max_connections = int(app.config.get('S3_MAX_POOL_CONNECTIONS', 10))
         
         if self.use_s3:
             try:
+                # One thread-safe client whose connection pool is shared by every upload thread
                 self.s3_client = boto3.client(
                     's3',
                     aws_access_key_id=app.config.get('AWS_ACCESS_KEY_ID'),
                     aws_secret_access_key=app.config.get('AWS_SECRET_ACCESS_KEY'),
-                    region_name=app.config.get('AWS_S3_REGION', 'us-east-1')
+                    region_name=app.config.get('AWS_S3_REGION', 'us-east-1'),
+                    config=BotoConfig(
+                        max_pool_connections=max_connections,
+                        retries={'max_attempts': 3, 'mode': 'standard'}
+                    )
                 )
+                self.upload_pool = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='s3-upload')
                 print("✅ S3 client initialized successfully")
             except Exception as e:
                 print(f"❌ Failed to initialize S3 client: {e}")
                 self.use_s3 = False
     
-    def upload_image(self, file, user_id, achievement_id):
+    def store_derivatives(self, image_bytes, stem):
+        """Encode every derivative of an image and store them under v2/<stem>/ (synchronous)"""
+        return self.save_derivatives(stem, build_image_derivatives(image_bytes))
+
+    def save_derivatives(self, stem, derivatives):
         """
-        Upload an image file to S3 or local storage
-        Returns: (filename, url) tuple or (None, None) on error
+        Store already-encoded derivatives (from build_image_derivatives) under v2/<stem>/
+        Returns: dict with filename, url, placeholder, sizes, file_size and mime_type
         """
-        if not file or not file.filename:
-            return None, None
-            
-        try:
-            # Generate secure filename
-            timestamp = int(time.time())
-            file_ext = os.path.splitext(secure_filename(file.filename))[1].lower()
-            filename = f"custom_{user_id}_{timestamp}_{uuid.uuid4().hex[:8]}{file_ext}"
-            
-            if self.use_s3:
-                return self._upload_to_s3(file, filename)
-            else:
-                return self._upload_locally(file, filename)
-                
-        except Exception as e:
-            print(f"❌ Error uploading image: {e}")
-            return None, None
-    
-    def _upload_to_s3(self, file, filename):
-        """Upload file to S3 bucket"""
-        try:
-            # Read and process image
-            file.seek(0)
-            image = Image.open(file)
-            
-            # Convert to RGB if necessary (for JPEG compatibility)
-            if image.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = background
-            
-            # Resize if too large (max 800x600)
-            if image.width > 800 or image.height > 600:
-                image.thumbnail((800, 600), Image.Resampling.LANCZOS)
-            
-            # Save to bytes buffer
-            buffer = io.BytesIO()
-            image_format = 'JPEG' if filename.lower().endswith(('.jpg', '.jpeg')) else 'PNG'
-            image.save(buffer, format=image_format, quality=85, optimize=True)
-            buffer.seek(0)
-            
-            # Upload to S3
-            s3_key = f"achievement_images/{filename}"
-            self.s3_client.upload_fileobj(
-                buffer,
-                self.bucket_name,
-                s3_key,
-                ExtraArgs={
-                    'ContentType': f'image/{image_format.lower()}',
-                    'CacheControl': 'max-age=31536000'  # 1 year cache
-                    # Removed 'ACL': 'public-read' - modern S3 buckets use bucket policies instead
-                }
+        filename = f"{DERIVATIVE_PREFIX}{stem}.{derivatives['fallback']}"
+        uploads = [
+            (f"{DERIVATIVE_PREFIX}{stem}/{name}", data, FORMAT_CONTENT_TYPES[name.rpartition('.')[2]])
+            for name, data in derivatives['files'].items()
+        ]
+
+        if self.upload_pool:
+            # Push every size in parallel over the pooled S3 connections; list() re-raises failures
+            list(self.upload_pool.map(lambda upload: self._put_object(*upload), uploads))
+        else:
+            for upload in uploads:
+                self._put_object(*upload)
+
+        url = self.get_image_url(filename)
+        print(f"✅ Image derivatives stored: {url}")
+        return {
+            'filename': filename,
+            'url': url,
+            'placeholder': derivatives['placeholder'],
+            'sizes': derivatives['sizes'],
+            'file_size': sum(len(data) for data in derivatives['files'].values()),
+            'mime_type': FORMAT_CONTENT_TYPES[derivatives['fallback']],
+        }
+
+    def read_image(self, path):
+        """Read a stored file's bytes from S3 or local storage"""
+        if self.use_s3:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=f"achievement_images/{path}")
+            return response['Body'].read()
+        with open(os.path.join(current_app.config['UPLOAD_FOLDER'], path), 'rb') as f:
+            return f.read()
+
+    def _put_object(self, path, data, content_type):
+        """Write one file to S3 (under achievement_images/) or to the local upload folder"""
+        if self.use_s3:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=f"achievement_images/{path}",
+                Body=data,
+                ContentType=content_type,
+                CacheControl='max-age=31536000, immutable'  # Derivatives are never rewritten in place
+                # Removed 'ACL': 'public-read' - modern S3 buckets use bucket policies instead
             )
-            
-            # Return filename and CloudFront URL
-            url = f"https://{self.cloudfront_domain}/{s3_key}"
-            print(f"✅ Image uploaded to S3: {url}")
-            return filename, url
-            
-        except Exception as e:
-            print(f"❌ S3 upload failed: {e}")
-            return None, None
-    
-    def _upload_locally(self, file, filename):
-        """Upload file to local storage (fallback)"""
+        else:
+            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'wb') as f:
+                f.write(data)
+
+    def put_spool(self, name, local_path):
+        """Move a spooled upload into the bucket so a job worker on another host can process it"""
+        self.s3_client.upload_file(local_path, self.bucket_name, f"{SPOOL_PREFIX}{name}")
+        os.remove(local_path)
+
+    def fetch_spool(self, name, local_path):
+        """Download a spooled upload to local_path; raises FileNotFoundError when it is gone"""
         try:
-            import time
-            
-            # Create upload directory if it doesn't exist
-            upload_path = current_app.config['UPLOAD_FOLDER']
-            os.makedirs(upload_path, exist_ok=True)
-            
-            # Save file
-            file_path = os.path.join(upload_path, filename)
-            
-            # Process image
-            image = Image.open(file)
-            if image.width > 800 or image.height > 600:
-                image.thumbnail((800, 600), Image.Resampling.LANCZOS)
-            
-            image.save(file_path, quality=85, optimize=True)
-            
-            # Return filename and local URL
-            url = f"/static/achievement_images/{filename}"
-            print(f"✅ Image saved locally: {url}")
-            return filename, url
-            
-        except Exception as e:
-            print(f"❌ Local upload failed: {e}")
-            return None, None
-    
+            self.s3_client.download_file(self.bucket_name, f"{SPOOL_PREFIX}{name}", local_path)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey'):
+                raise FileNotFoundError(f"Spooled upload {name} not found")
+            raise
+
+    def delete_spool(self, name):
+        """Remove a spooled upload from the bucket"""
+        self.s3_client.delete_object(Bucket=self.bucket_name, Key=f"{SPOOL_PREFIX}{name}")
+
     def delete_image(self, filename):
-        """Delete an image from S3 or local storage"""
+        """Delete an image and all of its derivatives from S3 or local storage"""
         if not filename:
             return True
-            
+        return filename in self.delete_images([filename])
+
+    def delete_images(self, filenames):
+        """
+        Delete many images and their derivatives, batching S3 deletes up to the 1000-key API limit
+        Returns the set of filenames that were fully deleted
+        """
+        deleted = set()
         try:
             if self.use_s3:
-                s3_key = f"achievement_images/{filename}"
-                self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
-                print(f"✅ Deleted from S3: {s3_key}")
+                keys = {
+                    f"achievement_images/{path}": filename
+                    for filename in filenames
+                    for path in derivative_paths(filename)
+                }
+                failed = set()
+                key_list = list(keys)
+                for start in range(0, len(key_list), S3_DELETE_BATCH_SIZE):
+                    response = self.s3_client.delete_objects(
+                        Bucket=self.bucket_name,
+                        Delete={'Objects': [{'Key': key} for key in key_list[start:start + S3_DELETE_BATCH_SIZE]], 'Quiet': True}
+                    )
+                    failed.update(keys[error['Key']] for error in response.get('Errors', []))
+                deleted = set(filenames) - failed
+                print(f"✅ Deleted from S3: {len(deleted)} images ({len(keys)} objects)")
             else:
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    print(f"✅ Deleted locally: {file_path}")
-            return True
-            
+                upload_path = current_app.config['UPLOAD_FOLDER']
+                for filename in filenames:
+                    parsed = parse_derivative_filename(filename)
+                    if parsed:
+                        shutil.rmtree(os.path.join(upload_path, DERIVATIVE_PREFIX, parsed[0]), ignore_errors=True)
+                    else:
+                        file_path = os.path.join(upload_path, filename)
+                        if os.path.exists(file_path):
+                            os.remove(file_path)
+                    deleted.add(filename)
+                print(f"✅ Deleted locally: {len(deleted)} images")
+
         except Exception as e:
-            print(f"❌ Error deleting image: {e}")
-            return False
-    
-    def get_image_url(self, filename):
-        """Get the full URL for an image"""
-        if not filename:
-            return None
-            
+            print(f"❌ Error deleting images: {e}")
+        return deleted
+
+    def _url_for_path(self, path):
+        """Public URL of a stored file"""
         if self.use_s3:
-            return f"https://{self.cloudfront_domain}/achievement_images/{filename}"
+            return f"https://{self.cloudfront_domain}/achievement_images/{path}"
         else:
-            return f"/static/achievement_images/{filename}"
+            return f"/static/achievement_images/{path}"
+
+    def get_image_url(self, filename, size='full', fmt=None):
+        """
+        Get the URL for an image at one derivative size
+        fmt is 'webp' or None for the JPEG/PNG fallback; legacy images only have their single file
+        """
+        if not filename:
+            return None
+
+        parsed = parse_derivative_filename(filename)
+        if not parsed:
+            return self._url_for_path(filename)
+
+        stem, fallback = parsed
+        return self._url_for_path(f"{DERIVATIVE_PREFIX}{stem}/{size}.{fmt or fallback}")
+
+    def get_image_srcset(self, filename, fmt=None, variants=None):
+        """
+        srcset value listing every derivative by its encoded width, or None for legacy single-image files
+        variants is the image's stored {'thumb': [w, h], ...}; derivatives of a small upload that came out
+        the same width are listed once
+        """
+        if not parse_derivative_filename(filename) or not variants:
+            return None
+
+        candidates = {}
+        for name in IMAGE_SIZE_NAMES:
+            if name in variants:
+                candidates.setdefault(variants[name][0], name)
+        return ', '.join(
+            f"{self.get_image_url(filename, name, fmt)} {width}w" for width, name in candidates.items()
+        )
 
 # Global instance
 s3_manager = S3Manager()
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Concurrent Steam Web API fetching for library syncs
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PLAYER_ACHIEVEMENTS_URL = 'https://api.steampowered.com/ISteamUserStats/GetPlayerAchievements/v1/'
+SCHEMA_URL = 'https://api.steampowered.com/ISteamUserStats/GetSchemaForGame/v2/'
+
+
+class SteamUnavailable(Exception):
+    """Steam could not answer right now (rate limited or a server error); the game is retried next sync"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace requests to the Steam API"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SteamSyncEngine:
+    """Fetches per-game achievement data from Steam with bounded concurrency"""
+
+    def __init__(self):
+        self.max_workers = 8
+        self.requests_per_second = 10.0
+        self.timeout = 10
+        self.max_retries = 2
+        self.schema_ttl_hours = 72
+
+    def init_app(self, app):
+        """Initialize sync engine with Flask app config"""
+        self.max_workers = max(1, int(app.config.get('STEAM_SYNC_MAX_WORKERS', self.max_workers)))
+        self.requests_per_second = float(app.config.get('STEAM_API_RATE_LIMIT', self.requests_per_second))
+        self.timeout = app.config.get('STEAM_API_TIMEOUT', self.timeout)
+        self.schema_ttl_hours = app.config.get('STEAM_SCHEMA_CACHE_TTL_HOURS', self.schema_ttl_hours)
+
+    def _create_session(self):
+        """Create an HTTP session whose connection pool matches the worker count"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        session.mount('https://', adapter)
+        return session
+
+    def _get(self, session, limiter, url, params, headers=None):
+        """Rate-limited GET that backs off when Steam answers 429"""
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire()
+            response = session.get(url, params=params, headers=headers, timeout=self.timeout)
+
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+
+            retry_after = response.headers.get('Retry-After', '')
+            time.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+
+        return response
+
+    @staticmethod
+    def _check_available(response):
+        """Raise SteamUnavailable for answers that say nothing about the game itself"""
+        if response.status_code == 429 or response.status_code >= 500:
+            raise SteamUnavailable(f'Steam API returned HTTP {response.status_code}')
+
+    def _fetch_schema(self, session, limiter, steam_api_key, appid, cached, ach_list):
+        """
+        Resolve a game's schema from the shared cache, revalidating or downloading it when needed
+        Returns (schema, source, etag, last_modified)
+        """
+        if cached and cached['fresh']:
+            # A player unlocking names the cached schema lacks means the game added achievements
+            known_names = {a.get('name') for a in cached['schema']}
+            if all(ach['apiname'] in known_names for ach in ach_list):
+                return cached['schema'], 'cache', None, None
+
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        schema_response = self._get(session, limiter, SCHEMA_URL, {
+            'key': steam_api_key,
+            'appid': appid
+        }, headers=headers or None)
+
+        if schema_response.status_code == 304 and cached:
+            return cached['schema'], 'revalidated', None, None
+        self._check_available(schema_response)
+        if schema_response.status_code != 200:
+            return [], None, None, None
+
+        schema = schema_response.json().get('game', {}).get('availableGameStats', {}).get('achievements', [])
+        return (schema, 'fetched',
+                schema_response.headers.get('ETag'),
+                schema_response.headers.get('Last-Modified'))
+
+    def _fetch_game(self, session, limiter, steam_api_key, steam_id, appid, cached=None):
+        """Fetch player achievements and schema for a single game"""
+        result = {
+            'achievements': [],
+            'schema': [],
+            'schema_source': None,
+            'schema_etag': None,
+            'schema_last_modified': None,
+            'error': None
+        }
+
+        try:
+            ach_response = self._get(session, limiter, PLAYER_ACHIEVEMENTS_URL, {
+                'key': steam_api_key,
+                'steamid': steam_id,
+                'appid': appid
+            })
+            self._check_available(ach_response)
+            if ach_response.status_code != 200:
+                # 400/403: the game has no stats, so there is nothing to sync
+                return result
+
+            ach_list = ach_response.json().get('playerstats', {}).get('achievements', [])
+            if not ach_list:
+                # Games without stats have nothing to match against a schema
+                return result
+
+            schema, source, etag, last_modified = self._fetch_schema(
+                session, limiter, steam_api_key, appid, cached, ach_list
+            )
+            if source is None:
+                return result
+
+            result['achievements'] = ach_list
+            result['schema'] = schema
+            result['schema_source'] = source
+            result['schema_etag'] = etag
+            result['schema_last_modified'] = last_modified
+
+        except requests.exceptions.Timeout:
+            result['error'] = 'timeout'
+        except Exception as e:
+            result['error'] = str(e)[:100]
+
+        return result
+
+    def fetch_achievements(self, steam_api_key, steam_id, appids, schema_cache=None):
+        """
+        Fetch achievement data for many games concurrently
+        schema_cache maps appid -> {'schema', 'fresh', 'etag', 'last_modified'} for cached schemas
+        Yields (appid, result) tuples in the same order as appids
+        """
+        schema_cache = schema_cache or {}
+        limiter = TokenBucket(self.requests_per_second)
+        session = self._create_session()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(self._fetch_game, session, limiter, steam_api_key, steam_id,
+                                    appid, schema_cache.get(appid))
+                    for appid in appids
+                ]
+                for appid, future in zip(appids, futures):
+                    yield appid, future.result()
+        finally:
+            session.close()
+
+# Global instance
+steam_sync_engine = SteamSyncEngine()
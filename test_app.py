@@ -154,6 +154,768 @@ def test_forms():
         print(f"❌ Forms: FAILED - {e}")
         return False
 
+def test_game_cache():
+    """Test that game lookups are batched, cached and invalidated on writes"""
+    try:
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from game_cache import game_cache
+        from models import db, get_or_create_game
+        from sqlalchemy import event
+        
+        with app.app_context():
+            db.create_all()
+            get_or_create_game('cache-1', 'Cached Game')
+            
+            queries = []
+            def count_query(*args):
+                queries.append(args)
+            event.listen(db.engine, 'before_cursor_execute', count_query)
+            try:
+                names = game_cache.get_names(['cache-1', 'cache-missing'])
+                game_cache.get_many(['cache-1'])
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count_query)
+            
+            get_or_create_game('cache-1', 'Renamed Game')
+            renamed = game_cache.get('cache-1')
+        
+        if names != {'cache-1': 'Cached Game', 'cache-missing': 'App cache-missing'} or len(queries) != 1:
+            print(f"❌ Game cache: FAILED - names {names}, {len(queries)} queries")
+            return False
+        
+        if renamed['name'] != 'Renamed Game':
+            print("❌ Game cache: FAILED - rename was not invalidated")
+            return False
+        
+        print("✅ Game cache: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Game cache: FAILED - {e}")
+        return False
+
+def test_user_stats():
+    """Test that incremental stats adjustments agree with a set-based rebuild"""
+    try:
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from models import db, User, Game, UserGame, CustomAchievement, UserStats, adjust_user_stats, recompute_user_stats
+        
+        with app.app_context():
+            db.create_all()
+            user = User(username='stats_tester', email='stats@example.com', password_hash='x')
+            game = Game(steam_app_id='stats-1', name='Stats Game')
+            db.session.add_all([user, game])
+            db.session.flush()
+            db.session.add(UserGame(user_id=user.id, game_id=game.id, playtime_minutes=90,
+                                    achievements_total=4, achievements_unlocked=4))
+            
+            # First adjustment builds the row from scratch, later ones are relative
+            for name in ('First', 'Second'):
+                db.session.add(CustomAchievement(user_id=user.id, name=name, description=name,
+                                                 condition_type='all_games_owned', condition_data={'games': []}))
+                adjust_user_stats(user.id, custom_achievements_count=1)
+            db.session.commit()
+            
+            incremental = db.session.get(UserStats, user.id)
+            incremental = (incremental.custom_achievements_count, incremental.games_owned, incremental.perfect_games)
+            
+            recompute_user_stats([user.id])
+            db.session.commit()
+            rebuilt = db.session.get(UserStats, user.id)
+            db.session.refresh(rebuilt)
+            rebuilt = (rebuilt.custom_achievements_count, rebuilt.games_owned, rebuilt.perfect_games)
+        
+        if incremental != (2, 1, 1) or rebuilt != incremental:
+            print(f"❌ User stats: FAILED - incremental {incremental}, rebuilt {rebuilt}")
+            return False
+        
+        print("✅ User stats summary: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ User stats: FAILED - {e}")
+        return False
+
+def test_counter_buffer():
+    """Test that counter increments are buffered and flushed as one relative UPDATE"""
+    try:
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from counters import counters
+        from models import db, User, SharedAchievement
+        
+        with app.app_context():
+            db.create_all()
+            user = User(username='counter_tester', email='counter@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            shared = SharedAchievement(creator_id=user.id, name='Counted', description='Counted',
+                                       condition_type='all_games_owned', condition_data={'games': []})
+            db.session.add(shared)
+            db.session.commit()
+            
+            for _ in range(3):
+                shared.increment_tries()
+            stored_before_flush = db.session.query(SharedAchievement.tries_count).filter_by(id=shared.id).scalar()
+            live_before_flush = counters.live_value(shared, 'tries_count')
+            
+            counters.flush()
+            db.session.refresh(shared)
+            stored_after_flush = shared.tries_count
+            pending_after_flush = counters.pending(shared, 'tries_count')
+        
+        if (stored_before_flush, live_before_flush) != (0, 3):
+            print(f"❌ Counter buffer: FAILED - stored {stored_before_flush}, live {live_before_flush} before flush")
+            return False
+        
+        if (stored_after_flush, pending_after_flush) != (3, 0):
+            print(f"❌ Counter buffer: FAILED - stored {stored_after_flush}, pending {pending_after_flush} after flush")
+            return False
+        
+        print("✅ Counter buffer: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Counter buffer: FAILED - {e}")
+        return False
+
+def test_image_derivatives():
+    """Test that uploads are encoded into every size in WebP plus a fallback format"""
+    try:
+        import io
+        from PIL import Image
+        from s3_manager import build_image_derivatives, derivative_paths, IMAGE_SIZE_NAMES
+        
+        buffer = io.BytesIO()
+        Image.new('RGB', (1600, 900), (200, 40, 40)).save(buffer, format='PNG')
+        derivatives = build_image_derivatives(buffer.getvalue())
+        
+        expected_files = {f'{size}.{fmt}' for size in IMAGE_SIZE_NAMES for fmt in ('webp', 'jpg')}
+        if derivatives['fallback'] != 'jpg' or set(derivatives['files']) != expected_files:
+            print(f"❌ Image derivatives: FAILED - got {sorted(derivatives['files'])}")
+            return False
+        
+        if derivatives['sizes'] != {'thumb': [64, 36], 'card': [200, 113], 'full': [800, 450]}:
+            print(f"❌ Image derivatives: FAILED - sizes {derivatives['sizes']}")
+            return False
+        
+        if not derivatives['placeholder'].startswith('data:image/jpeg;base64,') or len(derivatives['placeholder']) > 2000:
+            print("❌ Image derivatives: FAILED - placeholder is not a small data URI")
+            return False
+        
+        if derivative_paths('legacy.png') != ['legacy.png'] or len(derivative_paths('v2/custom_1.jpg')) != 6:
+            print("❌ Image derivatives: FAILED - wrong storage paths")
+            return False
+        
+        print("✅ Image derivatives: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Image derivatives: FAILED - {e}")
+        return False
+
+def test_image_pipeline():
+    """Test that uploads are spooled, processed by the job worker and deduplicated by content"""
+    try:
+        import io
+        import tempfile
+        from PIL import Image
+        from werkzeug.datastructures import FileStorage
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from image_pipeline import image_pipeline
+        from job_queue import job_queue
+        from models import db, User
+        from s3_manager import parse_derivative_filename
+        
+        work_dir = tempfile.mkdtemp()
+        app.config['UPLOAD_FOLDER'] = os.path.join(work_dir, 'images')
+        image_pipeline.spool_folder = os.path.join(work_dir, 'spool')
+        
+        buffer = io.BytesIO()
+        Image.new('RGBA', (300, 300), (0, 0, 255, 128)).save(buffer, format='PNG')
+        image_bytes = buffer.getvalue()
+        
+        with app.app_context():
+            db.create_all()
+            user = User(username='image_tester', email='image@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            
+            achievement_image, needs_processing = image_pipeline.accept_upload(
+                FileStorage(io.BytesIO(image_bytes), filename='icon.png'), user.id)
+            db.session.flush()
+            image_pipeline.enqueue(achievement_image)
+            status_before = achievement_image.status
+            
+            job_queue.run_next_job()
+            db.session.refresh(achievement_image)
+            
+            stem, _ = parse_derivative_filename(achievement_image.filename)
+            stored = os.listdir(os.path.join(app.config['UPLOAD_FOLDER'], 'v2', stem))
+            
+            # The same bytes uploaded again reuse the stored image
+            duplicate, duplicate_needs_processing = image_pipeline.accept_upload(
+                FileStorage(io.BytesIO(image_bytes), filename='copy.png'), user.id)
+            db.session.commit()
+            db.session.refresh(achievement_image)
+            spooled = os.listdir(image_pipeline.spool_folder)
+        
+        if not needs_processing or status_before != 'pending' or achievement_image.status != 'ready':
+            print(f"❌ Image pipeline: FAILED - status {status_before} -> {achievement_image.status}")
+            return False
+        
+        if not achievement_image.filename.endswith('.png') or len(stored) != 6 or spooled:
+            print(f"❌ Image pipeline: FAILED - stored {sorted(stored)}, still spooled {spooled}")
+            return False
+        
+        if duplicate is not achievement_image or duplicate_needs_processing or achievement_image.ref_count != 2:
+            print(f"❌ Image pipeline: FAILED - duplicate upload was not deduplicated (refs {achievement_image.ref_count})")
+            return False
+        
+        print("✅ Image pipeline: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Image pipeline: FAILED - {e}")
+        return False
+
+def test_stale_jobs():
+    """Test that stalled jobs are re-queued until they run out of attempts, then failed"""
+    try:
+        from datetime import datetime, timedelta
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from job_queue import job_queue
+        from models import db, User, SyncJob
+        
+        with app.app_context():
+            db.create_all()
+            user = User(username='stale_tester', email='stale@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            
+            stalled_at = datetime.utcnow() - timedelta(seconds=job_queue.stale_after + 60)
+            retried, exhausted = [
+                SyncJob(user_id=user.id, job_type='stale_test', status='running', attempts=attempts,
+                        started_at=stalled_at, heartbeat_at=stalled_at)
+                for attempts in (1, job_queue.max_attempts)
+            ]
+            db.session.add_all([retried, exhausted])
+            db.session.commit()
+            
+            job_queue._requeue_stale_jobs()
+            db.session.refresh(retried)
+            db.session.refresh(exhausted)
+            statuses = (retried.status, exhausted.status)
+        
+        if statuses != ('queued', 'failed'):
+            print(f"❌ Stale jobs: FAILED - statuses {statuses}")
+            return False
+        
+        print("✅ Stale jobs: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Stale jobs: FAILED - {e}")
+        return False
+
+def test_image_retry():
+    """Test that a storage failure leaves the image pending for a retry instead of failing it"""
+    try:
+        import io
+        import tempfile
+        from PIL import Image
+        from werkzeug.datastructures import FileStorage
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from image_pipeline import image_pipeline
+        from job_queue import job_queue
+        from models import db, User
+        from s3_manager import s3_manager
+        
+        work_dir = tempfile.mkdtemp()
+        app.config['UPLOAD_FOLDER'] = os.path.join(work_dir, 'images')
+        image_pipeline.spool_folder = os.path.join(work_dir, 'spool')
+        
+        buffer = io.BytesIO()
+        Image.new('RGB', (120, 80), (10, 200, 30)).save(buffer, format='PNG')
+        
+        save_derivatives = s3_manager.save_derivatives
+        def flaky_save(*args, **kwargs):
+            s3_manager.save_derivatives = save_derivatives
+            raise OSError('storage unavailable')
+        
+        with app.app_context():
+            db.create_all()
+            user = User(username='retry_tester', email='retry@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            
+            achievement_image, _ = image_pipeline.accept_upload(
+                FileStorage(io.BytesIO(buffer.getvalue()), filename='retry.png'), user.id)
+            db.session.flush()
+            image_pipeline.enqueue(achievement_image)
+            
+            s3_manager.save_derivatives = flaky_save
+            try:
+                job = job_queue.run_next_job()
+            finally:
+                s3_manager.save_derivatives = save_derivatives
+            db.session.refresh(achievement_image)
+            after_failure = (job.status, achievement_image.status, len(os.listdir(image_pipeline.spool_folder)))
+            
+            job_queue.run_next_job()
+            db.session.refresh(achievement_image)
+            db.session.refresh(job)
+            after_retry = (job.status, job.attempts, achievement_image.status)
+        
+        if after_failure != ('queued', 'pending', 1):
+            print(f"❌ Image retry: FAILED - after a storage error got {after_failure}")
+            return False
+        
+        if after_retry != ('completed', 2, 'ready'):
+            print(f"❌ Image retry: FAILED - retry ended as {after_retry}")
+            return False
+        
+        print("✅ Image retry: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Image retry: FAILED - {e}")
+        return False
+
+def test_image_spool_shared():
+    """Test that with S3 uploads wait in the bucket for a worker on another host, and failures keep references"""
+    try:
+        import io
+        import shutil
+        import tempfile
+        from PIL import Image
+        from werkzeug.datastructures import FileStorage
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from image_pipeline import image_pipeline
+        from job_queue import job_queue
+        from models import db, User, CustomAchievement
+        from s3_manager import s3_manager
+        
+        class FakeBucket:
+            """Just the spool calls of an S3 client, backed by a dict"""
+            def __init__(self):
+                self.objects = {}
+            def upload_file(self, path, bucket, key):
+                with open(path, 'rb') as f:
+                    self.objects[key] = f.read()
+            def download_file(self, bucket, key, path):
+                if key not in self.objects:
+                    raise FileNotFoundError(key)
+                with open(path, 'wb') as f:
+                    f.write(self.objects[key])
+            def delete_object(self, Bucket, Key):
+                self.objects.pop(Key, None)
+        
+        work_dir = tempfile.mkdtemp()
+        app.config['UPLOAD_FOLDER'] = os.path.join(work_dir, 'images')
+        bucket = FakeBucket()
+        saved = (s3_manager.use_s3, s3_manager.s3_client, s3_manager.save_derivatives)
+        s3_manager.use_s3, s3_manager.s3_client = True, bucket
+        s3_manager.save_derivatives = lambda stem, derivatives: {
+            'file_size': 1, 'placeholder': None, 'sizes': derivatives['sizes']}
+        
+        def upload(color, name):
+            buffer = io.BytesIO()
+            Image.new('RGB', (90, 90), color).save(buffer, format='PNG')
+            achievement_image, _ = image_pipeline.accept_upload(FileStorage(io.BytesIO(buffer.getvalue()), filename=name), user.id)
+            db.session.add(CustomAchievement(user_id=user.id, name=name, description='d', condition_type='all_games_owned',
+                                             condition_data={'games': []}, image_filename=achievement_image.filename))
+            db.session.commit()
+            image_pipeline.enqueue(achievement_image)
+            return achievement_image
+        
+        try:
+            with app.app_context():
+                db.create_all()
+                user = User(username='spool_tester', email='spool@example.com', password_hash='x')
+                db.session.add(user)
+                db.session.flush()
+                
+                # The web process spools here...
+                image_pipeline.spool_folder = os.path.join(work_dir, 'web_spool')
+                processed = upload((1, 2, 3), 'shared.png')
+                lost = upload((4, 5, 6), 'lost.png')
+                spooled = len(bucket.objects)
+                web_files = os.listdir(image_pipeline.spool_folder)
+                
+                # ...and a worker on another host only sees the bucket
+                image_pipeline.spool_folder = os.path.join(work_dir, 'worker_spool')
+                bucket.objects.pop(f"image_spool/{os.path.basename(lost.filename).rpartition('.')[0]}.upload")
+                job_queue.run_next_job()
+                job_queue.run_next_job()
+                db.session.refresh(processed)
+                db.session.refresh(lost)
+                lost_reference = CustomAchievement.query.filter_by(name='lost.png').first().image_filename
+        finally:
+            s3_manager.use_s3, s3_manager.s3_client, s3_manager.save_derivatives = saved
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        if spooled != 2 or web_files or processed.status != 'ready' or bucket.objects:
+            print(f"❌ Shared spool: FAILED - {spooled} spooled, local {web_files}, status {processed.status}, left {list(bucket.objects)}")
+            return False
+        
+        if lost.status != 'failed' or lost.ref_count != 1 or lost_reference != lost.filename:
+            print(f"❌ Shared spool: FAILED - failed image dropped its references ({lost.ref_count}, {lost_reference})")
+            return False
+        
+        print("✅ Shared spool: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Shared spool: FAILED - {e}")
+        return False
+
+def test_image_states():
+    """Test that image states are batch-loaded per request and srcset uses the encoded widths"""
+    try:
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app, preload_achievement_image_states, get_achievement_image_state, get_achievement_image_srcset
+        from models import db, AchievementImage, User
+        
+        filename = 'v2/ab/cd/abcdstates.jpg'
+        with app.app_context():
+            db.create_all()
+            user = User(username='state_tester', email='state@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(AchievementImage(
+                filename=filename, original_filename='wide.jpg', file_size=1, mime_type='image/jpeg',
+                status='ready', ref_count=1, uploaded_by=user.id,
+                variants={'thumb': [64, 20], 'card': [150, 47], 'full': [150, 47]}
+            ))
+            db.session.commit()
+        
+        # Each request has its own app context, so nothing is remembered between them
+        with app.test_request_context():
+            preload_achievement_image_states([filename, 'legacy.png'])
+            srcset = get_achievement_image_srcset(filename, 'webp')
+            AchievementImage.query.filter_by(filename=filename).update({'status': 'pending'})
+            db.session.commit()
+            status_same_request = get_achievement_image_state(filename)['status']
+        
+        with app.test_request_context():
+            status_next_request = get_achievement_image_state(filename)['status']
+        
+        descriptors = [candidate.rsplit(' ', 1)[1] for candidate in srcset.split(', ')]
+        if descriptors != ['64w', '150w']:
+            print(f"❌ Image states: FAILED - srcset descriptors {descriptors}")
+            return False
+        
+        if status_same_request != 'ready' or status_next_request != 'pending':
+            print(f"❌ Image states: FAILED - states {status_same_request} -> {status_next_request}")
+            return False
+        
+        print("✅ Image states: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Image states: FAILED - {e}")
+        return False
+
+def test_email_queue():
+    """Test that emails are queued, delivered in a batch and dead-lettered after repeated failures"""
+    try:
+        import tempfile
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from email_service import email_service, FileBackend
+        from models import db, OutboundEmail
+        
+        outbox = tempfile.mkdtemp()
+        original_backend = email_service.backend
+        email_service.backend = FileBackend(outbox)
+        
+        with app.app_context():
+            db.create_all()
+            email_service._send_email('first@example.com', 'First', '<p>First</p>', 'First')
+            email_service._send_email('second@example.com', 'Second', '<p>Second</p>')
+            queued = OutboundEmail.query.filter_by(status='queued').count()
+            
+            sent = email_service.deliver_pending()
+            delivered_files = sorted(os.listdir(outbox))
+            
+            # A backend that always fails backs off, then gives up
+            email_service.backend = FileBackend(os.path.join(outbox, delivered_files[0], 'not-a-directory'))
+            email_service._send_email('failing@example.com', 'Failing', '<p>Failing</p>')
+            failing = OutboundEmail.query.filter_by(to_email='failing@example.com').first()
+            for _ in range(email_service.max_attempts):
+                failing.next_attempt_at = failing.created_at
+                db.session.commit()
+                email_service.deliver_pending()
+            db.session.refresh(failing)
+            email_service.backend = original_backend
+        
+        if queued != 2 or sent != 2 or len(delivered_files) != 2:
+            print(f"❌ Email queue: FAILED - queued {queued}, sent {sent}, files {delivered_files}")
+            return False
+        
+        if failing.status != 'dead' or failing.attempts != email_service.max_attempts:
+            print(f"❌ Email queue: FAILED - failing email is {failing.status} after {failing.attempts} attempts")
+            return False
+        
+        print("✅ Email queue: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Email queue: FAILED - {e}")
+        return False
+
+def test_token_reaper():
+    """Test that expired and used email tokens are reaped once past the retention window"""
+    try:
+        from datetime import datetime, timedelta
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from email_service import email_service
+        from models import db, User, EmailVerificationToken, PasswordResetToken
+        
+        now = datetime.utcnow()
+        long_ago = now - email_service.token_retention - timedelta(hours=1)
+        
+        with app.app_context():
+            db.create_all()
+            user = User(username='token_tester', email='token@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all([
+                EmailVerificationToken(user_id=user.id, token='live', email=user.email, expires_at=now + timedelta(hours=1)),
+                EmailVerificationToken(user_id=user.id, token='recently-expired', email=user.email, expires_at=now - timedelta(minutes=5)),
+                EmailVerificationToken(user_id=user.id, token='long-expired', email=user.email, expires_at=long_ago),
+                PasswordResetToken(user_id=user.id, token='used', email=user.email, expires_at=now + timedelta(minutes=5),
+                                   is_used=True, used_at=long_ago),
+            ])
+            db.session.commit()
+            
+            reaped = email_service.reap_expired_tokens()
+            remaining = sorted(
+                [t.token for t in EmailVerificationToken.query.filter_by(user_id=user.id)] +
+                [t.token for t in PasswordResetToken.query.filter_by(user_id=user.id)]
+            )
+        
+        if reaped != 2 or remaining != ['live', 'recently-expired']:
+            print(f"❌ Token reaper: FAILED - reaped {reaped}, remaining {remaining}")
+            return False
+        
+        print("✅ Token reaper: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Token reaper: FAILED - {e}")
+        return False
+
+def test_data_cache():
+    """Test cached results, tag invalidation on commit and single computation of a missing key"""
+    try:
+        import threading
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from cache import cache
+        from models import db, User
+        
+        calls = []
+        
+        @cache.cached(tags=lambda user_id: [f'user:{user_id}'])
+        def load(user_id):
+            calls.append(user_id)
+            cache.tag('game:cache-test')
+            return {'user_id': user_id, 'calls': len(calls)}
+        
+        with app.app_context():
+            db.create_all()
+            first, again = load(901), load(901)
+            
+            # Deferred invalidations are dropped on rollback and applied on commit
+            cache.invalidate_on_commit('user:901')
+            db.session.rollback()
+            after_rollback = load(901)
+            cache.invalidate_on_commit('user:901')
+            db.session.add(User(username='cache_tester', email='cache@example.com', password_hash='x'))
+            db.session.commit()
+            after_commit = load(901)
+            
+            # Tags added while computing invalidate the entry too
+            cache.invalidate('game:cache-test')
+            after_tag = load(901)
+            
+            # Concurrent misses compute the value once
+            slow_calls = []
+            def slow():
+                slow_calls.append(1)
+                threading.Event().wait(0.2)
+                return 'done'
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('stampede-test', slow)))
+                       for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        if first != again or after_rollback['calls'] != 1 or after_commit['calls'] != 2 or after_tag['calls'] != 3:
+            print(f"❌ Data cache: FAILED - calls {calls}")
+            return False
+        
+        if results != ['done'] * 5 or len(slow_calls) != 1:
+            print(f"❌ Data cache: FAILED - {len(slow_calls)} computations for one key")
+            return False
+        
+        print("✅ Data cache: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Data cache: FAILED - {e}")
+        return False
+
+def test_response_pipeline():
+    """Test that JSON APIs answer conditional GETs with 304 and compress large bodies"""
+    try:
+        import gzip
+        import json
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from models import db, User, UserGame, get_or_create_game
+        
+        with app.app_context():
+            db.create_all()
+            user = User(username='etag_tester', email='etag@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            for index in range(40):
+                game = get_or_create_game(f'etag-{index}', f'Conditional Game {index}')
+                db.session.add(UserGame(user_id=user.id, game_id=game.id, playtime_minutes=index,
+                                        achievements_total=10, achievements_unlocked=index % 10))
+            db.session.commit()
+            user_id = user.id
+        
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        
+        first = client.get('/api/games', headers={'Accept-Encoding': 'gzip'})
+        games = json.loads(gzip.decompress(first.data))
+        repeat = client.get('/api/games', headers={'If-None-Match': first.headers['ETag']})
+        
+        if first.headers.get('Content-Encoding') != 'gzip' or len(games) != 40:
+            print(f"❌ Response pipeline: FAILED - encoding {first.headers.get('Content-Encoding')}, {len(games)} games")
+            return False
+        
+        if repeat.status_code != 304 or repeat.data:
+            print(f"❌ Response pipeline: FAILED - unchanged library returned {repeat.status_code}")
+            return False
+        
+        print("✅ Response pipeline: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Response pipeline: FAILED - {e}")
+        return False
+
+def test_api_pagination():
+    """Test that cursor pages of /api/games add up to the streamed listing, in sort order"""
+    try:
+        import json
+        os.environ['STEAM_ENCRYPTION_KEY'] = '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4='
+        
+        from app import app
+        from models import db, User, UserGame, get_or_create_game
+        
+        with app.app_context():
+            db.create_all()
+            user = User(username='page_tester', email='page@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            for index in range(25):
+                game = get_or_create_game(f'page-{index}', f'Paged Game {index}')
+                db.session.add(UserGame(user_id=user.id, game_id=game.id, playtime_minutes=60 * (index % 4),
+                                        achievements_total=10, achievements_unlocked=index % 11))
+            
+            # Games tied on a progress value with no exact binary form
+            tie_user = User(username='tie_tester', email='tie@example.com', password_hash='x')
+            db.session.add(tie_user)
+            db.session.flush()
+            for index in range(7):
+                game = get_or_create_game(f'tie-{index}', f'Tied Game {index}')
+                db.session.add(UserGame(user_id=tie_user.id, game_id=game.id, achievements_total=3, achievements_unlocked=1))
+            db.session.commit()
+            user_id, tie_user_id = user.id, tie_user.id
+        
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        
+        streamed = json.loads(client.get('/api/games?sort=progress').data)
+        paged, cursor = [], None
+        while True:
+            page = client.get('/api/games?sort=progress&limit=10' + (f'&cursor={cursor}' if cursor else '')).get_json()
+            paged.extend(page['games'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        sparse = client.get('/api/games?fields=name&min_playtime=3&limit=50').get_json()
+        wildcard = client.get('/api/games?q=Paged_Game&limit=50').get_json()
+        bad_cursor = client.get('/api/games?limit=10&cursor=not-a-cursor')
+        
+        # Every page of tied rows moves forward: no row is returned twice and the walk ends
+        with client.session_transaction() as session:
+            session['_user_id'] = str(tie_user_id)
+        tied, cursor = [], None
+        for _ in range(10):
+            page = client.get('/api/games?sort=progress&limit=2' + (f'&cursor={cursor}' if cursor else '')).get_json()
+            tied.extend(game['appid'] for game in page['games'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        
+        progress = [game['progress'] for game in streamed]
+        if len(streamed) != 25 or paged != streamed or progress != sorted(progress, reverse=True):
+            print(f"❌ API pagination: FAILED - {len(streamed)} streamed, {len(paged)} paged")
+            return False
+        
+        if sparse['count'] != 6 or any(set(game) != {'name'} for game in sparse['games']):
+            print(f"❌ API pagination: FAILED - filtered page {sparse}")
+            return False
+        
+        if cursor or len(tied) != 7 or len(set(tied)) != 7:
+            print(f"❌ API pagination: FAILED - tied progress pages returned {tied}")
+            return False
+        
+        # Search text is matched literally, and a cursor that cannot be read is rejected
+        if wildcard['count'] != 0 or bad_cursor.status_code != 400:
+            print(f"❌ API pagination: FAILED - '_' matched {wildcard['count']} games, bad cursor gave {bad_cursor.status_code}")
+            return False
+        
+        print("✅ API pagination: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ API pagination: FAILED - {e}")
+        return False
+
 def run_tests():
     """Run all tests"""
     print("🧪 Testing Steam Achievement Tracker Application")
@@ -164,7 +926,21 @@ def run_tests():
         test_route_definitions,
         test_model_relationships,
         test_encryption_manager,
-        test_forms
+        test_forms,
+        test_game_cache,
+        test_user_stats,
+        test_counter_buffer,
+        test_image_derivatives,
+        test_image_pipeline,
+        test_stale_jobs,
+        test_image_retry,
+        test_image_spool_shared,
+        test_image_states,
+        test_email_queue,
+        test_token_reaper,
+        test_data_cache,
+        test_response_pipeline,
+        test_api_pagination
     ]
     
     passed = 0
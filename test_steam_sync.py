@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Test script for the concurrent Steam sync engine
+Tests rate limiting and per-game result ordering without calling Steam
+"""
+
+import os
+import sys
+import time
+from unittest.mock import Mock
+
+# Set test environment
+os.environ['FLASK_ENV'] = 'testing'
+
+def mock_steam_response(payload, status_code=200):
+    """Build a fake requests response"""
+    response = Mock()
+    response.status_code = status_code
+    response.headers = {}
+    response.json.return_value = payload
+    return response
+
+def test_token_bucket_rate():
+    """Test that the token bucket paces requests after the burst is used"""
+    try:
+        from steam_sync import TokenBucket
+
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        elapsed = time.monotonic() - started
+
+        # First token is free, the next four need ~0.05s each
+        if elapsed < 0.15:
+            print(f"❌ Token bucket: FAILED - 5 tokens took only {elapsed:.3f}s")
+            return False
+
+        print("✅ Token bucket rate limiting: SUCCESS")
+        return True
+
+    except Exception as e:
+        print(f"❌ Token bucket: FAILED - {e}")
+        return False
+
+def test_fetch_achievements_order():
+    """Test that concurrent fetching returns results in library order"""
+    try:
+        from steam_sync import SteamSyncEngine, PLAYER_ACHIEVEMENTS_URL
+
+        engine = SteamSyncEngine()
+        engine.requests_per_second = 1000
+
+        def fake_get(url, params=None, headers=None, timeout=None):
+            appid = params['appid']
+            if url == PLAYER_ACHIEVEMENTS_URL:
+                if appid == '30':
+                    return mock_steam_response({}, status_code=400)
+                if appid == '50':
+                    return mock_steam_response({}, status_code=503)
+                return mock_steam_response({'playerstats': {'achievements': [
+                    {'apiname': f'ACH_{appid}', 'achieved': 1, 'unlocktime': 0}
+                ]}})
+            return mock_steam_response({'game': {'availableGameStats': {'achievements': [
+                {'name': f'ACH_{appid}', 'displayName': f'Achievement {appid}'}
+            ]}}})
+
+        session = Mock()
+        session.get.side_effect = fake_get
+        engine._create_session = lambda: session
+
+        appids = ['10', '20', '30', '40', '50']
+        results = list(engine.fetch_achievements('key', 'steamid', appids))
+
+        if [appid for appid, _ in results] != appids:
+            print("❌ Fetch achievements: FAILED - results out of order")
+            return False
+
+        results = dict(results)
+        if results['30']['achievements'] or results['10']['schema'][0]['name'] != 'ACH_10':
+            print("❌ Fetch achievements: FAILED - unexpected per-game results")
+            return False
+
+        # Games without stats are synced as empty; Steam being unavailable is an error to retry
+        if results['30']['error'] or not results['50']['error']:
+            print("❌ Fetch achievements: FAILED - server errors should be reported, missing stats should not")
+            return False
+
+        # Games without stats should not trigger a schema request
+        if session.get.call_count != 8:
+            print(f"❌ Fetch achievements: FAILED - expected 8 requests, got {session.get.call_count}")
+            return False
+
+        print("✅ Concurrent achievement fetching: SUCCESS")
+        return True
+
+    except Exception as e:
+        print(f"❌ Fetch achievements: FAILED - {e}")
+        return False
+
+def test_schema_cache_usage():
+    """Test that cached schemas skip or revalidate the GetSchemaForGame request"""
+    try:
+        from steam_sync import SteamSyncEngine, SCHEMA_URL
+
+        engine = SteamSyncEngine()
+        engine.requests_per_second = 1000
+        schema = [{'name': 'ACH_1', 'displayName': 'Achievement 1'}]
+        conditional_headers = []
+
+        def fake_get(url, params=None, headers=None, timeout=None):
+            if url == SCHEMA_URL:
+                conditional_headers.append(headers)
+                return mock_steam_response({}, status_code=304)
+            return mock_steam_response({'playerstats': {'achievements': [
+                {'apiname': 'ACH_1', 'achieved': 1, 'unlocktime': 0}
+            ]}})
+
+        session = Mock()
+        session.get.side_effect = fake_get
+        engine._create_session = lambda: session
+
+        schema_cache = {
+            '10': {'schema': schema, 'fresh': True, 'etag': None, 'last_modified': None},
+            '20': {'schema': schema, 'fresh': False, 'etag': '"abc"', 'last_modified': None}
+        }
+        results = dict(engine.fetch_achievements('key', 'steamid', ['10', '20'], schema_cache))
+
+        if results['10']['schema_source'] != 'cache' or results['20']['schema_source'] != 'revalidated':
+            print("❌ Schema cache: FAILED - unexpected schema sources")
+            return False
+
+        if conditional_headers != [{'If-None-Match': '"abc"'}]:
+            print(f"❌ Schema cache: FAILED - unexpected schema requests {conditional_headers}")
+            return False
+
+        print("✅ Shared schema cache: SUCCESS")
+        return True
+
+    except Exception as e:
+        print(f"❌ Schema cache: FAILED - {e}")
+        return False
+
+def test_bulk_achievement_upsert():
+    """Test that achievement reconcile only writes new or changed rows"""
+    try:
+        os.environ.setdefault('STEAM_ENCRYPTION_KEY', '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4=')
+        from app import app
+        from models import db, User, Game, SteamAchievement, upsert_steam_achievements
+
+        with app.app_context():
+            db.create_all()
+            user = User(username='upsert_tester', email='upsert@example.com', password_hash='x')
+            game = Game(steam_app_id='upsert-1', name='Upsert Game')
+            db.session.add_all([user, game])
+            db.session.commit()
+
+            rows = [
+                {'api_name': f'ACH_{i}', 'display_name': f'Achievement {i}', 'description': '',
+                 'achieved': False, 'unlock_time': None}
+                for i in range(3)
+            ]
+            written = [upsert_steam_achievements(user.id, game.id, rows)]
+            written.append(upsert_steam_achievements(user.id, game.id, rows))
+            rows[1]['achieved'] = True
+            written.append(upsert_steam_achievements(user.id, game.id, rows))
+            db.session.commit()
+
+            achieved = [a.api_name for a in SteamAchievement.query.filter_by(user_id=user.id, achieved=True)]
+            total = SteamAchievement.query.filter_by(user_id=user.id).count()
+
+        if written != [3, 0, 1] or achieved != ['ACH_1'] or total != 3:
+            print(f"❌ Bulk upsert: FAILED - wrote {written}, achieved {achieved}, total {total}")
+            return False
+
+        print("✅ Bulk achievement upsert: SUCCESS")
+        return True
+
+    except Exception as e:
+        print(f"❌ Bulk upsert: FAILED - {e}")
+        return False
+
+def test_schema_cache_upsert():
+    """Test that caching a schema another sync already stored updates the row instead of failing"""
+    try:
+        os.environ.setdefault('STEAM_ENCRYPTION_KEY', '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4=')
+        from app import app
+        from models import db, GameSchemaCache, upsert_game_schema
+
+        with app.app_context():
+            db.create_all()
+            upsert_game_schema('schema-upsert', [{'name': 'ACH_1'}], 72, etag='"v1"')
+            db.session.commit()
+
+            # A second sync that also saw no cached row when it started
+            upsert_game_schema('schema-upsert', [{'name': 'ACH_1'}, {'name': 'ACH_2'}], 72, etag='"v2"')
+            db.session.commit()
+
+            rows = GameSchemaCache.query.filter_by(steam_app_id='schema-upsert').all()
+
+        if len(rows) != 1 or rows[0].etag != '"v2"' or rows[0].achievement_count != 2:
+            print("❌ Schema cache upsert: FAILED - expected one row holding the latest schema")
+            return False
+
+        print("✅ Schema cache upsert: SUCCESS")
+        return True
+
+    except Exception as e:
+        print(f"❌ Schema cache upsert: FAILED - {e}")
+        return False
+
+def test_incremental_change_detection():
+    """Test that incremental syncs only pick up games played since the last sync"""
+    try:
+        os.environ.setdefault('STEAM_ENCRYPTION_KEY', '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4=')
+        from datetime import datetime
+        from app import steam_game_changed
+        from models import UserGame
+
+        last_synced = datetime(2024, 1, 1)
+        user_game = UserGame(playtime_minutes=120, last_synced=last_synced)
+        synced_ts = int((last_synced - datetime(1970, 1, 1)).total_seconds())
+
+        cases = [
+            ({'playtime_forever': 120, 'rtime_last_played': synced_ts - 3600}, user_game, False),
+            ({'playtime_forever': 180, 'rtime_last_played': synced_ts - 3600}, user_game, True),
+            ({'playtime_forever': 120, 'rtime_last_played': synced_ts + 3600}, user_game, True),
+            ({'playtime_forever': 0}, None, True)
+        ]
+        for game, stored, expected in cases:
+            if steam_game_changed(game, stored) != expected:
+                print(f"❌ Incremental sync: FAILED - {game} should be changed={expected}")
+                return False
+
+        print("✅ Incremental change detection: SUCCESS")
+        return True
+
+    except Exception as e:
+        print(f"❌ Incremental sync: FAILED - {e}")
+        return False
+
+def run_steam_sync_tests():
+    """Run all Steam sync tests"""
+    print("🎮 Testing Steam Sync Engine")
+    print("=" * 50)
+
+    tests = [
+        test_token_bucket_rate,
+        test_fetch_achievements_order,
+        test_schema_cache_usage,
+        test_bulk_achievement_upsert,
+        test_schema_cache_upsert,
+        test_incremental_change_detection
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()  # Add blank line between tests
+
+    print("=" * 50)
+    print(f"🎮 Steam Sync Test Results: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("🎉 All Steam sync tests passed!")
+        return True
+    else:
+        print("⚠️  Some Steam sync tests failed. Check errors above.")
+        return False
+
+if __name__ == '__main__':
+    success = run_steam_sync_tests()
+    sys.exit(0 if success else 1)
@@ -213,6 +213,77 @@ def test_activity_types_consistency():
         print(f"❌ Activity types consistency test: FAILED - {e}")
         return False
 
+def test_activity_cursor():
+    """Test keyset cursor encoding used for feed pagination"""
+    try:
+        from models import ActivityFeed, encode_activity_cursor, decode_activity_cursor
+        
+        activity = ActivityFeed(id=42, created_at=datetime(2024, 5, 1, 12, 30, 15, 123456))
+        cursor = encode_activity_cursor(activity)
+        
+        if decode_activity_cursor(cursor) != (activity.created_at, 42):
+            print(f"❌ Activity cursor: FAILED - {cursor} did not round-trip")
+            return False
+        
+        if decode_activity_cursor('not-a-cursor') is not None:
+            print("❌ Activity cursor: FAILED - invalid cursor was accepted")
+            return False
+        
+        print("✅ Activity feed keyset cursor: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Activity cursor test: FAILED - {e}")
+        return False
+
+def test_friend_timeline_fan_out():
+    """Test that activities fan out to friends and are pruned when the friendship ends"""
+    try:
+        os.environ.setdefault('STEAM_ENCRYPTION_KEY', '98ufSmNi3HXH-U_1OiASXZ1Yht_7IBGGjawZoLJf8J4=')
+        from app import app
+        from models import db, User, UserFriendship, log_activity, get_recent_activities, prune_friend_timeline
+        
+        with app.app_context():
+            db.create_all()
+            alice = User(username='timeline_alice', email='timeline_alice@example.com', password_hash='x')
+            bob = User(username='timeline_bob', email='timeline_bob@example.com', password_hash='x')
+            db.session.add_all([alice, bob])
+            db.session.flush()
+            
+            # Activity from before the friendship is backfilled on accept
+            log_activity(user_id=bob.id, activity_type='milestone_reached', title='Before friends')
+            request = UserFriendship(user_id=alice.id, friend_id=bob.id)
+            db.session.add(request)
+            db.session.flush()
+            request.accept_friendship()
+            
+            # Later activity is fanned out on write; private activity is not
+            log_activity(user_id=bob.id, activity_type='milestone_reached', title='After friends')
+            log_activity(user_id=bob.id, activity_type='milestone_reached', title='Private', is_public=False)
+            db.session.commit()
+            
+            alice_feed = [activity.title for activity in get_recent_activities(timeline_owner_id=alice.id)]
+            bob_feed = get_recent_activities(timeline_owner_id=bob.id)
+            
+            prune_friend_timeline(alice.id, bob.id)
+            db.session.commit()
+            pruned_feed = get_recent_activities(timeline_owner_id=alice.id)
+        
+        if alice_feed != ['After friends', 'Before friends'] or bob_feed:
+            print(f"❌ Friend timeline: FAILED - got {alice_feed}")
+            return False
+        
+        if pruned_feed:
+            print("❌ Friend timeline: FAILED - entries survived removing the friend")
+            return False
+        
+        print("✅ Friend timeline fan-out: SUCCESS")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Friend timeline test: FAILED - {e}")
+        return False
+
 def run_trophy_feed_tests():
     """Run all trophy feed tests"""
     print("🏆 Testing Trophy Feed System")
@@ -224,7 +295,9 @@ def run_trophy_feed_tests():
         test_app_route_integration,
         test_template_exists,
         test_navigation_integration,
-        test_activity_types_consistency
+        test_activity_types_consistency,
+        test_activity_cursor,
+        test_friend_timeline_fan_out
     ]
     
     passed = 0
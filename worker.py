@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Standalone background worker for queued jobs (Steam refreshes, image processing) and email delivery
+Run this alongside the web process and set JOB_WORKER_THREADS=0 on the web tier
+"""
+
+import os
+
+# Keep the web-process thread pool from starting on import; this process owns the workers
+worker_threads = int(os.environ.get('JOB_WORKER_THREADS') or 2)
+os.environ['JOB_WORKER_THREADS'] = '0'
+
+from app import app
+from job_queue import job_queue
+
+if __name__ == '__main__':
+    print("🛠️  Background Job Worker")
+    print("=" * 50)
+    job_queue.app = app
+    job_queue.work_forever(max(1, worker_threads))